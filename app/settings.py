@@ -39,9 +39,12 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework.authtoken",
     "users",
+    "ratings",
     "community",
     "tournament",
     "matches",
+    "courts",
+    "search",
     'drf_yasg',
 ]
 
@@ -103,6 +106,18 @@ DATABASES = {
     }
 }'''
 
+# Cache
+# O índice de sugestões de adversários (community/suggestions.py), o mapa de papéis e
+# as agendas das quadras (courts/availability.py) avisam os outros processos pelo cache.
+# LocMemCache é por processo: com mais de um worker, aponte "default" para um cache
+# compartilhado com incr atômico, como Redis (django.core.cache.backends.redis.RedisCache)
+# ou Memcached; sem isso cada worker só enxerga as próprias mudanças.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -157,6 +172,11 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Imagens enviadas (fotos de perfil e de comunidades) e suas variantes
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
+IMAGE_WORKERS = 2  # Threads que geram as variantes das imagens
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.urls import include, path
 from django.contrib import admin
 
@@ -41,7 +43,10 @@ urlpatterns = [
     path("api/", include("tournament.urls")),  # Include tournament endpoints
     path("api/", include("community.urls")),
     path("api/", include("matches.urls")),
+    path("api/", include("ratings.urls")),
+    path("api/", include("courts.urls")),
+    path("api/", include("search.urls")),
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-]
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,48 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from matches.models import Match
+from tournament.models import Tournament
+from .models import Community, CommunityUsers
+
+# Modelo contado -> (coluna da comunidade, contador em Community)
+COUNTED = {
+    CommunityUsers: ("community_id", "member_count"),
+    Match: ("community_id_id", "match_count"),
+    Tournament: ("community_id_id", "tournament_count"),
+}
+
+
+def adjust(community_id, counter, delta):
+    """
+    Soma delta ao contador com um UPDATE atômico (F), sem ler a comunidade.
+    """
+    if community_id is None or not delta:
+        return
+    Community.objects.filter(pk=community_id).update(**{counter: F(counter) + delta})
+
+
+def adjust_for(instance, delta):
+    column, counter = COUNTED[type(instance)]
+    adjust(getattr(instance, column), counter, delta)
+
+
+def repair():
+    """
+    Recalcula todos os contadores com um único UPDATE com subconsultas agrupadas.
+    Retorna o número de comunidades.
+    """
+    def total(model, column):
+        counted = (
+            model.objects.filter(**{column: OuterRef("pk")})
+            .order_by()
+            .values(column)
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+
+    return Community.objects.update(
+        member_count=total(CommunityUsers, "community"),
+        match_count=total(Match, "community_id"),
+        tournament_count=total(Tournament, "community_id"),
+    )
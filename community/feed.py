@@ -0,0 +1,111 @@
+import heapq
+from itertools import groupby, islice
+
+from django.db.models import F, Q, Subquery, Window
+from django.db.models.functions import RowNumber
+from users.models import UserProfile
+from .models import FeedEntry
+
+FEED_MAX_ENTRIES = 200  # Entradas guardadas por comunidade
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+MATCH_RESULT = "match_result"
+TOURNAMENT_CREATED = "tournament_created"
+MEMBER_JOINED = "member_joined"
+
+
+def player_names(profile_ids):
+    """
+    {id de UserProfile: nome para exibição} com uma consulta.
+    """
+    return {
+        profile_id: f"{first} {last}".strip() or username
+        for profile_id, first, last, username in UserProfile.objects.filter(pk__in=profile_ids).values_list(
+            "pk", "user__first_name", "user__last_name", "user__username"
+        )
+    }
+
+
+def trim(community_ids):
+    """
+    Apaga o que passou de FEED_MAX_ENTRIES em cada comunidade, com um DELETE por comunidade.
+    """
+    for community_id in set(community_ids):
+        oldest_kept = (
+            FeedEntry.objects.filter(community_id=community_id)
+            .order_by("-id")
+            .values_list("id", flat=True)[FEED_MAX_ENTRIES - 1:FEED_MAX_ENTRIES]
+        )
+        FeedEntry.objects.filter(community_id=community_id, id__lt=Subquery(oldest_kept)).delete()
+
+
+def publish(entries):
+    """
+    Grava entradas já montadas (FeedEntry não salvas) e mantém o limite de cada comunidade.
+    """
+    entries = [entry for entry in entries if entry.community_id is not None]
+    if entries:
+        FeedEntry.objects.bulk_create(entries)
+        trim(entry.community_id for entry in entries)
+
+
+def match_entry(match, winners, losers, sets):
+    """
+    Resultado de partida; sets já na orientação do vencedor.
+    """
+    names = player_names(winners + losers)
+    return FeedEntry(
+        community_id=match.community_id_id,
+        kind=MATCH_RESULT,
+        payload={
+            "match": match.pk,
+            "winners": [{"id": player, "name": names.get(player)} for player in winners],
+            "losers": [{"id": player, "name": names.get(player)} for player in losers],
+            "sets": [list(games) for games in sets],
+        },
+    )
+
+
+def tournament_entry(tournament):
+    return FeedEntry(
+        community_id=tournament.community_id_id,
+        kind=TOURNAMENT_CREATED,
+        payload={
+            "tournament": tournament.pk,
+            "name": tournament.name,
+            "type": tournament.type,
+            "start_date": tournament.start_date.isoformat() if tournament.start_date else None,
+        },
+    )
+
+
+def member_entries(community_id, profile_ids):
+    names = player_names(profile_ids)
+    return [
+        FeedEntry(community_id=community_id, kind=MEMBER_JOINED, payload={"player": profile_id, "name": names.get(profile_id)})
+        for profile_id in profile_ids
+    ]
+
+
+def user_feed(community_ids, before=None, limit=FEED_PAGE_SIZE):
+    """
+    Feed combinado das comunidades, do mais novo para o mais antigo, a partir
+    do cursor before (id da última entrada já vista).
+    Uma consulta traz no máximo limit entradas de cada comunidade (ROW_NUMBER
+    por comunidade), que chegam ordenadas por comunidade e são intercaladas
+    com um merge de k listas em heap. O custo não depende do tamanho do histórico.
+    Retorna (entradas, próximo cursor ou None).
+    """
+    if not community_ids:
+        return [], None
+    entries = (
+        FeedEntry.objects.filter(Q(id__lt=before) if before else Q(), community_id__in=community_ids)
+        .annotate(position=Window(RowNumber(), partition_by=F("community_id"), order_by=F("id").desc()))
+        .filter(position__lte=limit)
+        .order_by("community_id", "-id")
+    )
+    per_community = [list(run) for _, run in groupby(entries, key=lambda entry: entry.community_id)]
+    page = list(islice(heapq.merge(*per_community, key=lambda entry: -entry.id), limit))
+    next_before = page[-1].id if len(page) == limit else None
+    return page, next_before
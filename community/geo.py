@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+from django.db.models import Q
+from .models import Community
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM  # Metade da circunferência cobre o globo
+NEAREST_START_RADIUS_KM = 25.0
+
+
+def haversine_km(lat, lon, lats, lons):
+    """
+    Distância em km de (lat, lon) até cada ponto de lats/lons (vetores numpy).
+    """
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Filtro Q que contém todos os pontos a até radius_km de (lat, lon). A caixa
+    pode ter falsos positivos, descartados depois pela distância exata.
+    Trata caixas que cruzam o antimeridiano ou alcançam um polo.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        # A caixa contém um polo: todas as longitudes
+        return Q(latitude__gte=max(min_lat, -90), latitude__lte=min(max_lat, 90))
+
+    delta_lon = math.degrees(math.asin(min(math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)), 1.0)))
+    box = Q(latitude__gte=min_lat, latitude__lte=max_lat)
+    min_lon, max_lon = lon - delta_lon, lon + delta_lon
+    if min_lon < -180:
+        return box & (Q(longitude__gte=min_lon + 360) | Q(longitude__lte=max_lon))
+    if max_lon > 180:
+        return box & (Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon - 360))
+    return box & Q(longitude__gte=min_lon, longitude__lte=max_lon)
+
+
+def _candidates(lat, lon, radius_km):
+    """
+    Comunidades dentro da caixa (uma consulta só com id e coordenadas) e suas distâncias.
+    """
+    rows = np.array(
+        Community.objects.filter(bounding_box(lat, lon, radius_km)).values_list("pk", "latitude", "longitude"),
+        dtype=np.float64,
+    ).reshape(-1, 3)
+    return rows[:, 0].astype(np.int64), haversine_km(lat, lon, rows[:, 1], rows[:, 2])
+
+
+def within(lat, lon, radius_km, limit=None):
+    """
+    Comunidades a até radius_km, da mais próxima para a mais distante: [(id, distância em km)].
+    """
+    ids, distances = _candidates(lat, lon, min(radius_km, MAX_RADIUS_KM))
+    inside = distances <= radius_km
+    ids, distances = ids[inside], distances[inside]
+    order = np.lexsort((ids, distances))[:limit]
+    return [(int(ids[i]), float(distances[i])) for i in order]
+
+
+def nearest(lat, lon, k):
+    """
+    As k comunidades mais próximas: dobra o raio até que a caixa tenha k
+    comunidades dentro do raio, então só a vizinhança é lida do banco.
+    """
+    radius = NEAREST_START_RADIUS_KM
+    while True:
+        ids, distances = _candidates(lat, lon, radius)
+        # Pontos fora do raio mas dentro da caixa podem estar mais longe que outros fora da caixa
+        if np.count_nonzero(distances <= radius) >= k or radius >= MAX_RADIUS_KM:
+            break
+        radius = min(radius * 2, MAX_RADIUS_KM)
+    inside = distances <= radius
+    ids, distances = ids[inside], distances[inside]
+    order = np.lexsort((ids, distances))[:k]
+    return [(int(ids[i]), float(distances[i])) for i in order]
@@ -0,0 +1,150 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+from matches.models import Match
+from matches.results import final_sets, match_sides, side_totals
+from ratings.models import PlayerRating
+from .models import Community, CommunityStanding
+
+
+def _rank_for(community_id, player_id, rating):
+    """
+    Posição que o jogador ocuparia com esse rating: 1 + quem fica à frente dele.
+    """
+    ahead = CommunityStanding.objects.filter(
+        Q(rating__gt=rating) | Q(rating=rating, player_id__lt=player_id), community_id=community_id
+    ).exclude(player_id=player_id)
+    return ahead.count() + 1
+
+
+def _move(standing, rating, tracked=()):
+    """
+    Leva o jogador para a posição do novo rating deslocando só quem está entre a
+    posição antiga e a nova, com um update por faixa. As posições das
+    classificações em tracked são ajustadas também em memória.
+    """
+    old_rank = standing.rank
+    new_rank = _rank_for(standing.community_id, standing.player_id, rating)
+    others = CommunityStanding.objects.filter(community_id=standing.community_id).exclude(pk=standing.pk)
+    if new_rank < old_rank:
+        others.filter(rank__gte=new_rank, rank__lt=old_rank).update(rank=F("rank") + 1)
+    elif new_rank > old_rank:
+        others.filter(rank__gt=old_rank, rank__lte=new_rank).update(rank=F("rank") - 1)
+    CommunityStanding.objects.filter(pk=standing.pk).update(rank=new_rank, rating=rating)
+    standing.rank, standing.rating = new_rank, rating
+
+    for other in tracked:
+        if other is standing:
+            continue
+        if new_rank <= other.rank < old_rank:
+            other.rank += 1
+        elif old_rank < other.rank <= new_rank:
+            other.rank -= 1
+
+
+def record_match(match, sets):
+    """
+    Atualiza a classificação da comunidade com o resultado de uma partida,
+    com número fixo de consultas. Os ratings já devem ter sido atualizados.
+    """
+    community_id = match.community_id_id
+    sides = match_sides(match)
+    if community_id is None or sides is None:
+        return
+    winners, losers, winner_is_home = sides
+    sets_won, sets_lost, games_won, games_lost = side_totals(sets, winner_is_home)
+    players = winners + losers
+
+    with transaction.atomic():
+        # Trava a comunidade: as faixas de rank não podem ser movidas por duas partidas ao mesmo tempo
+        Community.objects.select_for_update().filter(pk=community_id).first()
+        standings = {
+            standing.player_id: standing
+            for standing in CommunityStanding.objects.filter(community_id=community_id, player_id__in=players)
+        }
+        missing = [player_id for player_id in players if player_id not in standings]
+        if missing:
+            total = CommunityStanding.objects.filter(community_id=community_id).count()
+            created = CommunityStanding.objects.bulk_create([
+                CommunityStanding(community_id=community_id, player_id=player_id, rank=total + i)
+                for i, player_id in enumerate(missing, start=1)
+            ])
+            standings.update((standing.player_id, standing) for standing in created)
+
+        CommunityStanding.objects.filter(community_id=community_id, player_id__in=winners).update(
+            wins=F("wins") + 1,
+            sets_won=F("sets_won") + sets_won,
+            sets_lost=F("sets_lost") + sets_lost,
+            games_won=F("games_won") + games_won,
+            games_lost=F("games_lost") + games_lost,
+        )
+        CommunityStanding.objects.filter(community_id=community_id, player_id__in=losers).update(
+            losses=F("losses") + 1,
+            sets_won=F("sets_won") + sets_lost,
+            sets_lost=F("sets_lost") + sets_won,
+            games_won=F("games_won") + games_lost,
+            games_lost=F("games_lost") + games_won,
+        )
+
+        ratings = dict(
+            PlayerRating.objects.filter(community_id=community_id, player_id__in=players).values_list("player_id", "rating")
+        )
+        for player_id in players:
+            standing = standings[player_id]
+            _move(standing, ratings.get(player_id, standing.rating), standings.values())
+
+
+def rebuild(community_id):
+    """
+    Recalcula a classificação inteira da comunidade a partir das partidas,
+    com poucas consultas e um bulk_create. Retorna o número de jogadores.
+    """
+    matches = list(
+        Match.objects.filter(community_id=community_id, winner1__isnull=False).only(
+            "match_id", "home1", "home2", "away1", "away2", "winner1"
+        )
+    )
+    sets = final_sets([match.match_id for match in matches])
+    totals = defaultdict(lambda: [0, 0, 0, 0, 0, 0])  # vitórias, derrotas, sets e games ganhos e perdidos
+    for match in matches:
+        sides = match_sides(match)
+        if sides is None:
+            continue
+        winners, losers, winner_is_home = sides
+        sets_won, sets_lost, games_won, games_lost = side_totals(sets.get(match.match_id, []), winner_is_home)
+        for player_id in winners:
+            row = totals[player_id]
+            row[0] += 1
+            row[2:] = [row[2] + sets_won, row[3] + sets_lost, row[4] + games_won, row[5] + games_lost]
+        for player_id in losers:
+            row = totals[player_id]
+            row[1] += 1
+            row[2:] = [row[2] + sets_lost, row[3] + sets_won, row[4] + games_lost, row[5] + games_won]
+
+    ratings = dict(
+        PlayerRating.objects.filter(community_id=community_id, player_id__in=list(totals)).values_list("player_id", "rating")
+    )
+    standings = [
+        CommunityStanding(
+            community_id=community_id,
+            player_id=player_id,
+            rank=0,
+            rating=ratings.get(player_id, CommunityStanding._meta.get_field("rating").default),
+            wins=row[0],
+            losses=row[1],
+            sets_won=row[2],
+            sets_lost=row[3],
+            games_won=row[4],
+            games_lost=row[5],
+        )
+        for player_id, row in totals.items()
+    ]
+    standings.sort(key=lambda standing: (-standing.rating, standing.player_id))
+    for rank, standing in enumerate(standings, start=1):
+        standing.rank = rank
+
+    with transaction.atomic():
+        CommunityStanding.objects.filter(community_id=community_id).delete()
+        CommunityStanding.objects.bulk_create(standings, batch_size=500)
+    return len(standings)
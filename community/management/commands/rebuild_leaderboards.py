@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from community.leaderboard import rebuild
+from community.models import Community
+
+
+class Command(BaseCommand):
+    help = "Recalcula a classificação materializada das comunidades a partir das partidas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--community", type=int, help="Recalcula apenas esta comunidade.")
+
+    def handle(self, *args, **options):
+        communities = Community.objects.all()
+        if options["community"]:
+            communities = communities.filter(pk=options["community"])
+        for community_id in communities.values_list("pk", flat=True):
+            players = rebuild(community_id)
+            self.stdout.write(f"Comunidade {community_id}: {players} jogadores classificados")
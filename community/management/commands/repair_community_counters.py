@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from community.counters import repair
+
+
+class Command(BaseCommand):
+    help = "Recalcula os contadores de membros, partidas e torneios de todas as comunidades."
+
+    def handle(self, *args, **options):
+        communities = repair()
+        self.stdout.write(f"{communities} comunidades atualizadas")
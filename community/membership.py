@@ -0,0 +1,200 @@
+import csv
+import io
+
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
+from users.models import UserProfile
+from .models import CommunityUsers
+from .counters import adjust
+from .permissions import invalidate_roles
+from . import feed
+from . import suggestions
+
+# Resultado por linha nas operações em lote
+ADDED = "added"
+UPDATED = "updated"
+ALREADY_MEMBER = "already_member"
+NOT_MEMBER = "not_member"
+NOT_FOUND = "not_found"
+INVALID_ROLE = "invalid_role"
+FORBIDDEN_ROLE = "forbidden_role"
+FORBIDDEN_MEMBER = "forbidden_member"
+INVALID_ROW = "invalid_row"
+
+DEFAULT_ROLE = "member"
+ROLES = {role for role, _ in CommunityUsers.ROLE_CHOICES}
+CSV_CHUNK_SIZE = 500
+
+
+class MembershipError(Exception):
+    pass
+
+
+def parse_entries(entries):
+    """
+    Converte [{"id": id de User, "role": papel}] em [(id, papel)] sem repetir usuários.
+    O papel é opcional e normalizado para minúsculas.
+    """
+    if not isinstance(entries, list) or not entries:
+        raise MembershipError("users deve ser uma lista de {id, role}")
+    parsed = {}
+    try:
+        for entry in entries:
+            user_id = int(entry["id"])
+            parsed.setdefault(user_id, str(entry.get("role") or DEFAULT_ROLE).strip().lower())
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise MembershipError("Cada usuário precisa de um id inteiro")
+    return list(parsed.items())
+
+
+def _profiles(community_id, user_ids):
+    """
+    Uma consulta: id de User -> (id de UserProfile, papel na comunidade ou None se não é membro).
+    """
+    return {
+        user_id: (profile_id, role and role.lower())
+        for user_id, profile_id, role in UserProfile.objects.filter(user_id__in=user_ids)
+        .annotate(role=Subquery(
+            CommunityUsers.objects.filter(community_id=community_id, user=OuterRef("pk")).values("role")[:1]
+        ))
+        .values_list("user_id", "pk", "role")
+    }
+
+
+def add_members(community_id, entries, allowed_roles=ROLES):
+    """
+    Adiciona vários usuários com seus papéis em duas consultas: validação e
+    bulk_create. Se uma inserção concorrente tomar a frente, a validação é refeita
+    e quem já virou membro sai do lote, para que resultado, contador e feed
+    contem só as linhas realmente inseridas.
+    Papéis fora de allowed_roles (acima do de quem pediu) são recusados.
+    Retorna [(user_id, resultado)] na ordem recebida.
+    """
+    outcomes = {}
+    rows = {}
+    with transaction.atomic():
+        profiles = _profiles(community_id, [user_id for user_id, _ in entries])
+        for user_id, role in entries:
+            if role not in ROLES:
+                outcomes[user_id] = INVALID_ROLE
+            elif role not in allowed_roles:
+                outcomes[user_id] = FORBIDDEN_ROLE
+            elif user_id not in profiles:
+                outcomes[user_id] = NOT_FOUND
+            elif profiles[user_id][1]:
+                outcomes[user_id] = ALREADY_MEMBER
+            else:
+                rows[user_id] = CommunityUsers(community_id=community_id, user_id=profiles[user_id][0], role=role)
+                outcomes[user_id] = ADDED
+
+        while rows:
+            try:
+                with transaction.atomic():
+                    CommunityUsers.objects.bulk_create(list(rows.values()))
+                break
+            except IntegrityError:
+                taken = [user_id for user_id, (_, member) in _profiles(community_id, list(rows)).items() if member]
+                if not taken:
+                    raise
+                for user_id in taken:
+                    del rows[user_id]
+                    outcomes[user_id] = ALREADY_MEMBER
+
+        if rows:
+            adjust(community_id, "member_count", len(rows))
+            feed.publish(feed.member_entries(
+                community_id, [row.user_id for row in rows.values() if not row.role.startswith("pending")]
+            ))
+            # bulk_create não dispara post_save
+            added = list(rows)
+            transaction.on_commit(lambda: invalidate_roles(added))
+            transaction.on_commit(lambda: suggestions.invalidate(community_id))
+    return [(user_id, outcomes[user_id]) for user_id, _ in entries]
+
+
+def update_roles(community_id, entries, allowed_roles=ROLES, manageable_roles=ROLES):
+    """
+    Altera o papel de vários membros com uma consulta de validação e um UPDATE por papel.
+    Papéis fora de allowed_roles são recusados, assim como mudanças em membros cujo
+    papel atual está fora de manageable_roles (no nível de quem pediu ou acima).
+    Retorna [(user_id, resultado)] na ordem recebida.
+    """
+    outcomes = []
+    by_role = {}
+    with transaction.atomic():
+        profiles = _profiles(community_id, [user_id for user_id, _ in entries])
+        for user_id, role in entries:
+            if role not in ROLES:
+                outcomes.append((user_id, INVALID_ROLE))
+            elif role not in allowed_roles:
+                outcomes.append((user_id, FORBIDDEN_ROLE))
+            elif user_id not in profiles:
+                outcomes.append((user_id, NOT_FOUND))
+            elif not profiles[user_id][1]:
+                outcomes.append((user_id, NOT_MEMBER))
+            elif profiles[user_id][1] not in manageable_roles:
+                outcomes.append((user_id, FORBIDDEN_MEMBER))
+            else:
+                by_role.setdefault(role, []).append(profiles[user_id][0])
+                outcomes.append((user_id, UPDATED))
+        for role, profile_ids in by_role.items():
+            CommunityUsers.objects.filter(community_id=community_id, user_id__in=profile_ids).update(role=role)
+        if by_role:
+            updated = [user_id for user_id, outcome in outcomes if outcome == UPDATED]
+            transaction.on_commit(lambda: invalidate_roles(updated))
+            transaction.on_commit(lambda: suggestions.invalidate(community_id))
+    return outcomes
+
+
+def import_csv(community_id, upload, allowed_roles=ROLES):
+    """
+    Importa membros de um CSV com colunas user_id e role (opcional), lido em
+    blocos de CSV_CHUNK_SIZE linhas sem carregar o arquivo inteiro.
+    Um arquivo malformado levanta MembershipError; os blocos anteriores ao erro
+    já foram gravados.
+    Retorna [(linha, user_id, resultado)].
+    """
+    reader = csv.DictReader(io.TextIOWrapper(upload, encoding="utf-8-sig", newline=""))
+    try:
+        fieldnames = reader.fieldnames
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise MembershipError(f"CSV inválido: {e}")
+    if not fieldnames or "user_id" not in fieldnames:
+        raise MembershipError("O CSV precisa de uma coluna user_id")
+
+    results = []
+    chunk = []
+
+    def flush():
+        lines = {}
+        entries = []
+        for line, user_id, role in chunk:
+            if user_id in lines:
+                results.append((line, user_id, ALREADY_MEMBER))
+                continue
+            lines[user_id] = line
+            entries.append((user_id, role))
+        results.extend((lines[user_id], user_id, outcome) for user_id, outcome in add_members(community_id, entries, allowed_roles))
+        chunk.clear()
+
+    rows = iter(reader)
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            break
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise MembershipError(f"CSV inválido na linha {reader.line_num + 1}: {e}")
+        line = reader.line_num
+        try:
+            user_id = int(row["user_id"])
+        except (TypeError, ValueError):
+            results.append((line, row["user_id"], INVALID_ROW))
+            continue
+        chunk.append((line, user_id, (row.get("role") or DEFAULT_ROLE).strip().lower()))
+        if len(chunk) >= CSV_CHUNK_SIZE:
+            flush()
+    if chunk:
+        flush()
+    results.sort()
+    return results
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0002_alter_communityusers_options_and_more'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommunityStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.IntegerField()),
+                ('rating', models.FloatField(default=1500.0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('sets_won', models.IntegerField(default=0)),
+                ('sets_lost', models.IntegerField(default=0)),
+                ('games_won', models.IntegerField(default=0)),
+                ('games_lost', models.IntegerField(default=0)),
+                ('community', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='community.community')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='community_standings', to='users.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['community', 'rank'], name='community_c_communi_9646eb_idx'), models.Index(fields=['community', '-rating', 'player'], name='community_c_communi_c2c19a_idx')],
+                'unique_together': {('community', 'player')},
+            },
+        ),
+    ]
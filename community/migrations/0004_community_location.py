@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:41
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0003_community_standing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddIndex(
+            model_name='community',
+            index=models.Index(fields=['latitude', 'longitude'], name='community_c_latitud_4632a3_idx'),
+        ),
+    ]
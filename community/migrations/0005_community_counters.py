@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing(apps, schema_editor):
+    Community = apps.get_model("community", "Community")
+    counted = [
+        (apps.get_model("community", "CommunityUsers"), "community", "member_count"),
+        (apps.get_model("matches", "Match"), "community_id", "match_count"),
+        (apps.get_model("tournament", "Tournament"), "community_id", "tournament_count"),
+    ]
+    communities = {community.pk: community for community in Community.objects.all()}
+    for model, column, counter in counted:
+        for community_id, total in model.objects.exclude(**{column: None}).values_list(column).annotate(total=Count("pk")).order_by():
+            setattr(communities[community_id], counter, total)
+    Community.objects.bulk_update(communities.values(), ["member_count", "match_count", "tournament_count"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0004_community_location'),
+        ('matches', '0002_head_to_head'),
+        ('tournament', '0007_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='match_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='member_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='tournament_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0005_community_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommunityStatsBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField()),
+                ('matches', models.IntegerField(default=0)),
+                ('completed_matches', models.IntegerField(default=0)),
+                ('active_players', models.IntegerField(default=0)),
+                ('tournaments', models.IntegerField(default=0)),
+                ('tournament_entries', models.IntegerField(default=0)),
+                ('timed_matches', models.IntegerField(default=0)),
+                ('match_seconds', models.FloatField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('community', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_buckets', to='community.community')),
+            ],
+            options={
+                'unique_together': {('community', 'week')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0006_community_stats_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('match_result', 'Match Result'), ('tournament_created', 'Tournament Created'), ('member_joined', 'Member Joined')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('community', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='community.community')),
+            ],
+            options={
+                'verbose_name_plural': 'Feed Entries',
+                'indexes': [models.Index(fields=['community', '-id'], name='community_f_communi_276c4a_idx')],
+            },
+        ),
+    ]
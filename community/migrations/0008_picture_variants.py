@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0007_feed_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='picture_medium',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='community/variants/'),
+        ),
+        migrations.AddField(
+            model_name='community',
+            name='picture_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='community/variants/'),
+        ),
+    ]
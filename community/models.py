@@ -1,7 +1,9 @@
 from django.db import models
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
 
 from users.models import UserProfile
+from ratings.glicko import INITIAL_RATING
 
 class Community(models.Model):
     community_id = models.AutoField(primary_key=True)
@@ -10,6 +12,21 @@ class Community(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     picture = models.ImageField(upload_to='community/', null=True, blank=True)
+    # Variantes geradas por users/images.py, sem metadados
+    picture_thumbnail = models.ImageField(upload_to='community/variants/', null=True, blank=True, editable=False)
+    picture_medium = models.ImageField(upload_to='community/variants/', null=True, blank=True, editable=False)
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    # Contadores mantidos por counters.py; inclui convites e pedidos pendentes em member_count
+    member_count = models.IntegerField(default=0)
+    match_count = models.IntegerField(default=0)
+    tournament_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Filtro por caixa delimitadora em geo.py: faixa de latitude, depois longitude
+            models.Index(fields=["latitude", "longitude"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -33,4 +50,79 @@ class CommunityUsers(models.Model):
         verbose_name_plural = "Community Users"
         
     def __str__(self):
-        return f"{self.user.name} in {self.community.name}"
\ No newline at end of file
+        return f"{self.user.name} in {self.community.name}"
+
+class CommunityStanding(models.Model):
+    """
+    Classificação materializada da comunidade, atualizada a cada partida.
+    rank segue (rating desc, player_id) e é mantido sem recalcular a tabela inteira.
+    """
+    community = models.ForeignKey(Community, on_delete=models.CASCADE, related_name="standings")
+    player = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="community_standings")
+    rank = models.IntegerField()
+    rating = models.FloatField(default=INITIAL_RATING)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    sets_won = models.IntegerField(default=0)
+    sets_lost = models.IntegerField(default=0)
+    games_won = models.IntegerField(default=0)
+    games_lost = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ["community", "player"]
+        indexes = [
+            models.Index(fields=["community", "rank"]),
+            models.Index(fields=["community", "-rating", "player"]),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.player} in {self.community.name}"
+
+
+class CommunityStatsBucket(models.Model):
+    """
+    Estatísticas de uma semana da comunidade (week é a segunda-feira, em UTC).
+    Semanas fechadas não são recalculadas; veja stats.py.
+    """
+    community = models.ForeignKey(Community, on_delete=models.CASCADE, related_name="stats_buckets")
+    week = models.DateField()
+    matches = models.IntegerField(default=0)
+    completed_matches = models.IntegerField(default=0)
+    active_players = models.IntegerField(default=0)
+    tournaments = models.IntegerField(default=0)
+    tournament_entries = models.IntegerField(default=0)
+    timed_matches = models.IntegerField(default=0)  # Partidas com pelo menos dois momentos registrados
+    match_seconds = models.FloatField(default=0)  # Soma das durações das partidas cronometradas
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ["community", "week"]
+
+    def __str__(self):
+        return f"{self.community.name} week of {self.week}"
+
+
+class FeedEntry(models.Model):
+    """
+    Evento do feed de uma comunidade, gravado quando acontece. payload traz o
+    necessário para exibir o evento sem outras consultas (ids e nomes).
+    Cada comunidade guarda só as entradas mais recentes; veja feed.py.
+    """
+    KIND_CHOICES = [
+        ("match_result", "Match Result"),
+        ("tournament_created", "Tournament Created"),
+        ("member_joined", "Member Joined"),
+    ]
+
+    community = models.ForeignKey(Community, on_delete=models.CASCADE, related_name="feed_entries")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    payload = models.JSONField(default=dict)
+
+    class Meta:
+        verbose_name_plural = "Feed Entries"
+        # O id crescente ordena o feed e serve de cursor
+        indexes = [models.Index(fields=["community", "-id"])]
+
+    def __str__(self):
+        return f"{self.kind} in {self.community.name}"
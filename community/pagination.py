@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CommunityCursorPagination(CursorPagination):
+    """
+    Paginação por cursor das listas de uma comunidade (membros e torneios).
+    O cursor guarda a última chave vista, então páginas distantes custam o mesmo
+    que a primeira e inserções concorrentes não duplicam nem pulam linhas.
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def __init__(self, ordering):
+        self.ordering = ordering
@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from rest_framework.permissions import BasePermission
+from .models import CommunityUsers
+
+ADMIN_ROLES = {"owner", "admin"}
+MANAGER_ROLES = ADMIN_ROLES | {"moderator"}
+ROLE_CACHE_TIMEOUT = 300
+# Hierarquia dos papéis: ninguém atribui um papel acima do seu
+ROLE_RANK = {
+    "pending invitation": 0,
+    "pending admin acceptance": 0,
+    "member": 1,
+    "moderator": 2,
+    "admin": 3,
+    "owner": 4,
+}
+
+
+def _cache_key(user_id):
+    return f"community_roles:{user_id}"
+
+
+def community_roles(request):
+    """
+    Papéis do usuário do request em todas as suas comunidades ({community_id: papel}).
+    Carregado uma vez por request, a partir do cache ou de uma única consulta.
+    Os papéis são normalizados para minúsculas ("ADMIN" vale como "admin").
+    """
+    roles = getattr(request, "_community_roles", None)
+    if roles is not None:
+        return roles
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        roles = {}
+    else:
+        roles = cache.get(_cache_key(user.pk))
+        if roles is None:
+            roles = {
+                community_id: role.lower()
+                for community_id, role in CommunityUsers.objects.filter(user__user=user).values_list("community_id", "role")
+            }
+            cache.set(_cache_key(user.pk), roles, ROLE_CACHE_TIMEOUT)
+    request._community_roles = roles
+    return roles
+
+
+def has_role(request, community_id, roles):
+    return community_roles(request).get(community_id) in roles
+
+
+def assignable_roles(request, community_id):
+    """
+    Papéis que o usuário do request pode atribuir na comunidade: os de nível igual ou abaixo do seu.
+    """
+    rank = ROLE_RANK.get(community_roles(request).get(community_id))
+    if rank is None:
+        return set()
+    return {role for role, role_rank in ROLE_RANK.items() if role_rank <= rank}
+
+
+def manageable_roles(request, community_id):
+    """
+    Papéis dos membros cujo papel o usuário do request pode alterar: só os abaixo do seu.
+    """
+    rank = ROLE_RANK.get(community_roles(request).get(community_id))
+    if rank is None:
+        return set()
+    return {role for role, role_rank in ROLE_RANK.items() if role_rank < rank}
+
+
+def invalidate_roles(user_ids):
+    """
+    Descarta os papéis em cache dos usuários (ids de User) depois de uma mudança.
+    """
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+class IsCommunityManager(BasePermission):
+    """
+    Só administradores e moderadores da comunidade.
+    """
+    message = "Apenas administradores e moderadores da comunidade podem fazer isso."
+    roles = MANAGER_ROLES
+
+    def has_object_permission(self, request, view, obj):
+        return has_role(request, obj.pk, self.roles)
+
+
+class IsCommunityAdmin(IsCommunityManager):
+    """
+    Só administradores da comunidade.
+    """
+    message = "Apenas administradores da comunidade podem fazer isso."
+    roles = ADMIN_ROLES
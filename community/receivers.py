@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from matches.models import Match
+from matches.results import match_sides
+from matches.signals import match_completed
+from ratings.signals import rating_changed
+from tournament.models import Tournament
+from users.images import needs_processing, schedule
+from .counters import adjust_for
+from .leaderboard import record_match
+from . import feed
+from .models import Community, CommunityUsers
+from .permissions import invalidate_roles
+from . import suggestions
+
+
+@receiver(match_completed)
+def update_leaderboard(sender, match, sets, **kwargs):
+    """
+    Atualiza a classificação da comunidade. Roda depois do receptor de ratings,
+    que vem antes em INSTALLED_APPS.
+    """
+    record_match(match, sets)
+
+
+@receiver(rating_changed)
+def update_opponent_index(sender, ratings, **kwargs):
+    """
+    Leva os novos ratings ao índice de sugestão de adversários depois do commit.
+    """
+    transaction.on_commit(lambda: suggestions.ratings_changed(ratings))
+
+
+@receiver(post_save, sender=CommunityUsers)
+def add_to_opponent_index(sender, instance, **kwargs):
+    member = not instance.role.startswith("pending")
+    transaction.on_commit(lambda: suggestions.membership_changed(instance.community_id, instance.user_id, member))
+
+
+@receiver(post_delete, sender=CommunityUsers)
+def remove_from_opponent_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: suggestions.membership_changed(instance.community_id, instance.user_id, False))
+
+
+@receiver(post_save, sender=CommunityUsers)
+@receiver(post_delete, sender=CommunityUsers)
+def invalidate_role_cache(sender, instance, **kwargs):
+    user_id = instance.user.user_id
+    transaction.on_commit(lambda: invalidate_roles([user_id]))
+
+
+@receiver(post_save, sender=CommunityUsers)
+@receiver(post_save, sender=Match)
+@receiver(post_save, sender=Tournament)
+def count_created(sender, instance, created, **kwargs):
+    """
+    Mantém os contadores da comunidade. Os caminhos com bulk_create ajustam os contadores por conta própria.
+    """
+    if created:
+        adjust_for(instance, 1)
+
+
+@receiver(post_delete, sender=CommunityUsers)
+@receiver(post_delete, sender=Match)
+@receiver(post_delete, sender=Tournament)
+def count_deleted(sender, instance, **kwargs):
+    adjust_for(instance, -1)
+
+
+@receiver(match_completed)
+def publish_match_result(sender, match, sets, **kwargs):
+    sides = match_sides(match)
+    if sides is None or match.community_id_id is None:
+        return
+    winners, losers, winner_is_home = sides
+    oriented = sets if winner_is_home else [(away, home) for home, away in sets]
+    feed.publish([feed.match_entry(match, winners, losers, oriented)])
+
+
+@receiver(post_save, sender=Tournament)
+def publish_tournament(sender, instance, created, **kwargs):
+    if created and instance.community_id_id is not None:
+        feed.publish([feed.tournament_entry(instance)])
+
+
+@receiver(post_save, sender=CommunityUsers)
+def publish_member(sender, instance, created, **kwargs):
+    if created and not instance.role.startswith("pending"):
+        feed.publish(feed.member_entries(instance.community_id, [instance.user_id]))
+
+
+@receiver(post_save, sender=Community)
+def process_picture(sender, instance, **kwargs):
+    """
+    Gera as variantes da nova imagem da comunidade em segundo plano.
+    """
+    if needs_processing(instance):
+        schedule(instance)
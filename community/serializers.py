@@ -1,7 +1,8 @@
 from rest_framework import serializers
-from .models import CommunityUsers, Community
+from .models import CommunityUsers, Community, CommunityStanding, CommunityStatsBucket, FeedEntry
 from users.models import UserProfile
 from users.serializers import SimpleUserProfileSerializer
+from .permissions import community_roles
 from django.db import transaction
 
 class CommunityUsersSerializer(serializers.ModelSerializer):
@@ -12,6 +13,14 @@ class CommunityUsersSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 class CommunitySerializer(serializers.ModelSerializer):
+    my_role = serializers.SerializerMethodField()
+
+    def get_my_role(self, obj):
+        """
+        Papel de quem fez o request, consultado no mapa de papéis já carregado.
+        """
+        request = self.context.get("request")
+        return community_roles(request).get(obj.pk) if request else None
 
     def create(self, validated_data):
         with transaction.atomic():
@@ -33,4 +42,38 @@ class CommunitySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Community
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+        read_only_fields = ["member_count", "match_count", "tournament_count"]
+
+class NearbyCommunitySerializer(CommunitySerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+
+class CommunityStandingSerializer(serializers.ModelSerializer):
+    player = SimpleUserProfileSerializer(read_only=True)
+
+    class Meta:
+        model = CommunityStanding
+        fields = ['rank', 'player', 'rating', 'wins', 'losses', 'sets_won', 'sets_lost', 'games_won', 'games_lost']
+
+class OpponentSuggestionSerializer(serializers.Serializer):
+    player = SimpleUserProfileSerializer(read_only=True)
+    rating = serializers.FloatField()
+    difference = serializers.FloatField()
+
+
+class CommunityStatsBucketSerializer(serializers.ModelSerializer):
+    average_match_minutes = serializers.SerializerMethodField()
+
+    def get_average_match_minutes(self, obj):
+        return round(obj.match_seconds / obj.timed_matches / 60, 1) if obj.timed_matches else None
+
+    class Meta:
+        model = CommunityStatsBucket
+        fields = ['week', 'matches', 'completed_matches', 'active_players', 'tournaments', 'tournament_entries', 'average_match_minutes']
+
+
+class FeedEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FeedEntry
+        fields = ['id', 'community', 'kind', 'created_at', 'payload']
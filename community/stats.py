@@ -0,0 +1,126 @@
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, DurationField, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+from matches.models import Match, MatchMoment
+from tournament.models import TournamentPlayer
+from .models import CommunityStatsBucket
+
+WEEK = timedelta(days=7)
+# Uma semana calculada depois deste prazo do seu fim é considerada fechada e não é recalculada
+SETTLE_DELAY = timedelta(days=1)
+PLAYER_COLUMNS = ("home1", "home2", "away1", "away2")
+NOT_PARTICIPATING = ("withdrawn", "waitlisted")
+BUCKET_FIELDS = [
+    "matches", "completed_matches", "active_players", "tournaments", "tournament_entries",
+    "timed_matches", "match_seconds", "computed_at",
+]
+
+
+def week_start(moment):
+    """
+    Segunda-feira (UTC) da semana do instante.
+    """
+    day = moment.astimezone(dt_timezone.utc).date()
+    return day - timedelta(days=day.weekday())
+
+
+def _at(day):
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def _match_length():
+    """
+    Duração de uma partida: do primeiro ao último momento registrado, se houver ao menos dois.
+    """
+    return Subquery(
+        MatchMoment.objects.filter(match=OuterRef("pk"))
+        .values("match")
+        .annotate(moments=Count("pk"), length=Max("timestamp") - Min("timestamp"))
+        .filter(moments__gte=2)
+        .values("length"),
+        output_field=DurationField(),
+    )
+
+
+def compute_weeks(community_id, first_week, last_week):
+    """
+    Estatísticas das semanas first_week..last_week com três consultas agrupadas
+    (partidas, jogadores ativos e torneios), independente do número de semanas.
+    Retorna {semana: {campo: valor}}, com zeros nas semanas sem atividade.
+    """
+    weeks = {}
+    week = first_week
+    while week <= last_week:
+        weeks[week] = dict.fromkeys(BUCKET_FIELDS[:-1], 0)
+        week += WEEK
+
+    matches = Match.objects.filter(
+        community_id=community_id, match_date__gte=_at(first_week), match_date__lt=_at(last_week + WEEK)
+    ).annotate(week=TruncWeek("match_date"))
+
+    length = _match_length()
+    for row in matches.values("week").annotate(
+        total=Count("pk"),
+        completed=Count("pk", filter=Q(winner1__isnull=False)),
+        timed=Count(length),
+        seconds=Sum(length),
+    ).order_by():
+        weeks[row["week"].date()].update(
+            matches=row["total"],
+            completed_matches=row["completed"],
+            timed_matches=row["timed"],
+            match_seconds=row["seconds"].total_seconds() if row["seconds"] else 0,
+        )
+
+    # O UNION elimina repetições (semana, jogador) no banco; aqui só se conta por semana
+    pairs = [matches.filter(**{f"{column}__isnull": False}).values_list("week", column) for column in PLAYER_COLUMNS]
+    for week, players in Counter(week for week, _ in pairs[0].union(*pairs[1:])).items():
+        weeks[week.date()]["active_players"] = players
+
+    for row in (
+        TournamentPlayer.objects.filter(
+            tournament__community_id=community_id,
+            tournament__start_date__gte=_at(first_week),
+            tournament__start_date__lt=_at(last_week + WEEK),
+        )
+        .exclude(status__in=NOT_PARTICIPATING)
+        .annotate(week=TruncWeek("tournament__start_date"))
+        .values("week")
+        .annotate(entries=Count("pk"), total=Count("tournament", distinct=True))
+        .order_by()
+    ):
+        weeks[row["week"].date()].update(tournaments=row["total"], tournament_entries=row["entries"])
+    return weeks
+
+
+def community_stats(community_id, weeks, now=None):
+    """
+    As últimas semanas da comunidade, da mais antiga para a atual. Lê as
+    semanas guardadas e recalcula só as que ainda podem mudar (normalmente a
+    atual), gravando-as de volta com um upsert.
+    """
+    now = now or timezone.now()
+    current = week_start(now)
+    wanted = [current - WEEK * offset for offset in range(weeks - 1, -1, -1)]
+    stored = {
+        bucket.week: bucket
+        for bucket in CommunityStatsBucket.objects.filter(community_id=community_id, week__gte=wanted[0], week__lte=current)
+    }
+    stale = [
+        week for week in wanted
+        if week not in stored or stored[week].computed_at < _at(week + WEEK) + SETTLE_DELAY
+    ]
+    if stale:
+        fresh = compute_weeks(community_id, stale[0], current)
+        buckets = [
+            CommunityStatsBucket(community_id=community_id, week=week, computed_at=now, **fresh[week])
+            for week in stale
+        ]
+        CommunityStatsBucket.objects.bulk_create(
+            buckets, update_conflicts=True, unique_fields=["community", "week"], update_fields=BUCKET_FIELDS
+        )
+        stored.update((bucket.week, bucket) for bucket in buckets)
+    return [stored[week] for week in wanted]
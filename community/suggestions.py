@@ -0,0 +1,248 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from matches.models import HeadToHead
+from ratings.glicko import INITIAL_RATING
+from ratings.models import PlayerRating
+from .models import Community, CommunityUsers
+
+RECENT_OPPONENT_DAYS = 30
+VERSION_TIMEOUT = None  # As versões não expiram; só mudam quando o índice muda
+CHANGE_LOG_SIZE = 200  # Lotes de mudanças guardados para os outros processos se atualizarem
+
+# Operações do registro de mudanças
+SET = "set"  # Novo rating; só vale onde o jogador já está e a fonte do rating se aplica
+ADD = "add"  # Novo membro
+REMOVE = "remove"
+
+
+def _version_key(community_id):
+    return f"opponent_index_version:{community_id}"
+
+
+def _log_key(community_id):
+    return f"opponent_index_changes:{community_id}"
+
+
+class RatingIndex:
+    """
+    Membros de uma comunidade ordenados por rating, para busca dos vizinhos por bisect.
+    Usa o rating da comunidade e, na falta dele, o global.
+    """
+
+    def __init__(self, community_id, ratings, sources, version):
+        self.community_id = community_id
+        self.ratings = ratings  # player_id -> rating
+        self.sources = sources  # player_id -> community_id do rating usado (None para o global)
+        self.entries = sorted((rating, player_id) for player_id, rating in ratings.items())
+        self.version = version
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, community_id, version):
+        """
+        Carrega o índice com duas consultas: membros e ratings.
+        """
+        members = list(
+            CommunityUsers.objects.filter(community_id=community_id)
+            .exclude(role__startswith="pending")
+            .values_list("user_id", flat=True)
+        )
+        ratings = dict.fromkeys(members, INITIAL_RATING)
+        sources = dict.fromkeys(members)
+        for player_id, scope, rating in PlayerRating.objects.filter(
+            Q(community__isnull=True) | Q(community_id=community_id), player_id__in=members
+        ).values_list("player_id", "community_id", "rating"):
+            if scope is not None or sources[player_id] is None:
+                ratings[player_id] = rating
+                sources[player_id] = scope
+        return cls(community_id, ratings, sources, version)
+
+    def discard(self, player_id):
+        rating = self.ratings.pop(player_id, None)
+        self.sources.pop(player_id, None)
+        if rating is not None:
+            del self.entries[bisect_left(self.entries, (rating, player_id))]
+
+    def apply(self, changes):
+        """
+        Aplica um lote do registro de mudanças. Reaplicar um lote não altera o resultado.
+        """
+        with self.lock:
+            for op, player_id, rating, source in changes:
+                if op == REMOVE:
+                    self.discard(player_id)
+                elif op == ADD or (
+                    player_id in self.ratings and (source is not None or self.sources[player_id] is None)
+                ):
+                    self.discard(player_id)
+                    self.ratings[player_id] = rating
+                    self.sources[player_id] = source
+                    insort(self.entries, (rating, player_id))
+
+    def nearest(self, player_id, k, exclude=()):
+        """
+        Os k membros de rating mais próximo: bisect até a posição do jogador e
+        expansão para os dois lados. O(log n + k + excluídos).
+        """
+        with self.lock:
+            return self._nearest(player_id, k, exclude)
+
+    def _nearest(self, player_id, k, exclude):
+        rating = self.ratings.get(player_id, INITIAL_RATING)
+        skip = set(exclude) | {player_id}
+        entries = self.entries
+        below = bisect_left(entries, (rating, player_id)) - 1
+        above = below + 1
+        found = []
+        while len(found) < k and (below >= 0 or above < len(entries)):
+            if above >= len(entries) or (below >= 0 and rating - entries[below][0] <= entries[above][0] - rating):
+                candidate = entries[below]
+                below -= 1
+            else:
+                candidate = entries[above]
+                above += 1
+            if candidate[1] not in skip:
+                found.append((candidate[1], candidate[0], abs(candidate[0] - rating)))
+        return found
+
+
+_indexes = {}
+
+
+def _current_version(community_id):
+    key = _version_key(community_id)
+    # Começa de um instante, não de zero, para que um cache reiniciado não repita versões antigas
+    cache.add(key, time.time_ns(), VERSION_TIMEOUT)
+    return cache.get(key)
+
+
+def _bump(community_id, changes=None):
+    """
+    Publica um lote de mudanças do índice com a próxima versão. Os outros processos
+    aplicam os lotes que perderam; changes None obriga a recarregar o índice.
+    """
+    key = _version_key(community_id)
+    cache.add(key, time.time_ns(), VERSION_TIMEOUT)
+    version = cache.incr(key)
+    log = cache.get(_log_key(community_id)) or []
+    if any(entry[0] >= version for entry in log):
+        # Versão repetida (incr não atômico neste cache): quem leu esta versão recarrega
+        changes = None
+        log = [entry for entry in log if entry[0] < version]
+    log.append((version, changes))
+    cache.set(_log_key(community_id), log[-CHANGE_LOG_SIZE:], VERSION_TIMEOUT)
+    return version
+
+
+def _catch_up(index, version):
+    """
+    Leva o índice carregado até a versão atual pelo registro de mudanças.
+    Retorna False se faltar algum lote (registro curto, escrita concorrente ou
+    recarga pedida); nesse caso o índice precisa ser recarregado.
+    """
+    if not 0 < version - index.version <= CHANGE_LOG_SIZE:
+        return False
+    log = dict(cache.get(_log_key(index.community_id)) or [])
+    batches = [log.get(missing) for missing in range(index.version + 1, version + 1)]
+    if any(batch is None for batch in batches):
+        return False
+    for batch in batches:
+        index.apply(batch)
+    index.version = version
+    return True
+
+
+def _publish(community_id, changes):
+    """
+    Publica as mudanças e as aplica ao índice deste processo, se estiver carregado.
+    """
+    version = _bump(community_id, changes)
+    index = _indexes.get(community_id)
+    if index is None:
+        return
+    index.apply(changes)
+    # Se outro processo publicou no meio, a próxima leitura aplica os lotes que faltam
+    if version == index.version + 1:
+        index.version = version
+
+
+def get_index(community_id):
+    """
+    Índice da comunidade em memória, atualizado com as mudanças publicadas por outros
+    processos; só é recarregado do banco se o registro não cobrir o que falta.
+    """
+    version = _current_version(community_id)
+    index = _indexes.get(community_id)
+    if index is not None and index.version != version and not _catch_up(index, version):
+        index = None
+    if index is None:
+        index = _indexes[community_id] = RatingIndex.build(community_id, version)
+    return index
+
+
+def suggest_opponents(community_id, player_id, k, recent_days=RECENT_OPPONENT_DAYS):
+    """
+    Sugere os k membros com rating mais próximo, sem adversários recentes.
+    Retorna [(player_id, rating, diferença)].
+    """
+    since = timezone.now() - timedelta(days=recent_days)
+    recent = HeadToHead.objects.filter(player_id=player_id, last_played__gte=since).values_list("opponent_id", flat=True)
+    return get_index(community_id).nearest(player_id, k, exclude=list(recent))
+
+
+def ratings_changed(ratings):
+    """
+    Publica os ratings alterados, num lote por comunidade afetada.
+    ratings None significa que todos mudaram: os índices são recarregados.
+    """
+    if ratings is None:
+        for community_id in Community.objects.values_list("pk", flat=True):
+            _bump(community_id)
+        _indexes.clear()
+        return
+
+    changes = {}
+    global_ratings = []
+    for rating in ratings:
+        if rating.community_id is not None:
+            changes.setdefault(rating.community_id, []).append((SET, rating.player_id, rating.rating, rating.community_id))
+        else:
+            global_ratings.append(rating)
+    if global_ratings:
+        # O global só vale onde o jogador ainda não tem rating da comunidade; quem aplica decide
+        by_player = {rating.player_id: rating for rating in global_ratings}
+        for community_id, player_id in CommunityUsers.objects.filter(user_id__in=list(by_player)).values_list(
+            "community_id", "user_id"
+        ):
+            changes.setdefault(community_id, []).append((SET, player_id, by_player[player_id].rating, None))
+    for community_id, batch in changes.items():
+        _publish(community_id, batch)
+
+
+def membership_changed(community_id, player_id, member):
+    """
+    Publica a entrada ou saída de um membro.
+    """
+    if not member:
+        _publish(community_id, [(REMOVE, player_id, None, None)])
+        return
+    # Um rating da comunidade, se existir, tem preferência sobre o global
+    rows = PlayerRating.objects.filter(
+        Q(community__isnull=True) | Q(community_id=community_id), player_id=player_id
+    ).values_list("community_id", "rating")
+    source, rating = max(rows, key=lambda row: row[0] is not None, default=(None, INITIAL_RATING))
+    _publish(community_id, [(ADD, player_id, rating, source)])
+
+
+def invalidate(community_id):
+    """
+    Descarta o índice depois de mudanças em lote; ele é recarregado na próxima leitura.
+    """
+    _indexes.pop(community_id, None)
+    _bump(community_id)
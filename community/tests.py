@@ -1,10 +1,26 @@
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import numpy as np
 from django.test import TestCase
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from community.models import Community, CommunityUsers
+from community.models import Community, CommunityUsers, CommunityStanding, CommunityStatsBucket
 from users.models import UserProfile
 from rest_framework.authtoken.models import Token
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from community import feed, geo, membership, suggestions
+from community.counters import repair
+from community.leaderboard import rebuild
+from community.stats import WEEK, week_start
+from matches.models import HeadToHead, Match, MatchMoment, MatchSet
+from ratings.models import PlayerRating
+from tournament.models import Tournament, TournamentPlayer
+from tournament.pairing import create_round_matches
 
 User = get_user_model()
 
@@ -143,4 +159,612 @@ class CommunityAPITests(APITestCase):
         # List communities
         response = self.client.get('/api/communities/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
\ No newline at end of file
+        self.assertEqual(len(response.data), 2)
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(username="leader"))
+        self.community = Community.objects.create(name="Ranking Club", description="")
+        self.players = [
+            UserProfile.objects.create(user=User.objects.create_user(username=f"ranked{i}")) for i in range(5)
+        ]
+        self.start = datetime(2025, 3, 1, tzinfo=dt_timezone.utc)
+        self.day = 0
+
+    def _play(self, home, away, winner, sets=()):
+        self.day += 1
+        match = Match.objects.create(
+            community_id=self.community,
+            home1=self.players[home],
+            away1=self.players[away],
+            match_date=self.start + timedelta(days=self.day),
+        )
+        if sets:
+            moment = MatchMoment.objects.create(
+                match=match, current_game_home="0", current_game_away="0", current_set_home=0,
+                current_set_away=0, match_score_home=0, match_score_away=0,
+            )
+            MatchSet.objects.bulk_create([
+                MatchSet(match_moment=moment, set_number=i, home_games=h, away_games=a)
+                for i, (h, a) in enumerate(sets, start=1)
+            ])
+        self.client.patch(f"/api/matches/{match.match_id}/", {"winner1": self.players[winner].pk}, format="json")
+
+    def _table(self):
+        return list(
+            CommunityStanding.objects.filter(community=self.community)
+            .order_by("rank")
+            .values_list("rank", "player_id", "rating", "wins", "losses", "sets_won", "sets_lost", "games_won", "games_lost")
+        )
+
+    def test_incremental_updates_match_rebuild(self):
+        self._play(0, 1, 0, sets=[(6, 4), (3, 6), (7, 5)])
+        self._play(2, 3, 3)
+        self._play(4, 0, 4)
+        self._play(1, 2, 1, sets=[(6, 0), (6, 1)])
+        self._play(4, 3, 3)
+        incremental = self._table()
+
+        self.assertEqual([row[0] for row in incremental], [1, 2, 3, 4, 5])
+        ratings = dict(PlayerRating.objects.filter(community=self.community).values_list("player_id", "rating"))
+        self.assertEqual([row[1] for row in incremental], sorted(ratings, key=lambda p: (-ratings[p], p)))
+        first = CommunityStanding.objects.get(community=self.community, player=self.players[0])
+        self.assertEqual((first.sets_won, first.sets_lost, first.games_won, first.games_lost), (2, 1, 16, 15))
+
+        self.assertEqual(rebuild(self.community.pk), 5)
+        self.assertEqual(self._table(), incremental)
+
+    def test_leaderboard_pages_by_rank(self):
+        for home, away in [(0, 1), (0, 2), (3, 4), (0, 3)]:
+            self._play(home, away, home)
+        url = f"/api/communities/{self.community.pk}/leaderboard/"
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["rank"] for row in response.data["results"]], [1, 2])
+        self.assertEqual(response.data["results"][0]["player"]["id"], self.players[0].pk)
+        self.assertEqual(response.data["next_start"], 3)
+
+        response = self.client.get(url, {"start": 5, "limit": 2})
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next_start"])
+
+
+class OpponentSuggestionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        suggestions._indexes.clear()
+        self.community = Community.objects.create(name="Sparring Club", description="")
+        self.players = [
+            UserProfile.objects.create(user=User.objects.create_user(username=f"sparring{i}")) for i in range(6)
+        ]
+        for player in self.players:
+            CommunityUsers.objects.create(community=self.community, user=player, role="owner" if player == self.players[0] else "member")
+        for player, rating in zip(self.players, [1500, 1620, 1480, 1900, 1300, 1510]):
+            PlayerRating.objects.create(player=player, community=self.community, rating=rating)
+        self.client.force_authenticate(self.players[0].user)
+        self.url = f"/api/communities/{self.community.pk}/suggest_opponents/"
+
+    def _suggested(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["player"]["id"] for row in response.data]
+
+    def test_suggests_closest_ratings_without_recent_opponents(self):
+        self.assertEqual(self._suggested(k=3), [self.players[5].pk, self.players[2].pk, self.players[1].pk])
+
+        HeadToHead.objects.create(
+            player=self.players[0], opponent=self.players[5], wins=1, last_played=datetime.now(dt_timezone.utc)
+        )
+        HeadToHead.objects.create(
+            player=self.players[0], opponent=self.players[2], wins=1,
+            last_played=datetime.now(dt_timezone.utc) - timedelta(days=90),
+        )
+        self.assertEqual(self._suggested(k=2), [self.players[2].pk, self.players[1].pk])
+
+    def test_index_follows_ratings_and_membership(self):
+        self._suggested()
+        with self.captureOnCommitCallbacks(execute=True):
+            rating = PlayerRating.objects.get(player=self.players[3], community=self.community)
+            rating.rating = 1505
+            suggestions.ratings_changed([rating])
+        with self.captureOnCommitCallbacks(execute=True):
+            CommunityUsers.objects.filter(community=self.community, user=self.players[5]).delete()
+            newcomer = UserProfile.objects.create(user=User.objects.create_user(username="newcomer"))
+            CommunityUsers.objects.create(community=self.community, user=newcomer, role="pending invitation")
+
+        # Índice já carregado: nenhuma consulta ao índice, só adversários recentes e perfis
+        with self.assertNumQueries(4):
+            self.assertEqual(self._suggested(k=2), [self.players[3].pk, self.players[2].pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/communities/{self.community.pk}/edit_user_permissions/",
+                {"id": newcomer.user.pk, "role": "member"}, format="json",
+            )
+        self.assertIn(newcomer.pk, self._suggested(k=10))
+
+    def test_other_processes_apply_changes_without_rebuilding(self):
+        self._suggested()
+        # O índice de "outro processo": este processo publica sem tê-lo carregado
+        elsewhere = suggestions._indexes.pop(self.community.pk)
+        rating = PlayerRating.objects.get(player=self.players[3], community=self.community)
+        rating.rating = 1505
+        suggestions.ratings_changed([rating])
+        suggestions.membership_changed(self.community.pk, self.players[5].pk, False)
+        suggestions._indexes[self.community.pk] = elsewhere
+
+        with self.assertNumQueries(0):
+            index = suggestions.get_index(self.community.pk)
+        self.assertIs(index, elsewhere)
+        self.assertEqual(
+            [player_id for player_id, _, _ in index.nearest(self.players[0].pk, 2)], [self.players[3].pk, self.players[2].pk]
+        )
+
+        # Um lote perdido obriga a recarregar do banco
+        suggestions._indexes[self.community.pk].version -= suggestions.CHANGE_LOG_SIZE + 1
+        with self.assertNumQueries(2):
+            self.assertIsNot(suggestions.get_index(self.community.pk), elsewhere)
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(7)
+        ratings = {player_id: rng.gauss(1500, 200) for player_id in range(20000)}
+        index = suggestions.RatingIndex(self.community.pk, dict(ratings), dict.fromkeys(ratings), version=0)
+        for player_id in rng.sample(range(20000), 20):
+            exclude = set(rng.sample(range(20000), 50))
+            expected = sorted(
+                (abs(rating - ratings[player_id]), other)
+                for other, rating in ratings.items()
+                if other != player_id and other not in exclude
+            )[:10]
+            found = index.nearest(player_id, 10, exclude)
+            self.assertEqual(
+                sorted(round(difference, 9) for _, _, difference in found),
+                [round(difference, 9) for difference, _ in expected],
+            )
+
+
+class MemberListTests(APITestCase):
+    def setUp(self):
+        self.community = Community.objects.create(name="Big Club", description="")
+        profiles = [
+            UserProfile.objects.create(user=User.objects.create_user(username=f"member{i}", first_name="Ana" if i % 3 == 0 else "Bruno"))
+            for i in range(7)
+        ]
+        CommunityUsers.objects.bulk_create([
+            CommunityUsers(community=self.community, user=profile, role="ADMIN" if i == 0 else "member")
+            for i, profile in enumerate(profiles)
+        ])
+        Tournament.objects.bulk_create([
+            Tournament(community_id=self.community, name=f"Open {i}", type="single_elimination") for i in range(3)
+        ])
+        self.client.force_authenticate(profiles[0].user)
+        self.url = f"/api/communities/{self.community.pk}/"
+
+    def test_members_are_cursor_paginated_with_fixed_queries(self):
+        seen = []
+        url = self.url + "users/?page_size=3"
+        while url:
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen += [row["user"]["user"]["username"] for row in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(seen, [f"member{i}" for i in range(7)])
+
+    def test_members_filter_by_role_and_search(self):
+        response = self.client.get(self.url + "users/", {"role": "admin"})
+        self.assertEqual([row["user"]["user"]["username"] for row in response.data["results"]], ["member0"])
+
+        response = self.client.get(self.url + "users/", {"search": "ana"})
+        self.assertEqual(
+            [row["user"]["user"]["username"] for row in response.data["results"]], ["member0", "member3", "member6"]
+        )
+
+    def test_tournaments_newest_first(self):
+        response = self.client.get(self.url + "tournaments/", {"page_size": 2})
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Open 2", "Open 1"])
+        response = self.client.get(self.url + "tournaments/", {"search": "open 0"})
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Open 0"])
+
+
+class BatchMembershipTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.community = Community.objects.create(name="Onboarding Club", description="")
+        self.users = [User.objects.create_user(username=f"batch{i}") for i in range(5)]
+        for user in self.users[:4]:
+            UserProfile.objects.create(user=user)
+        CommunityUsers.objects.create(community=self.community, user=self.users[0].profile, role="admin")
+        self.client.force_authenticate(self.users[0])
+        self.url = f"/api/communities/{self.community.pk}/"
+
+    def _roles(self):
+        return dict(CommunityUsers.objects.filter(community=self.community).values_list("user__user_id", "role"))
+
+    def test_add_users_reports_each_row(self):
+        payload = {"users": [
+            {"id": self.users[1].pk, "role": "Moderator"},
+            {"id": self.users[2].pk},
+            {"id": self.users[0].pk},
+            {"id": self.users[4].pk},
+            {"id": self.users[3].pk, "role": "king"},
+            {"id": self.users[1].pk, "role": "owner"},
+        ]}
+        # get_object, mapa de papéis, validação, savepoint, bulk_create no próprio savepoint,
+        # contador de membros e feed (nomes, INSERT e limite)
+        with self.assertNumQueries(12):
+            response = self.client.post(self.url + "add_users/", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["added"], 2)
+        self.assertEqual([row["status"] for row in response.data["results"]], [
+            membership.ADDED, membership.ADDED, membership.ALREADY_MEMBER, membership.NOT_FOUND, membership.INVALID_ROLE,
+        ])
+        self.assertEqual(self._roles(), {self.users[0].pk: "admin", self.users[1].pk: "moderator", self.users[2].pk: "member"})
+
+        response = self.client.post(self.url + "add_users/", {"users": "nope"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_roles_runs_one_update_per_role(self):
+        membership.add_members(self.community.pk, [(self.users[1].pk, "member"), (self.users[2].pk, "member")])
+        payload = {"users": [
+            {"id": self.users[0].pk, "role": "admin"},
+            {"id": self.users[1].pk, "role": "admin"},
+            {"id": self.users[2].pk, "role": "moderator"},
+            {"id": self.users[3].pk, "role": "admin"},
+        ]}
+        # get_object, mapa de papéis, validação, savepoint e dois UPDATEs
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url + "update_roles/", payload, format="json")
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(response.data["results"][0]["status"], membership.FORBIDDEN_MEMBER)
+        self.assertEqual(response.data["results"][3]["status"], membership.NOT_MEMBER)
+        self.assertEqual(
+            self._roles(),
+            {self.users[0].pk: "admin", self.users[1].pk: "admin", self.users[2].pk: "moderator"},
+        )
+
+    def test_import_csv(self):
+        rows = [
+            "user_id,role",
+            f"{self.users[1].pk},moderator",
+            "abc,member",
+            f"{self.users[2].pk},",
+            f"{self.users[2].pk},admin",
+            f"{self.users[4].pk},member",
+        ]
+        upload = SimpleUploadedFile("members.csv", "\n".join(rows).encode(), content_type="text/csv")
+        response = self.client.post(self.url + "import_users/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["added"], 2)
+        self.assertEqual([(row["line"], row["status"]) for row in response.data["results"]], [
+            (2, membership.ADDED), (3, membership.INVALID_ROW), (4, membership.ADDED),
+            (5, membership.ALREADY_MEMBER), (6, membership.NOT_FOUND),
+        ])
+        self.assertEqual(self._roles()[self.users[2].pk], "member")
+
+        upload = SimpleUploadedFile("members.csv", b"id,role\n1,member", content_type="text/csv")
+        response = self.client.post(self.url + "import_users/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_concurrent_insert_is_not_counted_as_added(self):
+        stale = membership._profiles(self.community.pk, [self.users[1].pk, self.users[2].pk])
+        # Outro request torna users[1] membro entre a validação e o INSERT
+        CommunityUsers.objects.create(community=self.community, user=self.users[1].profile, role="member")
+        members = Community.objects.get(pk=self.community.pk).member_count
+        real = membership._profiles
+        with mock.patch("community.membership._profiles", side_effect=[stale, real(self.community.pk, [self.users[1].pk, self.users[2].pk])]):
+            outcomes = membership.add_members(self.community.pk, [(self.users[1].pk, "member"), (self.users[2].pk, "member")])
+        self.assertEqual(outcomes, [(self.users[1].pk, membership.ALREADY_MEMBER), (self.users[2].pk, membership.ADDED)])
+        self.assertEqual(Community.objects.get(pk=self.community.pk).member_count, members + 1)
+        self.assertEqual(
+            feed.FeedEntry.objects.filter(community=self.community, kind=feed.MEMBER_JOINED, payload__player=self.users[1].profile.pk).count(), 1
+        )
+
+    def test_malformed_csv_is_rejected(self):
+        for content in (b"user_id,role\n\xff\xfe,member", b"user_id,role\n" + b'"' + b"x" * 200000 + b'"'):
+            upload = SimpleUploadedFile("members.csv", content, content_type="text/csv")
+            response = self.client.post(self.url + "import_users/", {"file": upload}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_moderator_cannot_add_admins(self):
+        CommunityUsers.objects.create(community=self.community, user=self.users[1].profile, role="moderator")
+        self.client.force_authenticate(self.users[1])
+        payload = {"users": [{"id": self.users[2].pk, "role": "admin"}, {"id": self.users[3].pk, "role": "moderator"}]}
+        response = self.client.post(self.url + "add_users/", payload, format="json")
+        self.assertEqual(
+            [row["status"] for row in response.data["results"]], [membership.FORBIDDEN_ROLE, membership.ADDED]
+        )
+
+        upload = SimpleUploadedFile("members.csv", f"user_id,role\n{self.users[2].pk},owner".encode(), content_type="text/csv")
+        response = self.client.post(self.url + "import_users/", {"file": upload}, format="multipart")
+        self.assertEqual(response.data["results"][0]["status"], membership.FORBIDDEN_ROLE)
+        self.assertEqual(
+            self._roles(),
+            {self.users[0].pk: "admin", self.users[1].pk: "moderator", self.users[3].pk: "moderator"},
+        )
+
+
+    def test_update_roles_cannot_grant_above_own_role(self):
+        membership.add_members(self.community.pk, [(self.users[1].pk, "member")])
+        payload = {"users": [{"id": self.users[0].pk, "role": "owner"}, {"id": self.users[1].pk, "role": "owner"}]}
+        response = self.client.post(self.url + "update_roles/", payload, format="json")
+        self.assertEqual(response.data["updated"], 0)
+        self.assertEqual(
+            [row["status"] for row in response.data["results"]], [membership.FORBIDDEN_ROLE, membership.FORBIDDEN_ROLE]
+        )
+        self.assertEqual(self._roles(), {self.users[0].pk: "admin", self.users[1].pk: "member"})
+
+    def test_update_roles_cannot_change_peers_or_superiors(self):
+        membership.add_members(self.community.pk, [(self.users[1].pk, "owner"), (self.users[2].pk, "admin")])
+        payload = {"users": [{"id": self.users[1].pk, "role": "member"}, {"id": self.users[2].pk, "role": "moderator"}]}
+        response = self.client.post(self.url + "update_roles/", payload, format="json")
+        self.assertEqual(
+            [row["status"] for row in response.data["results"]], [membership.FORBIDDEN_MEMBER, membership.FORBIDDEN_MEMBER]
+        )
+        self.assertEqual(self._roles()[self.users[1].pk], "owner")
+
+        # O dono pode rebaixar um administrador
+        self.client.force_authenticate(self.users[1])
+        response = self.client.post(self.url + "update_roles/", {"users": [{"id": self.users[2].pk, "role": "moderator"}]}, format="json")
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(self._roles()[self.users[2].pk], "moderator")
+
+class RolePermissionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.clubs = [Community.objects.create(name=f"Club {i}", description="") for i in range(3)]
+        self.admin, self.moderator, self.member = (
+            UserProfile.objects.create(user=User.objects.create_user(username=name)) for name in ("boss", "mod", "plain")
+        )
+        CommunityUsers.objects.create(community=self.clubs[0], user=self.admin, role="ADMIN")
+        CommunityUsers.objects.create(community=self.clubs[0], user=self.moderator, role="moderator")
+        CommunityUsers.objects.create(community=self.clubs[0], user=self.member, role="member")
+        CommunityUsers.objects.create(community=self.clubs[1], user=self.admin, role="member")
+        self.newcomer = User.objects.create_user(username="newcomer")
+        UserProfile.objects.create(user=self.newcomer)
+
+    def _post(self, user, action, data):
+        self.client.force_authenticate(user.user)
+        return self.client.post(f"/api/communities/{self.clubs[0].pk}/{action}/", data, format="json")
+
+    def test_mutations_require_role(self):
+        self.assertEqual(self._post(self.member, "add_user", {"id": self.newcomer.pk}).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self._post(self.moderator, "add_user", {"id": self.newcomer.pk}).status_code, status.HTTP_201_CREATED)
+        response = self._post(self.moderator, "edit_user_permissions", {"id": self.member.user.pk, "role": "admin"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # "ADMIN", gravado na criação da comunidade, vale como admin
+        response = self._post(self.admin, "edit_user_permissions", {"id": self.member.user.pk, "role": "admin"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # O papel novo vale no request seguinte, apesar do cache
+        response = self._post(self.member, "remove_user", {"id": self.newcomer.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_roles_are_loaded_once_and_cached(self):
+        self.client.force_authenticate(self.admin.user)
+        # Uma consulta para a lista e uma para o mapa de papéis, depois só a lista
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/communities/")
+        self.assertEqual(
+            {row["community_id"]: row["my_role"] for row in response.data},
+            {self.clubs[0].pk: "admin", self.clubs[1].pk: "member", self.clubs[2].pk: None},
+        )
+        with self.assertNumQueries(1):
+            self.client.get("/api/communities/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CommunityUsers.objects.create(community=self.clubs[2], user=self.admin, role="moderator")
+        response = self.client.get("/api/communities/")
+        self.assertEqual({row["community_id"]: row["my_role"] for row in response.data}[self.clubs[2].pk], "moderator")
+
+
+class NearbyTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        rng = np.random.default_rng(3)
+        # Agrupadas em volta de Natal e espalhadas perto do antimeridiano
+        points = np.vstack([
+            np.column_stack([rng.normal(-5.8, 0.5, 300), rng.normal(-35.2, 0.5, 300)]),
+            np.column_stack([rng.uniform(-20, 20, 200), rng.choice([-1, 1], 200) * rng.uniform(178, 180, 200)]),
+        ])
+        Community.objects.bulk_create([
+            Community(name=f"Club {i}", description="", latitude=lat, longitude=lon) for i, (lat, lon) in enumerate(points)
+        ])
+        Community.objects.create(name="Sem endereço", description="")
+        rows = np.array(Community.objects.exclude(latitude=None).values_list("pk", "latitude", "longitude"))
+        self.ids, self.lats, self.lons = rows[:, 0].astype(int), rows[:, 1], rows[:, 2]
+        self.client.force_authenticate(User.objects.create_user(username="traveler"))
+
+    def _brute_force(self, lat, lon):
+        distances = geo.haversine_km(lat, lon, self.lats, self.lons)
+        return sorted(zip(distances, self.ids))
+
+    def test_within_radius_matches_brute_force(self):
+        for lat, lon, radius in [(-5.8, -35.2, 30), (0, 179.9, 300), (10, -179.5, 150), (-5.8, -35.2, 0.01)]:
+            expected = [community_id for distance, community_id in self._brute_force(lat, lon) if distance <= radius]
+            self.assertEqual([community_id for community_id, _ in geo.within(lat, lon, radius)], expected)
+
+    def test_nearest_matches_brute_force(self):
+        for lat, lon, k in [(-5.8, -35.2, 10), (0, 180, 7), (60, 0, 3), (-89, 10, 600)]:
+            expected = [community_id for _, community_id in self._brute_force(lat, lon)[:k]]
+            self.assertEqual([community_id for community_id, _ in geo.nearest(lat, lon, k)], expected)
+
+    def test_nearby_endpoint(self):
+        # Caixa delimitadora, leitura das comunidades e mapa de papéis
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/communities/nearby/", {"lat": -5.8, "lon": -35.2, "radius": 20, "k": 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        distances = [row["distance_km"] for row in response.data]
+        self.assertEqual(distances, sorted(distances))
+        self.assertLessEqual(distances[-1], 20)
+
+        response = self.client.get("/api/communities/nearby/", {"lat": 95, "lon": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CounterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.community = Community.objects.create(name="Counted Club", description="")
+        self.profiles = [
+            UserProfile.objects.create(user=User.objects.create_user(username=f"counted{i}")) for i in range(4)
+        ]
+        self.client.force_authenticate(self.profiles[0].user)
+
+    def _counts(self):
+        self.community.refresh_from_db()
+        return self.community.member_count, self.community.match_count, self.community.tournament_count
+
+    def test_counters_follow_rows_and_repair(self):
+        CommunityUsers.objects.create(community=self.community, user=self.profiles[0], role="admin")
+        membership.add_members(self.community.pk, [(profile.user_id, "member") for profile in self.profiles])
+        tournament = Tournament.objects.create(community_id=self.community, name="Counted Open", type="round_robin")
+        create_round_matches(tournament, [[(self.profiles[0].pk, self.profiles[1].pk), (self.profiles[2].pk, None)]])
+        Match.objects.create(community_id=self.community, home1=self.profiles[0], away1=self.profiles[3])
+        self.assertEqual(self._counts(), (4, 3, 1))
+
+        CommunityUsers.objects.filter(community=self.community, user=self.profiles[3]).delete()
+        Match.objects.filter(community_id=self.community, tournament_match__isnull=True).delete()
+        self.assertEqual(self._counts(), (3, 2, 1))
+
+        Community.objects.filter(pk=self.community.pk).update(member_count=99, match_count=-4, tournament_count=0)
+        self.assertEqual(repair(), 1)
+        self.assertEqual(self._counts(), (3, 2, 1))
+
+    def test_list_renders_counts_without_extra_queries(self):
+        for i in range(5):
+            club = Community.objects.create(name=f"Listed {i}", description="")
+            CommunityUsers.objects.create(community=club, user=self.profiles[0], role="member")
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/communities/")
+        self.assertEqual([row["member_count"] for row in response.data], [0, 1, 1, 1, 1, 1])
+
+
+class StatsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.community = Community.objects.create(name="Stats Club", description="")
+        self.players = [UserProfile.objects.create(user=User.objects.create_user(username=f"stat{i}")) for i in range(4)]
+        CommunityUsers.objects.create(community=self.community, user=self.players[0], role="admin")
+        self.client.force_authenticate(self.players[0].user)
+        self.monday = datetime.combine(week_start(timezone.now()), datetime.min.time(), tzinfo=dt_timezone.utc)
+
+    def _match(self, when, home, away, winner=None, minutes=None):
+        match = Match.objects.create(
+            community_id=self.community, match_date=when, home1=self.players[home], away1=self.players[away],
+            winner1=self.players[winner] if winner is not None else None,
+        )
+        if minutes is not None:
+            for offset in (0, minutes):
+                moment = MatchMoment.objects.create(
+                    match=match, current_game_home="0", current_game_away="0", current_set_home=0,
+                    current_set_away=0, match_score_home=0, match_score_away=0,
+                )
+                MatchMoment.objects.filter(pk=moment.pk).update(timestamp=when + timedelta(minutes=offset))
+        return match
+
+    def test_weekly_rollups(self):
+        self._match(self.monday + timedelta(minutes=1), 0, 1, winner=0, minutes=90)
+        self._match(self.monday + timedelta(minutes=2), 0, 2, minutes=60)
+        self._match(self.monday - 3 * WEEK + timedelta(days=2), 2, 3, winner=3)
+        tournament = Tournament.objects.create(
+            community_id=self.community, name="Stats Open", type="round_robin", start_date=self.monday - WEEK + timedelta(hours=5)
+        )
+        TournamentPlayer.objects.bulk_create([
+            TournamentPlayer(tournament=tournament, user=self.players[0]),
+            TournamentPlayer(tournament=tournament, user=self.players[1]),
+            TournamentPlayer(tournament=tournament, user=self.players[2], status="waitlisted"),
+        ])
+
+        response = self.client.get(f"/api/communities/{self.community.pk}/stats/", {"weeks": 4})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        weeks = response.data["weeks"]
+        self.assertEqual([row["matches"] for row in weeks], [1, 0, 0, 2])
+        self.assertEqual([row["active_players"] for row in weeks], [2, 0, 0, 3])
+        self.assertEqual([row["tournament_entries"] for row in weeks], [0, 0, 2, 0])
+        self.assertEqual(weeks[3]["completed_matches"], 1)
+        self.assertEqual(weeks[3]["average_match_minutes"], 75.0)
+        self.assertEqual(response.data["totals"]["matches"], 3)
+        self.assertEqual(CommunityStatsBucket.objects.filter(community=self.community).count(), 4)
+
+        # Semanas fechadas vêm do banco; só as abertas são recalculadas
+        self._match(self.monday + timedelta(minutes=3), 1, 3)
+        with self.assertNumQueries(6):
+            response = self.client.get(f"/api/communities/{self.community.pk}/stats/", {"weeks": 4})
+        self.assertEqual(response.data["weeks"][3]["matches"], 3)
+        self.assertEqual(response.data["weeks"][3]["active_players"], 4)
+
+    def test_stats_require_manager(self):
+        self.client.force_authenticate(self.players[1].user)
+        response = self.client.get(f"/api/communities/{self.community.pk}/stats/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.clubs = [Community.objects.create(name=f"Feed Club {i}", description="") for i in range(3)]
+        self.players = [
+            UserProfile.objects.create(user=User.objects.create_user(username=f"feeder{i}", first_name=f"Feeder {i}"))
+            for i in range(3)
+        ]
+        CommunityUsers.objects.create(community=self.clubs[0], user=self.players[0], role="member")
+        CommunityUsers.objects.create(community=self.clubs[1], user=self.players[0], role="admin")
+        CommunityUsers.objects.create(community=self.clubs[2], user=self.players[0], role="pending invitation")
+        self.client.force_authenticate(self.players[0].user)
+
+    def _feed(self, **params):
+        response = self.client.get("/api/communities/feed/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_events_are_written_and_merged(self):
+        CommunityUsers.objects.create(community=self.clubs[0], user=self.players[1], role="member")
+        Tournament.objects.create(community_id=self.clubs[1], name="Feed Cup", type="round_robin")
+        Tournament.objects.create(community_id=self.clubs[2], name="Hidden Cup", type="round_robin")
+        match = Match.objects.create(community_id=self.clubs[0], home1=self.players[1], away1=self.players[2])
+        moment = MatchMoment.objects.create(
+            match=match, current_game_home="0", current_game_away="0", current_set_home=0,
+            current_set_away=0, match_score_home=0, match_score_away=0,
+        )
+        MatchSet.objects.create(match_moment=moment, set_number=1, home_games=4, away_games=6)
+        self.client.patch(f"/api/matches/{match.match_id}/", {"winner1": self.players[2].pk}, format="json")
+
+        data = self._feed()
+        self.assertEqual(
+            [(row["community"], row["kind"]) for row in data["results"]],
+            [
+                (self.clubs[0].pk, feed.MATCH_RESULT),
+                (self.clubs[1].pk, feed.TOURNAMENT_CREATED),
+                (self.clubs[0].pk, feed.MEMBER_JOINED),
+                (self.clubs[1].pk, feed.MEMBER_JOINED),
+                (self.clubs[0].pk, feed.MEMBER_JOINED),
+            ],
+        )
+        result = data["results"][0]["payload"]
+        self.assertEqual(result["winners"], [{"id": self.players[2].pk, "name": "Feeder 2"}])
+        self.assertEqual(result["sets"], [[6, 4]])
+        self.assertIsNone(data["next_before"])
+
+    def test_keyset_pages_and_bounded_history(self):
+        for i in range(2 * feed.FEED_MAX_ENTRIES + 10):
+            feed.publish([feed.FeedEntry(community=self.clubs[i % 2], kind=feed.TOURNAMENT_CREATED, payload={"n": i})])
+        self.assertEqual(feed.FeedEntry.objects.filter(community=self.clubs[0]).count(), feed.FEED_MAX_ENTRIES)
+
+        seen = []
+        before = None
+        while True:
+            data = self._feed(limit=50, **({"before": before} if before else {}))
+            seen += [row["id"] for row in data["results"]]
+            before = data["next_before"]
+            if before is None:
+                break
+        with self.assertNumQueries(1):
+            feed.user_feed([self.clubs[0].pk, self.clubs[1].pk], seen[120], 50)
+        expected = list(
+            feed.FeedEntry.objects.filter(community__in=self.clubs[:2]).order_by("-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
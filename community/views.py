@@ -3,9 +3,24 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db import transaction
-from .models import Community, CommunityUsers
+from django.db.models import Q
+from .models import Community, CommunityUsers, CommunityStanding
 from users.models import UserProfile
-from .serializers import CommunitySerializer, CommunityUsersSerializer
+from .serializers import (
+    CommunitySerializer, CommunityUsersSerializer, CommunityStandingSerializer, NearbyCommunitySerializer,
+    OpponentSuggestionSerializer, CommunityStatsBucketSerializer, FeedEntrySerializer,
+)
+from . import feed
+from .stats import community_stats
+from matches import calendar
+from users.authentication import CalendarTokenAuthentication
+from . import geo
+from . import membership
+from .permissions import (
+    IsCommunityAdmin, IsCommunityManager, assignable_roles, community_roles, invalidate_roles, manageable_roles,
+)
+from .pagination import CommunityCursorPagination
+from .suggestions import suggest_opponents, membership_changed
 from tournament.serializers import TournamentSerializer
 from tournament.models import Tournament
 from tournament.views import TournamentViewSet
@@ -15,6 +30,15 @@ from rest_framework.permissions import IsAuthenticated
 
 User = get_user_model()
 
+LEADERBOARD_PAGE_SIZE = 50
+LEADERBOARD_MAX_PAGE_SIZE = 200
+NEARBY_COUNT = 20
+NEARBY_MAX_COUNT = 100
+STATS_WEEKS = 12
+STATS_MAX_WEEKS = 104
+SUGGESTION_COUNT = 10
+SUGGESTION_MAX_COUNT = 50
+
 
 class CommunityViewSet(viewsets.ModelViewSet):
     queryset = Community.objects.all()
@@ -22,6 +46,17 @@ class CommunityViewSet(viewsets.ModelViewSet):
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    # Ações restritas por papel; a checagem roda em get_object, contra o mapa de papéis do request
+    manager_actions = {"add_user", "remove_user", "add_users", "import_users", "stats"}
+    admin_actions = {"update", "partial_update", "destroy", "edit_user_permissions", "update_roles"}
+
+    def get_permissions(self):
+        if self.action in self.admin_actions:
+            return [IsAuthenticated(), IsCommunityAdmin()]
+        if self.action in self.manager_actions:
+            return [IsAuthenticated(), IsCommunityManager()]
+        return super().get_permissions()
+
     @action(detail=True, methods=["post"])
     def add_user(self, request, pk=None): # pk é o ID da comunidade
         """
@@ -127,25 +162,271 @@ class CommunityViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         membership.update(role=role)
+        invalidate_roles([user.pk])
+        # update() não dispara post_save; o índice de sugestões é avisado aqui
+        transaction.on_commit(lambda: membership_changed(community.pk, user_profile.pk, not role.startswith("pending")))
 
         return Response(
             {"message": f"Permissões do usuário {user_id} atualizadas com sucesso"},
             status=status.HTTP_200_OK
         )
     
+    @action(detail=True, methods=["post"])
+    def add_users(self, request, pk=None):
+        """
+        Adiciona vários usuários de uma vez (users: [{"id": id de User, "role": papel}]).
+        Só é possível atribuir papéis de nível igual ou abaixo do de quem faz o pedido.
+        Retorna o resultado de cada usuário: added, already_member, not_found, invalid_role ou forbidden_role.
+        """
+        community = self.get_object()
+        try:
+            entries = membership.parse_entries(request.data.get("users"))
+        except membership.MembershipError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        outcomes = membership.add_members(community.pk, entries, assignable_roles(request, community.pk))
+        added = sum(1 for _, outcome in outcomes if outcome == membership.ADDED)
+        return Response(
+            {"added": added, "results": [{"user_id": user_id, "status": outcome} for user_id, outcome in outcomes]},
+            status=status.HTTP_201_CREATED if added else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["post"])
+    def update_roles(self, request, pk=None):
+        """
+        Altera o papel de vários membros (users: [{"id": id de User, "role": papel}]).
+        Ninguém atribui um papel acima do seu nem altera quem está no seu nível ou acima.
+        Retorna o resultado de cada usuário: updated, not_member, not_found, invalid_role,
+        forbidden_role ou forbidden_member.
+        """
+        community = self.get_object()
+        try:
+            entries = membership.parse_entries(request.data.get("users"))
+        except membership.MembershipError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        outcomes = membership.update_roles(
+            community.pk, entries, assignable_roles(request, community.pk), manageable_roles(request, community.pk)
+        )
+        return Response({
+            "updated": sum(1 for _, outcome in outcomes if outcome == membership.UPDATED),
+            "results": [{"user_id": user_id, "status": outcome} for user_id, outcome in outcomes],
+        })
+
+    @action(detail=True, methods=["post"])
+    def import_users(self, request, pk=None):
+        """
+        Importa membros de um arquivo CSV (campo file) com colunas user_id e role,
+        com os mesmos limites de papel de add_users.
+        Cada bloco de linhas é gravado na sua própria transação.
+        """
+        community = self.get_object()
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Envie o CSV no campo file"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            results = membership.import_csv(community.pk, upload, assignable_roles(request, community.pk))
+        except membership.MembershipError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        added = sum(1 for _, _, outcome in results if outcome == membership.ADDED)
+        return Response(
+            {
+                "added": added,
+                "results": [{"line": line, "user_id": user_id, "status": outcome} for line, user_id, outcome in results],
+            },
+            status=status.HTTP_201_CREATED if added else status.HTTP_200_OK,
+        )
+
+    def _paginated(self, queryset, serializer_class, ordering):
+        """
+        Serializa uma página da lista; a consulta já deve trazer as relações aninhadas.
+        """
+        paginator = CommunityCursorPagination(ordering)
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
     @action(detail=True, methods=["get"])
     def users(self, request, pk=None):
-        """Return all users for this community."""
+        """
+        Membros da comunidade, paginados por cursor.
+        Filtros opcionais: role (sem diferenciar maiúsculas) e search (nome ou username).
+        """
         community = self.get_object()
-        users = CommunityUsers.objects.filter(community_id=community)
-        serializer = CommunityUsersSerializer(users, many=True)
-        return Response(serializer.data)
-    
+        members = CommunityUsers.objects.filter(community=community).select_related("user__user")
+        role = request.query_params.get("role")
+        if role:
+            members = members.filter(role__iexact=role)
+        search = request.query_params.get("search", "").strip()
+        if search:
+            members = members.filter(
+                Q(user__user__username__icontains=search)
+                | Q(user__user__first_name__icontains=search)
+                | Q(user__user__last_name__icontains=search)
+            )
+        return self._paginated(members, CommunityUsersSerializer, "id")
+
     @action(detail=True, methods=["get"])
     def tournaments(self, request, pk=None):
-        """Return all tournaments for this community."""
+        """
+        Torneios da comunidade, mais recentes primeiro, paginados por cursor.
+        Filtro opcional: search (nome do torneio).
+        """
         community = self.get_object()
         tournaments = Tournament.objects.filter(community_id=community)
-        serializer = TournamentSerializer(tournaments, many=True)
-        return Response(serializer.data)
-    
+        search = request.query_params.get("search", "").strip()
+        if search:
+            tournaments = tournaments.filter(name__icontains=search)
+        return self._paginated(tournaments, TournamentSerializer, "-tournament_id")
+
+    @action(detail=True, methods=["get"])
+    def leaderboard(self, request, pk=None):
+        """
+        Classificação da comunidade a partir da posição start (padrão 1), limit por página.
+        Lida por faixa de rank no índice (community, rank), sem OFFSET.
+        """
+        community = self.get_object()
+        try:
+            start = max(int(request.query_params.get("start", 1)), 1)
+            limit = min(int(request.query_params.get("limit", LEADERBOARD_PAGE_SIZE)), LEADERBOARD_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "start e limit devem ser inteiros"}, status=status.HTTP_400_BAD_REQUEST)
+
+        standings = list(
+            CommunityStanding.objects.filter(community=community, rank__gte=start, rank__lt=start + limit)
+            .select_related("player__user")
+            .order_by("rank")
+        )
+        return Response({
+            "results": CommunityStandingSerializer(standings, many=True).data,
+            "next_start": start + limit if len(standings) == limit else None,
+        })
+
+    @action(detail=True, methods=["get"])
+    def suggest_opponents(self, request, pk=None):
+        """
+        Os k membros com rating mais próximo do jogador (padrão: quem fez o request),
+        sem os adversários dos últimos 30 dias.
+        """
+        community = self.get_object()
+        try:
+            k = max(min(int(request.query_params.get("k", SUGGESTION_COUNT)), SUGGESTION_MAX_COUNT), 1)
+            player_id = request.query_params.get("player")
+            player_id = int(player_id) if player_id is not None else None
+        except ValueError:
+            return Response({"error": "k e player devem ser inteiros"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if player_id is None:
+            player_id = UserProfile.objects.filter(user=request.user).values_list("pk", flat=True).first()
+            if player_id is None:
+                return Response({"error": "Usuário sem perfil de jogador"}, status=status.HTTP_400_BAD_REQUEST)
+
+        suggestions = suggest_opponents(community.pk, player_id, k)
+        profiles = UserProfile.objects.select_related("user").in_bulk([suggestion[0] for suggestion in suggestions])
+        data = [
+            {"player": profiles[suggested_id], "rating": rating, "difference": difference}
+            for suggested_id, rating, difference in suggestions
+            if suggested_id in profiles
+        ]
+        return Response(OpponentSuggestionSerializer(data, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """
+        Comunidades perto de (lat, lon), da mais próxima para a mais distante.
+        Com radius (km), todas dentro do raio; sem ele, as k mais próximas. Até k resultados.
+        """
+        try:
+            lat = float(request.query_params["lat"])
+            lon = float(request.query_params["lon"])
+            k = max(min(int(request.query_params.get("k", NEARBY_COUNT)), NEARBY_MAX_COUNT), 1)
+            radius = request.query_params.get("radius")
+            radius = float(radius) if radius is not None else None
+        except (KeyError, ValueError):
+            return Response({"error": "lat e lon são obrigatórios; lat, lon, radius e k devem ser números"}, status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (radius is not None and radius <= 0):
+            return Response({"error": "Coordenadas ou raio fora dos limites"}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = geo.within(lat, lon, radius, limit=k) if radius is not None else geo.nearest(lat, lon, k)
+        communities = Community.objects.in_bulk([community_id for community_id, _ in found])
+        results = []
+        for community_id, distance in found:
+            community = communities[community_id]
+            community.distance_km = round(distance, 3)
+            results.append(community)
+        return Response(NearbyCommunitySerializer(results, many=True, context={"request": request}).data)
+
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        """
+        Estatísticas semanais da comunidade (weeks semanas até a atual) e os totais do período.
+        """
+        community = self.get_object()
+        try:
+            weeks = max(min(int(request.query_params.get("weeks", STATS_WEEKS)), STATS_MAX_WEEKS), 1)
+        except ValueError:
+            return Response({"error": "weeks deve ser inteiro"}, status=status.HTTP_400_BAD_REQUEST)
+
+        buckets = community_stats(community.pk, weeks)
+        timed = sum(bucket.timed_matches for bucket in buckets)
+        return Response({
+            "weeks": CommunityStatsBucketSerializer(buckets, many=True).data,
+            "totals": {
+                "matches": sum(bucket.matches for bucket in buckets),
+                "completed_matches": sum(bucket.completed_matches for bucket in buckets),
+                "tournaments": sum(bucket.tournaments for bucket in buckets),
+                "tournament_entries": sum(bucket.tournament_entries for bucket in buckets),
+                "average_match_minutes": (
+                    round(sum(bucket.match_seconds for bucket in buckets) / timed / 60, 1) if timed else None
+                ),
+            },
+        })
+
+    @action(detail=False, methods=["get"])
+    def feed(self, request):
+        """
+        Feed de todas as comunidades do usuário, do mais novo para o mais antigo.
+        Paginação por cursor: passe o next_before recebido como before.
+        """
+        try:
+            before = request.query_params.get("before")
+            before = int(before) if before is not None else None
+            limit = max(min(int(request.query_params.get("limit", feed.FEED_PAGE_SIZE)), feed.FEED_MAX_PAGE_SIZE), 1)
+        except ValueError:
+            return Response({"error": "before e limit devem ser inteiros"}, status=status.HTTP_400_BAD_REQUEST)
+
+        communities = [
+            community_id for community_id, role in community_roles(request).items() if not role.startswith("pending")
+        ]
+        entries, next_before = feed.user_feed(communities, before, limit)
+        return Response({"results": FeedEntrySerializer(entries, many=True).data, "next_before": next_before})
+
+    @action(detail=True, methods=["get"])
+    def calendar(self, request, pk=None):
+        """
+        Partidas e torneios da comunidade entre start e end (datas ISO; 31 dias por padrão).
+        Responde 304 se o ETag enviado em If-None-Match ainda vale.
+        """
+        community = self.get_object()
+        try:
+            start, end = calendar.date_range(request.query_params)
+        except calendar.CalendarError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        matches, tournaments = calendar.community_events(community.pk, start, end)
+        return calendar.calendar_response(request, matches, tournaments, start, end)
+
+    @action(
+        detail=True, methods=["get"], url_path="calendar/ics",
+        authentication_classes=[CalendarTokenAuthentication, TokenAuthentication],
+    )
+    def calendar_ics(self, request, pk=None):
+        """
+        O calendário da comunidade em iCalendar, para assinatura em apps de calendário (aceita ?token= com o token de calendário).
+        """
+        community = self.get_object()
+        try:
+            start, end = calendar.feed_range(request.query_params)
+        except calendar.CalendarError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        matches, tournaments = calendar.community_events(community.pk, start, end)
+        return calendar.ical_response(request, community.name, matches, tournaments, start, end)
@@ -0,0 +1,286 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from .models import Court, CourtBooking
+
+MAX_LOADED_DAYS = 1024  # Dias (comunidade, data) mantidos em memória por processo
+VERSION_TIMEOUT = None  # As versões não expiram; só mudam quando as reservas mudam
+
+
+def day_of(moment):
+    """
+    Dia (UTC) de um horário; as árvores são separadas por quadra e por dia.
+    """
+    return moment.astimezone(dt_timezone.utc).date()
+
+
+def day_bounds(day):
+    start = datetime.combine(day, datetime.min.time(), tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def opening_hours(day, opens_at, closes_at):
+    """
+    Abertura e fechamento de uma quadra no dia, como horários UTC.
+    """
+    return (
+        datetime.combine(day, opens_at, tzinfo=dt_timezone.utc),
+        datetime.combine(day, closes_at, tzinfo=dt_timezone.utc),
+    )
+
+
+class IntervalTree:
+    """
+    Reservas de uma quadra num dia. Árvore de intervalos implícita sobre a lista
+    ordenada por início: o nó de [lo, hi) é mid = (lo + hi) // 2 e max_end[mid]
+    guarda o maior fim da sua subárvore, o que permite podar ramos inteiros.
+    """
+
+    __slots__ = ("starts", "ends", "ids", "max_end")
+
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals)  # (início, fim, id)
+        self.starts = [interval[0] for interval in intervals]
+        self.ends = [interval[1] for interval in intervals]
+        self.ids = [interval[2] for interval in intervals]
+        self._augment()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _augment(self):
+        self.max_end = [None] * len(self.starts)
+
+        def build(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            best = self.ends[mid]
+            for child in (build(lo, mid), build(mid + 1, hi)):
+                if child is not None and child > best:
+                    best = child
+            self.max_end[mid] = best
+            return best
+
+        build(0, len(self.starts))
+
+    def add(self, start, end, booking_id):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, booking_id)
+        self._augment()
+
+    def remove(self, booking_id):
+        try:
+            position = self.ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[position], self.ends[position], self.ids[position]
+        self._augment()
+        return True
+
+    def overlapping(self, start, end):
+        """
+        Reservas que cruzam [start, end), por ordem de início. O(log n + k).
+        """
+        found = []
+
+        def visit(lo, hi):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            if self.max_end[mid] <= start:
+                return
+            visit(lo, mid)
+            if self.starts[mid] < end:
+                if self.ends[mid] > start:
+                    found.append((self.starts[mid], self.ends[mid], self.ids[mid]))
+                visit(mid + 1, hi)
+
+        visit(0, len(self.starts))
+        return found
+
+    def gaps(self, start, end, length=None):
+        """
+        Intervalos livres dentro de [start, end), com pelo menos length de duração se informado.
+        """
+        free = []
+        cursor = start
+        for booked_start, booked_end, _ in self.overlapping(start, end) + [(end, end, None)]:
+            if booked_start > cursor and (length is None or booked_start - cursor >= length):
+                free.append((cursor, booked_start))
+            cursor = max(cursor, booked_end)
+        return free
+
+    def first_gap(self, start, end, length):
+        """
+        Primeiro horário t em [start, end - length] com [t, t + length) livre, ou None.
+        """
+        cursor = start
+        for booked_start, booked_end, _ in self.overlapping(start, end):
+            if booked_start - cursor >= length:
+                return cursor
+            cursor = max(cursor, booked_end)
+        return cursor if end - cursor >= length else None
+
+
+class CourtDay:
+    """
+    Árvores das quadras ativas de uma comunidade num dia, com o horário de funcionamento
+    de cada quadra já convertido para aquele dia.
+    """
+
+    def __init__(self, community_id, day, courts, version):
+        self.community_id = community_id
+        self.day = day
+        self.courts = courts  # court_id -> (abertura, fechamento, IntervalTree)
+        self.version = version
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, community_id, day, version):
+        """
+        Carrega o dia com duas consultas: quadras e reservas.
+        """
+        day_start, day_end = day_bounds(day)
+        hours = {
+            court_id: opening_hours(day, opens_at, closes_at)
+            for court_id, opens_at, closes_at in Court.objects.filter(community_id=community_id, active=True)
+            .order_by("pk")
+            .values_list("pk", "opens_at", "closes_at")
+        }
+        intervals = {court_id: [] for court_id in hours}
+        for court_id, booking_id, start, end in CourtBooking.objects.filter(
+            court_id__in=list(hours), start__gte=day_start, start__lt=day_end
+        ).values_list("court_id", "pk", "start", "end"):
+            intervals[court_id].append((start, end, booking_id))
+        courts = {
+            court_id: (opens, closes, IntervalTree(intervals[court_id]))
+            for court_id, (opens, closes) in hours.items()
+        }
+        return cls(community_id, day, courts, version)
+
+
+_days = OrderedDict()
+
+
+def _community_key(community_id):
+    return f"court_schedule_version:{community_id}"
+
+
+def _day_key(community_id, day):
+    return f"court_schedule_version:{community_id}:{day.isoformat()}"
+
+
+def _current_version(community_id, day):
+    """
+    Versão de um dia: a das quadras da comunidade e a das reservas do dia.
+    """
+    keys = [_community_key(community_id), _day_key(community_id, day)]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), VERSION_TIMEOUT)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def get_day(community_id, day):
+    """
+    Dia da comunidade em memória, recarregado se outro processo alterou as quadras ou as reservas.
+    """
+    version = _current_version(community_id, day)
+    key = (community_id, day)
+    court_day = _days.get(key)
+    if court_day is None or court_day.version != version:
+        court_day = _days[key] = CourtDay.build(community_id, day, version)
+    _days.move_to_end(key)
+    while len(_days) > MAX_LOADED_DAYS:
+        _days.popitem(last=False)
+    return court_day
+
+
+def conflicts(community_id, court_id, start, end):
+    """
+    Reservas da quadra que cruzam [start, end): [(início, fim, booking_id)].
+    """
+    court = get_day(community_id, day_of(start)).courts.get(court_id)
+    return court[2].overlapping(start, end) if court else []
+
+
+def free_slots(community_id, court_id, day, length=None):
+    """
+    Horários livres da quadra no dia, dentro do funcionamento: [(início, fim)].
+    Uma quadra inativa ou de outra comunidade não tem horários livres.
+    """
+    court = get_day(community_id, day).courts.get(court_id)
+    if court is None:
+        return []
+    opens, closes, tree = court
+    return tree.gaps(opens, closes, length)
+
+
+def first_available(community_id, start, length, until):
+    """
+    A quadra que fica livre mais cedo, a partir de start, por length sem interrupção
+    e terminando até until. Retorna (court_id, início) ou None; empates ficam com a menor quadra.
+    """
+    day = day_of(start)
+    while True:
+        day_start, day_end = day_bounds(day)
+        if day_start >= until:
+            return None
+        best = None
+        for court_id, (opens, closes, tree) in get_day(community_id, day).courts.items():
+            found = tree.first_gap(max(opens, start), min(closes, until), length)
+            if found is not None and (best is None or found < best[1]):
+                best = (court_id, found)
+        if best is not None:
+            return best
+        day += timedelta(days=1)
+
+
+def _bump_day(community_id, day):
+    version = time.time_ns()
+    cache.set(_day_key(community_id, day), version, VERSION_TIMEOUT)
+    return version
+
+
+def booking_added(community_id, court_id, booking_id, start, end):
+    """
+    Inclui a reserva no dia carregado, se houver, e avisa os outros processos.
+    """
+    day = day_of(start)
+    court_day = _days.get((community_id, day))
+    version = _bump_day(community_id, day)
+    if court_day is None or court_id not in court_day.courts:
+        return
+    with court_day.lock:
+        court_day.courts[court_id][2].add(start, end, booking_id)
+        court_day.version = (court_day.version[0], version)
+
+
+def booking_removed(community_id, court_id, booking_id, start):
+    day = day_of(start)
+    court_day = _days.get((community_id, day))
+    version = _bump_day(community_id, day)
+    if court_day is None or court_id not in court_day.courts:
+        return
+    with court_day.lock:
+        court_day.courts[court_id][2].remove(booking_id)
+        court_day.version = (court_day.version[0], version)
+
+
+def invalidate(community_id):
+    """
+    Descarta todos os dias da comunidade depois de mudanças nas quadras ou de reservas
+    alteradas no lugar; eles são recarregados na próxima leitura.
+    """
+    for key in [key for key in _days if key[0] == community_id]:
+        _days.pop(key, None)
+    cache.set(_community_key(community_id), time.time_ns(), VERSION_TIMEOUT)
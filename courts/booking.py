@@ -0,0 +1,57 @@
+from django.db import transaction
+from . import availability
+from .models import Court, CourtBooking
+
+
+class BookingError(Exception):
+    pass
+
+
+class BookingConflict(BookingError):
+    """
+    O horário pedido cruza reservas existentes: conflicts traz [(início, fim, booking_id)].
+    """
+
+    def __init__(self, conflicts):
+        super().__init__("A quadra já está reservada nesse horário")
+        self.conflicts = conflicts
+
+
+def check_hours(court, start, end):
+    """
+    Levanta BookingError se [start, end) não cabe no funcionamento da quadra.
+    """
+    if not court.active:
+        raise BookingError("A quadra está inativa")
+    if end <= start:
+        raise BookingError("O fim deve ser depois do início")
+    opens, closes = availability.opening_hours(availability.day_of(start), court.opens_at, court.closes_at)
+    if start < opens or end > closes:
+        raise BookingError(f"A reserva deve caber no funcionamento da quadra ({court.opens_at:%H:%M}-{court.closes_at:%H:%M} UTC)")
+
+
+def book(court, start, end, booked_by=None, match=None, notes=""):
+    """
+    Reserva a quadra em [start, end). A árvore em memória recusa de imediato um horário
+    já ocupado; a checagem que vale é feita no banco com a quadra travada, então duas
+    reservas concorrentes da mesma quadra nunca se sobrepõem.
+    """
+    if match is not None and match.community_id_id not in (None, court.community_id):
+        raise BookingError("A partida é de outra comunidade")
+    found = availability.conflicts(court.community_id, court.pk, start, end)
+    if found:
+        raise BookingConflict(found)
+
+    with transaction.atomic():
+        court = Court.objects.select_for_update().get(pk=court.pk)
+        check_hours(court, start, end)
+        found = list(
+            CourtBooking.objects.filter(court=court, start__lt=end, end__gt=start)
+            .order_by("start")
+            .values_list("start", "end", "pk")
+        )
+        if found:
+            raise BookingConflict(found)
+        return CourtBooking.objects.create(
+            court=court, start=start, end=end, booked_by=booked_by, match=match, notes=notes
+        )
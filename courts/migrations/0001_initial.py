@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:55
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('community', '0008_picture_variants'),
+        ('matches', '0003_calendar_indexes'),
+        ('users', '0002_picture_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Court',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('surface', models.CharField(choices=[('clay', 'Clay'), ('hard', 'Hard'), ('grass', 'Grass'), ('carpet', 'Carpet')], default='clay', max_length=10)),
+                ('opens_at', models.TimeField(default=datetime.time(7, 0))),
+                ('closes_at', models.TimeField(default=datetime.time(22, 0))),
+                ('active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('community', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='courts', to='community.community')),
+            ],
+            options={
+                'unique_together': {('community', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CourtBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('notes', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booked_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='court_bookings', to='users.userprofile')),
+                ('court', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='courts.court')),
+                ('match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='court_bookings', to='matches.match')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['court', 'start'], name='courts_cour_court_i_a56246_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('end__gt', models.F('start'))), name='court_booking_end_after_start')],
+            },
+        ),
+    ]
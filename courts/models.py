@@ -0,0 +1,58 @@
+from datetime import time
+
+from django.db import models
+from community.models import Community
+from matches.models import Match
+from users.models import UserProfile
+
+
+class Court(models.Model):
+    """
+    Quadra de uma comunidade. O horário de funcionamento vale para todos os dias, em UTC.
+    """
+    SURFACE_CHOICES = [
+        ("clay", "Clay"),
+        ("hard", "Hard"),
+        ("grass", "Grass"),
+        ("carpet", "Carpet"),
+    ]
+
+    community = models.ForeignKey(Community, on_delete=models.CASCADE, related_name="courts")
+    name = models.CharField(max_length=100)
+    surface = models.CharField(max_length=10, choices=SURFACE_CHOICES, default="clay")
+    opens_at = models.TimeField(default=time(7))
+    closes_at = models.TimeField(default=time(22))
+    active = models.BooleanField(default=True)  # Quadras inativas não aparecem na disponibilidade
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ["community", "name"]
+
+    def __str__(self):
+        return f"{self.name} ({self.community.name})"
+
+
+class CourtBooking(models.Model):
+    """
+    Reserva de uma quadra em [start, end), sempre dentro de um mesmo dia.
+    Reservas da mesma quadra nunca se sobrepõem; veja booking.py.
+    """
+    court = models.ForeignKey(Court, on_delete=models.CASCADE, related_name="bookings")
+    booked_by = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name="court_bookings")
+    match = models.ForeignKey(Match, on_delete=models.SET_NULL, null=True, blank=True, related_name="court_bookings")
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    notes = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end__gt=models.F("start")), name="court_booking_end_after_start"),
+        ]
+        indexes = [
+            # Checagem de sobreposição e carga das reservas de um dia
+            models.Index(fields=["court", "start"]),
+        ]
+
+    def __str__(self):
+        return f"{self.court.name} {self.start:%Y-%m-%d %H:%M}-{self.end:%H:%M}"
@@ -0,0 +1,30 @@
+from community.permissions import MANAGER_ROLES, IsCommunityManager, community_roles, has_role
+
+
+def is_member(request, community_id):
+    """
+    Membro da comunidade, sem convites ou pedidos pendentes.
+    """
+    role = community_roles(request).get(community_id)
+    return role is not None and not role.startswith("pending")
+
+
+class IsCourtManager(IsCommunityManager):
+    """
+    Só administradores e moderadores da comunidade dona da quadra.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        return has_role(request, obj.community_id, self.roles)
+
+
+class IsBookerOrManager(IsCommunityManager):
+    """
+    Quem fez a reserva, ou um administrador ou moderador da comunidade.
+    """
+    message = "Apenas quem reservou ou a administração da comunidade pode cancelar a reserva."
+
+    def has_object_permission(self, request, view, obj):
+        if obj.booked_by is not None and obj.booked_by.user_id == request.user.pk:
+            return True
+        return has_role(request, obj.court.community_id, MANAGER_ROLES)
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import availability
+from .models import Court, CourtBooking
+
+
+@receiver(post_save, sender=CourtBooking)
+def add_to_schedule(sender, instance, created, **kwargs):
+    """
+    Leva a reserva às árvores de disponibilidade depois do commit. Reservas
+    alteradas no lugar descartam os dias carregados da comunidade.
+    """
+    community_id = instance.court.community_id
+    if created:
+        transaction.on_commit(lambda: availability.booking_added(
+            community_id, instance.court_id, instance.pk, instance.start, instance.end
+        ))
+    else:
+        transaction.on_commit(lambda: availability.invalidate(community_id))
+
+
+@receiver(post_delete, sender=CourtBooking)
+def remove_from_schedule(sender, instance, **kwargs):
+    community_id = instance.court.community_id
+    booking_id = instance.pk
+    transaction.on_commit(lambda: availability.booking_removed(community_id, instance.court_id, booking_id, instance.start))
+
+
+@receiver(post_save, sender=Court)
+@receiver(post_delete, sender=Court)
+def reload_schedule(sender, instance, **kwargs):
+    """
+    Quadras criadas, alteradas ou removidas mudam todos os dias da comunidade.
+    """
+    transaction.on_commit(lambda: availability.invalidate(instance.community_id))
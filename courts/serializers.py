@@ -0,0 +1,27 @@
+from rest_framework import serializers
+from .models import Court, CourtBooking
+
+
+class CourtSerializer(serializers.ModelSerializer):
+    def validate(self, data):
+        opens_at = data.get("opens_at", getattr(self.instance, "opens_at", None))
+        closes_at = data.get("closes_at", getattr(self.instance, "closes_at", None))
+        if opens_at is not None and closes_at is not None and closes_at <= opens_at:
+            raise serializers.ValidationError("O fechamento deve ser depois da abertura")
+        return data
+
+    class Meta:
+        model = Court
+        fields = "__all__"
+
+
+class CourtBookingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CourtBooking
+        fields = ['id', 'court', 'booked_by', 'match', 'start', 'end', 'notes', 'created_at']
+        read_only_fields = ['court', 'booked_by']
+
+
+class SlotSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
@@ -0,0 +1,197 @@
+import random
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from community.models import Community, CommunityUsers
+from matches.models import Match
+from users.models import UserProfile
+from courts import availability
+from courts.availability import IntervalTree
+from courts.models import Court, CourtBooking
+
+User = get_user_model()
+
+DAY = datetime(2026, 6, 1, tzinfo=dt_timezone.utc)
+
+
+def at(hour, minute=0, days=0):
+    return DAY + timedelta(days=days, hours=hour, minutes=minute)
+
+
+class IntervalTreeTests(TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        intervals = []
+        for booking_id in range(300):
+            start = rng.randrange(0, 1000)
+            intervals.append((start, start + rng.randrange(1, 60), booking_id))
+        tree = IntervalTree(intervals)
+        for _ in range(200):
+            start = rng.randrange(0, 1100)
+            end = start + rng.randrange(1, 100)
+            expected = sorted(interval for interval in intervals if interval[0] < end and interval[1] > start)
+            self.assertEqual(sorted(tree.overlapping(start, end)), expected)
+
+        for booking_id in range(0, 300, 3):
+            self.assertTrue(tree.remove(booking_id))
+        tree.add(5, 2000, 999)
+        remaining = [interval for interval in intervals if interval[2] % 3] + [(5, 2000, 999)]
+        self.assertEqual(sorted(tree.overlapping(1500, 1600)), [(5, 2000, 999)])
+        self.assertEqual(sorted(tree.overlapping(0, 3000)), sorted(remaining))
+        self.assertFalse(tree.remove(12345))
+
+    def test_gaps(self):
+        tree = IntervalTree([(10, 20, 1), (20, 30, 2), (45, 50, 3)])
+        self.assertEqual(tree.gaps(0, 60), [(0, 10), (30, 45), (50, 60)])
+        self.assertEqual(tree.gaps(15, 48), [(30, 45)])
+        self.assertEqual(tree.gaps(0, 60, length=12), [(30, 45)])
+        self.assertEqual(tree.first_gap(0, 60, 12), 30)
+        self.assertEqual(tree.first_gap(12, 60, 5), 30)
+        self.assertEqual(tree.first_gap(0, 60, 16), None)
+
+
+class CourtBookingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        availability._days.clear()
+        self.community = Community.objects.create(name="Clube", description="")
+        self.other_community = Community.objects.create(name="Outro", description="")
+        self.member = self._profile("member")
+        self.manager = self._profile("manager")
+        self.outsider = self._profile("outsider")
+        CommunityUsers.objects.create(community=self.community, user=self.member, role="member")
+        CommunityUsers.objects.create(community=self.community, user=self.manager, role="admin")
+        self.courts = [
+            Court.objects.create(community=self.community, name=f"Quadra {i}", opens_at=time(8), closes_at=time(20))
+            for i in (1, 2)
+        ]
+        self.client.force_authenticate(self.member.user)
+
+    def _profile(self, username):
+        return UserProfile.objects.create(user=User.objects.create_user(username=username, password="pw"))
+
+    def _book(self, court, start, end, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f"/api/courts/{court.pk}/bookings/", {"start": start.isoformat(), "end": end.isoformat(), **extra}, format="json"
+            )
+
+    def test_booking_rejects_overlaps(self):
+        court = self.courts[0]
+        response = self._book(court, at(9), at(10), notes="Treino")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["booked_by"], self.member.pk)
+
+        response = self._book(court, at(9, 30), at(10, 30))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(len(response.data["conflicts"]), 1)
+
+        # Reservas encostadas não se sobrepõem
+        self.assertEqual(self._book(court, at(10), at(11)).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._book(court, at(7), at(9)).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._book(court, at(19), at(21)).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._book(court, at(11), at(11)).status_code, status.HTTP_400_BAD_REQUEST)
+
+        other_match = Match.objects.create(community_id=self.other_community, home1=self.member, away1=self.manager)
+        self.assertEqual(self._book(court, at(12), at(13), match=other_match.pk).status_code, status.HTTP_400_BAD_REQUEST)
+        match = Match.objects.create(community_id=self.community, home1=self.member, away1=self.manager)
+        response = self._book(court, at(12), at(13), match=match.pk)
+        self.assertEqual(response.data["match"], match.pk)
+
+        self.client.force_authenticate(self.outsider.user)
+        self.assertEqual(self._book(court, at(14), at(15)).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(CourtBooking.objects.count(), 3)
+
+    def test_database_check_catches_stale_tree(self):
+        court = self.courts[0]
+        availability.get_day(self.community.pk, DAY.date())
+        # bulk_create não dispara sinais: a árvore carregada não vê esta reserva
+        CourtBooking.objects.bulk_create([CourtBooking(court=court, start=at(9), end=at(10))])
+        self.assertEqual(availability.conflicts(self.community.pk, court.pk, at(9), at(10)), [])
+
+        response = self._book(court, at(9, 30), at(10, 30))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(CourtBooking.objects.count(), 1)
+
+    def test_availability_from_tree(self):
+        court = self.courts[0]
+        self._book(court, at(9), at(10))
+        self._book(court, at(12), at(14))
+        url = f"/api/courts/{court.pk}/availability/"
+        response = self.client.get(url, {"date": "2026-06-01"})
+        self.client.get(url, {"date": "2026-06-01"})
+
+        # Só a leitura da quadra; as reservas vêm da árvore em memória
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"date": "2026-06-01", "length": 90})
+        self.assertEqual(
+            [(slot["start"], slot["end"]) for slot in response.data["free"]],
+            [("2026-06-01T10:00:00Z", "2026-06-01T12:00:00Z"), ("2026-06-01T14:00:00Z", "2026-06-01T20:00:00Z")],
+        )
+        self.assertEqual(len(response.data["booked"]), 2)
+
+        booking = CourtBooking.objects.get(start=at(9))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/bookings/{booking.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get(url, {"date": "2026-06-01"})
+        self.assertEqual(response.data["free"][0], {"start": "2026-06-01T08:00:00Z", "end": "2026-06-01T12:00:00Z"})
+
+    def test_first_available_court(self):
+        self._book(self.courts[0], at(9), at(10))
+        self._book(self.courts[1], at(9), at(9, 30))
+        url = "/api/courts/first_available/"
+        params = {"community": self.community.pk, "start": at(9).isoformat(), "length": 60}
+        response = self.client.get(url, params)
+        self.assertEqual(response.data["court"]["id"], self.courts[1].pk)
+        self.assertEqual(response.data["start"], at(9, 30))
+
+        # Dia cheio: a busca passa para a abertura do dia seguinte
+        for court in self.courts:
+            CourtBooking.objects.filter(court=court).delete()
+            with self.captureOnCommitCallbacks(execute=True):
+                CourtBooking.objects.create(court=court, start=at(8), end=at(20))
+        response = self.client.get(url, params)
+        self.assertEqual((response.data["court"]["id"], response.data["start"]), (self.courts[0].pk, at(8, days=1)))
+        # Sem folga de 90 minutos antes das 9h do dia seguinte
+        response = self.client.get(url, {**params, "length": 90, "days": 1})
+        self.assertIsNone(response.data["court"])
+        self.assertEqual(self.client.get(url, {"start": "amanhã"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_court_changes_reload_schedule(self):
+        day = DAY.date()
+        self.assertEqual(len(availability.free_slots(self.community.pk, self.courts[0].pk, day)), 1)
+        self.client.force_authenticate(self.manager.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/courts/{self.courts[0].pk}/", {"closes_at": "12:00"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(availability.free_slots(self.community.pk, self.courts[0].pk, day), [(at(8), at(12))])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/courts/", {"community": self.community.pk, "name": "Quadra 3"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(availability.get_day(self.community.pk, day).courts), 3)
+
+        self._book(self.courts[1], at(9), at(10))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/courts/{self.courts[1].pk}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertNotIn(self.courts[1].pk, availability.get_day(self.community.pk, day).courts)
+
+        self.client.force_authenticate(self.member.user)
+        response = self.client.post("/api/courts/", {"community": self.community.pk, "name": "Quadra 4"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.patch(f"/api/courts/{self.courts[0].pk}/", {"active": False}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cancel_permissions(self):
+        self._book(self.courts[0], at(9), at(10))
+        booking = CourtBooking.objects.get()
+        self.client.force_authenticate(self.outsider.user)
+        self.assertEqual(self.client.delete(f"/api/bookings/{booking.pk}/").status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.manager.user)
+        self.assertEqual(self.client.delete(f"/api/bookings/{booking.pk}/").status_code, status.HTTP_204_NO_CONTENT)
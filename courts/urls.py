@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import CourtViewSet, CourtBookingViewSet
+router = DefaultRouter()
+router.register(r'courts', CourtViewSet)
+router.register(r'bookings', CourtBookingViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
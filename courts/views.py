@@ -0,0 +1,176 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import mixins, viewsets, status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from users.models import UserProfile
+from . import availability
+from .booking import BookingConflict, BookingError, book
+from .models import Court, CourtBooking
+from .permissions import MANAGER_ROLES, IsBookerOrManager, IsCourtManager, has_role, is_member
+from .serializers import CourtBookingSerializer, CourtSerializer, SlotSerializer
+
+DEFAULT_BOOKING_MINUTES = 60
+SEARCH_DAYS = 7
+MAX_SEARCH_DAYS = 31
+
+
+def _moment(value):
+    """
+    Data ou data e hora ISO; sem fuso, vale como UTC. Levanta ValueError se inválida.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    return moment if timezone.is_aware(moment) else timezone.make_aware(moment, dt_timezone.utc)
+
+
+def _slots(intervals):
+    return SlotSerializer([{"start": start, "end": end} for start, end, *_ in intervals], many=True).data
+
+
+class CourtViewSet(viewsets.ModelViewSet):
+    queryset = Court.objects.all()
+    serializer_class = CourtSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    manager_actions = {"update", "partial_update", "destroy"}
+
+    def get_permissions(self):
+        if self.action in self.manager_actions:
+            return [IsAuthenticated(), IsCourtManager()]
+        return super().get_permissions()
+
+    def list(self, request):
+        """
+        Quadras, opcionalmente só as de uma comunidade (community).
+        """
+        courts = self.get_queryset().order_by("community_id", "name")
+        community = request.query_params.get("community")
+        if community is not None:
+            try:
+                courts = courts.filter(community_id=int(community))
+            except ValueError:
+                return Response({"error": "community deve ser inteiro"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(courts, many=True).data)
+
+    def perform_create(self, serializer):
+        if not has_role(self.request, serializer.validated_data["community"].pk, MANAGER_ROLES):
+            raise PermissionDenied(IsCourtManager.message)
+        serializer.save()
+
+    @action(detail=True, methods=["get"])
+    def availability(self, request, pk=None):
+        """
+        Horários livres e reservados da quadra num dia (date, padrão hoje, em UTC).
+        Com length (minutos), só os horários livres com pelo menos essa duração.
+        Respondido pela árvore de intervalos do dia, sem ler as reservas no banco.
+        """
+        court = self.get_object()
+        try:
+            day = _moment(request.query_params["date"]).date() if "date" in request.query_params else timezone.now().date()
+            length = request.query_params.get("length")
+            length = timedelta(minutes=int(length)) if length is not None else None
+        except ValueError:
+            return Response({"error": "date deve ser uma data ISO e length um inteiro"}, status=status.HTTP_400_BAD_REQUEST)
+
+        day_start, day_end = availability.day_bounds(day)
+        return Response({
+            "court": court.pk,
+            "date": day,
+            "free": _slots(availability.free_slots(court.community_id, court.pk, day, length)),
+            "booked": [
+                {"id": booking_id, "start": start, "end": end}
+                for start, end, booking_id in availability.conflicts(court.community_id, court.pk, day_start, day_end)
+            ],
+        })
+
+    @action(detail=True, methods=["get", "post"])
+    def bookings(self, request, pk=None):
+        """
+        GET: reservas da quadra num dia (date, padrão hoje).
+        POST: reserva a quadra (start, end, match e notes opcionais); só para membros da comunidade.
+        Um horário ocupado responde 409 com as reservas em conflito.
+        """
+        court = self.get_object()
+        if request.method == "GET":
+            try:
+                day = _moment(request.query_params["date"]).date() if "date" in request.query_params else timezone.now().date()
+            except ValueError:
+                return Response({"error": "date deve ser uma data ISO"}, status=status.HTTP_400_BAD_REQUEST)
+            day_start, day_end = availability.day_bounds(day)
+            bookings = CourtBooking.objects.filter(court=court, start__gte=day_start, start__lt=day_end).order_by("start")
+            return Response(CourtBookingSerializer(bookings, many=True).data)
+
+        if not is_member(request, court.community_id):
+            return Response({"error": "Apenas membros da comunidade podem reservar quadras"}, status=status.HTTP_403_FORBIDDEN)
+        serializer = CourtBookingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            booking = book(
+                court,
+                data["start"],
+                data["end"],
+                booked_by=UserProfile.objects.filter(user=request.user).first(),
+                match=data.get("match"),
+                notes=data.get("notes", ""),
+            )
+        except BookingConflict as e:
+            return Response({"error": str(e), "conflicts": _slots(e.conflicts)}, status=status.HTTP_409_CONFLICT)
+        except BookingError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(CourtBookingSerializer(booking).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"])
+    def first_available(self, request):
+        """
+        A quadra da comunidade (community) que fica livre mais cedo a partir de start
+        (padrão agora) por length minutos (padrão 60), procurando por até days dias.
+        """
+        try:
+            community_id = int(request.query_params["community"])
+            start = _moment(request.query_params["start"]) if "start" in request.query_params else timezone.now()
+            length = timedelta(minutes=int(request.query_params.get("length", DEFAULT_BOOKING_MINUTES)))
+            days = max(min(int(request.query_params.get("days", SEARCH_DAYS)), MAX_SEARCH_DAYS), 1)
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "community é obrigatório; start deve ser uma data ISO e length e days inteiros"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if length <= timedelta(0):
+            return Response({"error": "length deve ser positivo"}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = availability.first_available(community_id, start, length, start + timedelta(days=days))
+        if found is None:
+            return Response({"court": None, "start": None, "end": None})
+        court_id, slot_start = found
+        return Response({
+            "court": CourtSerializer(Court.objects.get(pk=court_id)).data,
+            "start": slot_start,
+            "end": slot_start + length,
+        })
+
+
+class CourtBookingViewSet(mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Consulta e cancelamento de reservas; reservas são criadas pela quadra.
+    """
+    queryset = CourtBooking.objects.select_related("court", "booked_by")
+    serializer_class = CourtBookingSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        if self.action == "destroy":
+            return [IsAuthenticated(), IsBookerOrManager()]
+        return super().get_permissions()
@@ -0,0 +1,229 @@
+import hashlib
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Max, Q
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.response import Response
+from tournament.models import Tournament, TournamentPlayer
+from .models import Match
+
+DEFAULT_RANGE = timedelta(days=31)
+# Subscribed feeds use relative windows, since their URL never changes
+FEED_PAST = timedelta(days=30)
+FEED_RANGE = timedelta(days=365)
+MAX_RANGE = timedelta(days=366)
+MATCH_LENGTH = timedelta(minutes=90)  # Assumed length of a match in the calendar
+ICAL_LINE_LIMIT = 75
+PRODID = "-//Tennis Community Manager//Calendar//EN"
+PLAYER_SIDES = ("home1", "home2", "away1", "away2")
+
+
+class CalendarError(Exception):
+    pass
+
+
+def _parse(value, name):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CalendarError(f"{name} must be an ISO date or datetime")
+        moment = datetime.combine(day, time.min)
+    return moment if timezone.is_aware(moment) else timezone.make_aware(moment, dt_timezone.utc)
+
+
+def date_range(params, now=None, past=timedelta(0), span=DEFAULT_RANGE):
+    """
+    (start, end) from the start/end query params; defaults to now - past until span later.
+    The default start is rounded down to midnight UTC, so a relative window (and its
+    ETag) only moves once a day.
+    """
+    now = now or timezone.now()
+    try:
+        if params.get("start"):
+            start = _parse(params["start"], "start")
+        else:
+            start = datetime.combine((now - past).astimezone(dt_timezone.utc).date(), time.min, tzinfo=dt_timezone.utc)
+        end = _parse(params["end"], "end") if params.get("end") else start + span
+    except ValueError:
+        raise CalendarError("Invalid date")
+    if end <= start:
+        raise CalendarError("end must be after start")
+    if end - start > MAX_RANGE:
+        raise CalendarError("The range can span at most 366 days")
+    return start, end
+
+
+def community_events(community_id, start, end):
+    """(matches, tournaments) querysets of a community, each answered by its (community, date) index"""
+    return (
+        Match.objects.filter(community_id=community_id, match_date__gte=start, match_date__lt=end),
+        Tournament.objects.filter(community_id=community_id, start_date__gte=start, start_date__lt=end),
+    )
+
+
+def player_events(profile_id, start, end):
+    """(matches, tournaments) querysets of a player in any community"""
+    sides = Q()
+    for side in PLAYER_SIDES:
+        sides |= Q(**{side: profile_id})
+    return (
+        Match.objects.filter(sides, match_date__gte=start, match_date__lt=end),
+        Tournament.objects.filter(
+            start_date__gte=start,
+            start_date__lt=end,
+            pk__in=TournamentPlayer.objects.filter(user_id=profile_id)
+            .exclude(status__in=("withdrawn", "waitlisted"))
+            .values("tournament"),
+        ),
+    )
+
+
+def etag(matches, tournaments, start, end):
+    """
+    Fingerprint of the events in range: the range itself, latest change and row
+    counts, so edits, additions, removals and a moved window all change it.
+    Two aggregate queries, no rows read.
+    """
+    parts = [start.isoformat(), end.isoformat()]
+    for queryset in (matches, tournaments):
+        summary = queryset.order_by().aggregate(changed=Max("updated_at"), total=Count("pk"))
+        parts.append(f"{summary['changed'].isoformat() if summary['changed'] else '-'}:{summary['total']}")
+    return '"' + hashlib.sha1("|".join(parts).encode()).hexdigest() + '"'
+
+
+def not_modified(request, tag):
+    """True when the client's If-None-Match already holds the current ETag"""
+    header = request.headers.get("If-None-Match", "")
+    return tag in [value.strip() for value in header.split(",")] or header.strip() == "*"
+
+
+def _title(match):
+    home = " & ".join(str(player) for player in (match.home1, match.home2) if player)
+    away = " & ".join(str(player) for player in (match.away1, match.away2) if player)
+    return f"{home or 'TBD'} vs {away or 'TBD'}"
+
+
+def _with_players(matches):
+    return matches.select_related(*(f"{side}__user" for side in PLAYER_SIDES))
+
+
+def events(matches, tournaments):
+    """Matches and tournaments in range as plain dicts, ordered by start"""
+    found = [
+        {
+            "type": "match",
+            "id": match.pk,
+            "title": _title(match),
+            "start": match.match_date,
+            "end": match.match_date + MATCH_LENGTH,
+            "community": match.community_id_id,
+            "finished": match.winner1_id is not None,
+        }
+        for match in _with_players(matches)
+    ] + [
+        {
+            "type": "tournament",
+            "id": tournament.pk,
+            "title": tournament.name,
+            "start": tournament.start_date,
+            "end": tournament.end_date or tournament.start_date,
+            "community": tournament.community_id_id,
+            "finished": tournament.finished,
+        }
+        for tournament in tournaments
+    ]
+    found.sort(key=lambda event: (event["start"], event["type"], event["id"]))
+    return found
+
+
+def _stamp(moment):
+    return moment.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line):
+    """Split content lines longer than 75 octets, as RFC 5545 requires"""
+    encoded = line.encode()
+    if len(encoded) <= ICAL_LINE_LIMIT:
+        return line + "\r\n"
+    parts = []
+    while encoded:
+        limit = ICAL_LINE_LIMIT if not parts else ICAL_LINE_LIMIT - 1
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:  # Never split a UTF-8 character
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _event(uid, start, end, summary, changed):
+    yield "BEGIN:VEVENT"
+    yield f"UID:{uid}"
+    yield f"DTSTAMP:{_stamp(changed)}"
+    yield f"DTSTART:{_stamp(start)}"
+    yield f"DTEND:{_stamp(end)}"
+    yield f"SUMMARY:{_escape(summary)}"
+    yield "END:VEVENT"
+
+
+def ical_stream(name, matches, tournaments, chunk_size=500):
+    """
+    iCalendar document generated line by line; rows are read in chunks, so
+    large ranges never sit in memory as a whole.
+    """
+    yield _fold("BEGIN:VCALENDAR")
+    yield _fold("VERSION:2.0")
+    yield _fold(f"PRODID:{PRODID}")
+    yield _fold(f"X-WR-CALNAME:{_escape(name)}")
+    for match in _with_players(matches).order_by("match_date", "pk").iterator(chunk_size=chunk_size):
+        for line in _event(
+            f"match-{match.pk}@tennis-community-manager", match.match_date,
+            match.match_date + MATCH_LENGTH, _title(match), match.updated_at,
+        ):
+            yield _fold(line)
+    for tournament in tournaments.order_by("start_date", "pk").iterator(chunk_size=chunk_size):
+        for line in _event(
+            f"tournament-{tournament.pk}@tennis-community-manager", tournament.start_date,
+            tournament.end_date or tournament.start_date + timedelta(days=1), tournament.name, tournament.updated_at,
+        ):
+            yield _fold(line)
+    yield _fold("END:VCALENDAR")
+
+
+def feed_range(params, now=None):
+    """Date range of an iCalendar feed: the last 30 days and the next 11 months by default"""
+    return date_range(params, now, past=FEED_PAST, span=FEED_RANGE)
+
+
+def _not_modified_response(tag):
+    response = HttpResponseNotModified()
+    response["ETag"] = tag
+    return response
+
+
+def calendar_response(request, matches, tournaments, start, end):
+    """JSON events in range, or 304 when the client's ETag is still current"""
+    tag = etag(matches, tournaments, start, end)
+    if not_modified(request, tag):
+        return _not_modified_response(tag)
+    response = Response({"results": events(matches, tournaments)})
+    response["ETag"] = tag
+    return response
+
+
+def ical_response(request, name, matches, tournaments, start, end):
+    """Streamed iCalendar feed, or 304 when the client's ETag is still current"""
+    tag = etag(matches, tournaments, start, end)
+    if not_modified(request, tag):
+        return _not_modified_response(tag)
+    response = StreamingHttpResponse(ical_stream(name, matches, tournaments), content_type="text/calendar; charset=utf-8")
+    response["ETag"] = tag
+    response["Content-Disposition"] = 'inline; filename="calendar.ics"'
+    return response
@@ -0,0 +1,81 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import HeadToHead
+from .results import completed_singles, final_sets, side_totals, singles_result
+
+
+def _meeting(match, played_at):
+    """Keeps last_played/last_match on the latest meeting even if results arrive out of order"""
+    newer = When(last_played__gt=played_at, then=F("last_match"))
+    return {
+        "last_played": Greatest(Coalesce(F("last_played"), Value(played_at)), Value(played_at)),
+        "last_match": Case(newer, default=Value(match.pk)),
+    }
+
+
+def record_match(match, sets):
+    """Add a decided singles match to both orientations of the pair, in three queries"""
+    result = singles_result(match)
+    if result is None:
+        return
+    winner_id, loser_id = result
+    sets_won, sets_lost, games_won, games_lost = side_totals(sets, match.winner1_id == match.home1_id)
+    meeting = _meeting(match, match.match_date or timezone.now())
+
+    with transaction.atomic():
+        HeadToHead.objects.bulk_create(
+            [HeadToHead(player_id=winner_id, opponent_id=loser_id), HeadToHead(player_id=loser_id, opponent_id=winner_id)],
+            ignore_conflicts=True,
+        )
+        HeadToHead.objects.filter(player_id=winner_id, opponent_id=loser_id).update(
+            wins=F("wins") + 1,
+            sets_won=F("sets_won") + sets_won,
+            sets_lost=F("sets_lost") + sets_lost,
+            games_won=F("games_won") + games_won,
+            games_lost=F("games_lost") + games_lost,
+            **meeting,
+        )
+        HeadToHead.objects.filter(player_id=loser_id, opponent_id=winner_id).update(
+            losses=F("losses") + 1,
+            sets_won=F("sets_won") + sets_lost,
+            sets_lost=F("sets_lost") + sets_won,
+            games_won=F("games_won") + games_lost,
+            games_lost=F("games_lost") + games_won,
+            **meeting,
+        )
+
+
+def backfill():
+    """Rebuild the whole table from match history; returns the number of rows written"""
+    matches = list(completed_singles().only("match_id", "match_date", "home1", "home2", "away1", "away2", "winner1"))
+    sets = final_sets([match.match_id for match in matches])
+    rows = defaultdict(lambda: HeadToHead(wins=0, losses=0, sets_won=0, sets_lost=0, games_won=0, games_lost=0))
+
+    # Chronological order: the last match seen for a pair is its last meeting
+    for match in matches:
+        winner_id, loser_id = singles_result(match)
+        totals = side_totals(sets.get(match.match_id, []), match.winner1_id == match.home1_id)
+        for player_id, opponent_id, won, (s_won, s_lost, g_won, g_lost) in (
+            (winner_id, loser_id, True, totals),
+            (loser_id, winner_id, False, (totals[1], totals[0], totals[3], totals[2])),
+        ):
+            row = rows[(player_id, opponent_id)]
+            row.player_id, row.opponent_id = player_id, opponent_id
+            row.wins += won
+            row.losses += not won
+            row.sets_won += s_won
+            row.sets_lost += s_lost
+            row.games_won += g_won
+            row.games_lost += g_lost
+            row.last_played = match.match_date or row.last_played
+            row.last_match_id = match.match_id
+
+    with transaction.atomic():
+        HeadToHead.objects.all().delete()
+        HeadToHead.objects.bulk_create(rows.values(), batch_size=500)
+    return len(rows)
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from matches.head_to_head import backfill
+
+
+class Command(BaseCommand):
+    help = "Rebuild the head-to-head table from all decided singles matches."
+
+    def handle(self, *args, **options):
+        rows = backfill()
+        self.stdout.write(f"{rows} head-to-head rows written")
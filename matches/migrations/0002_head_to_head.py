@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0001_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('sets_won', models.IntegerField(default=0)),
+                ('sets_lost', models.IntegerField(default=0)),
+                ('games_won', models.IntegerField(default=0)),
+                ('games_lost', models.IntegerField(default=0)),
+                ('last_played', models.DateTimeField(blank=True, null=True)),
+                ('last_match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='matches.match')),
+                ('opponent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.userprofile')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head', to='users.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['player', '-last_played'], name='matches_hea_player__822ac0_idx')],
+                'unique_together': {('player', 'opponent')},
+            },
+        ),
+    ]
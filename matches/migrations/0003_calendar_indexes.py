@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0008_picture_variants'),
+        ('matches', '0002_head_to_head'),
+        ('users', '0002_picture_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['community_id', 'match_date'], name='matches_mat_communi_2da054_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['home1', 'match_date'], name='matches_mat_home1_i_1474c1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['away1', 'match_date'], name='matches_mat_away1_i_f61fcf_idx'),
+        ),
+    ]
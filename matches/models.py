@@ -19,6 +19,15 @@ class Match(models.Model):
     max_sets = models.IntegerField(default=3)
     match_tiebreak = models.BooleanField(default=False)
     ad = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Date-range reads for the calendars; doubles partners fall back to the plain FK indexes
+        indexes = [
+            models.Index(fields=["community_id", "match_date"]),
+            models.Index(fields=["home1", "match_date"]),
+            models.Index(fields=["away1", "match_date"]),
+        ]
 
     def __str__(self):
         if self.home2:
@@ -52,3 +61,24 @@ class MatchSet(models.Model):
 
     def __str__(self):
         return f"Set {self.set_number} - MatchMoment {self.match_moment.match_moment_id}"
+
+
+class HeadToHead(models.Model):
+    """Record of a player against one opponent; every pair is stored in both orientations"""
+    player = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="head_to_head")
+    opponent = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="+")
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    sets_won = models.IntegerField(default=0)
+    sets_lost = models.IntegerField(default=0)
+    games_won = models.IntegerField(default=0)
+    games_lost = models.IntegerField(default=0)
+    last_played = models.DateTimeField(null=True, blank=True)
+    last_match = models.ForeignKey(Match, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    class Meta:
+        unique_together = ("player", "opponent")
+        indexes = [models.Index(fields=["player", "-last_played"])]
+
+    def __str__(self):
+        return f"{self.player} vs {self.opponent}: {self.wins}-{self.losses}"
@@ -0,0 +1,10 @@
+from django.dispatch import receiver
+
+from . import head_to_head
+from .signals import match_completed
+
+
+@receiver(match_completed)
+def update_head_to_head(sender, match, sets, **kwargs):
+    """Keep the head-to-head table in step with completed matches"""
+    head_to_head.record_match(match, sets)
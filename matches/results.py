@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+from django.db.models import F, Max
+
+from .models import Match, MatchMoment, MatchSet
+
+
+def singles_result(match):
+    """(winner_id, loser_id) of a decided singles match, or None for doubles, byes and unfinished matches"""
+    if match.home2_id or match.away2_id or not match.home1_id or not match.away1_id:
+        return None
+    if match.winner1_id == match.home1_id:
+        return match.home1_id, match.away1_id
+    if match.winner1_id == match.away1_id:
+        return match.away1_id, match.home1_id
+    return None
+
+
+def match_sides(match):
+    """(winner_ids, loser_ids, winner_is_home) of a decided singles or doubles match, or None"""
+    if not match.home1_id or not match.away1_id or match.winner1_id is None:
+        return None
+    home = [player for player in (match.home1_id, match.home2_id) if player]
+    away = [player for player in (match.away1_id, match.away2_id) if player]
+    if match.winner1_id in home:
+        return home, away, True
+    if match.winner1_id in away:
+        return away, home, False
+    return None
+
+
+def side_totals(sets, winner_is_home):
+    """(sets_won, sets_lost, games_won, games_lost) of the winning side, from sets in home orientation"""
+    if not winner_is_home:
+        sets = [(away, home) for home, away in sets]
+    return (
+        sum(1 for won, lost in sets if won > lost),
+        sum(1 for won, lost in sets if lost > won),
+        sum(won for won, _ in sets),
+        sum(lost for _, lost in sets),
+    )
+
+
+def completed_singles():
+    """Decided singles matches in chronological order, undated matches first in creation order"""
+    return (
+        Match.objects.filter(
+            winner1__isnull=False,
+            home1__isnull=False,
+            away1__isnull=False,
+            home2__isnull=True,
+            away2__isnull=True,
+        )
+        .order_by(F("match_date").asc(nulls_first=True), "match_id")
+    )
+
+
+def final_sets(match_ids):
+    """Sets of the latest moment of each match as {match_id: [(home_games, away_games), ...]}, in two queries"""
+    latest = (
+        MatchMoment.objects.filter(match_id__in=match_ids)
+        .values("match_id")
+        .annotate(latest=Max("match_moment_id"))
+        .values_list("latest", flat=True)
+    )
+    sets = defaultdict(list)
+    for match_id, home_games, away_games in (
+        MatchSet.objects.filter(match_moment_id__in=list(latest))
+        .order_by("match_moment__match_id", "set_number")
+        .values_list("match_moment__match_id", "home_games", "away_games")
+    ):
+        sets[match_id].append((home_games, away_games))
+    return sets
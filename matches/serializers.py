@@ -1,7 +1,16 @@
 from rest_framework import serializers
-from .models import Match
+from users.serializers import SimpleUserProfileSerializer
+from .models import Match, HeadToHead
 
 class MatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Match
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class HeadToHeadSerializer(serializers.ModelSerializer):
+    opponent = SimpleUserProfileSerializer(read_only=True)
+
+    class Meta:
+        model = HeadToHead
+        fields = ['player', 'opponent', 'wins', 'losses', 'sets_won', 'sets_lost',
+                  'games_won', 'games_lost', 'last_played', 'last_match']
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent once, inside the transaction that records the winner of a match.
+# Receivers get `match` and `sets`, a list of (home_games, away_games) tuples.
+match_completed = Signal()
@@ -1,11 +1,19 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
 from django.test import TestCase
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from users.models import UserProfile
+from users.models import CalendarToken, UserProfile
 from rest_framework.authtoken.models import Token
-from matches.models import Match, MatchMoment
+from matches.models import Match, MatchMoment, HeadToHead, MatchSet
 from matches.match import TennisMatch,  Tiebreak
+from django.core.management import call_command
+from community.models import Community
+from matches import calendar
+from tournament.lifecycle import process_due
+from tournament.models import Tournament, TournamentPlayer
 
 User = get_user_model()
 
@@ -278,4 +286,189 @@ class MatchAPITests(APITestCase):
         url = f'/api/matches/{self.match.match_id}/start_match/'
         response = self.client.post(url)
         
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class HeadToHeadTests(APITestCase):
+    """Tests for the incremental head-to-head table and its endpoints"""
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(username='h2h'))
+        self.players = [UserProfile.objects.create(user=User.objects.create_user(username=f'rival{i}')) for i in range(3)]
+        self.start = datetime(2025, 5, 1, tzinfo=dt_timezone.utc)
+
+    def _play(self, home, away, winner, days, sets=()):
+        match = Match.objects.create(
+            home1=self.players[home], away1=self.players[away], match_date=self.start + timedelta(days=days)
+        )
+        if sets:
+            moment = MatchMoment.objects.create(
+                match=match, current_game_home='0', current_game_away='0', current_set_home=0,
+                current_set_away=0, match_score_home=0, match_score_away=0,
+            )
+            MatchSet.objects.bulk_create([
+                MatchSet(match_moment=moment, set_number=i, home_games=h, away_games=a)
+                for i, (h, a) in enumerate(sets, start=1)
+            ])
+        self.client.patch(f'/api/matches/{match.match_id}/', {'winner1': self.players[winner].pk}, format='json')
+        return match
+
+    def _records(self):
+        return sorted(
+            HeadToHead.objects.values_list(
+                'player_id', 'opponent_id', 'wins', 'losses', 'sets_won', 'sets_lost',
+                'games_won', 'games_lost', 'last_played', 'last_match_id',
+            )
+        )
+
+    def test_incremental_records_match_backfill(self):
+        self._play(0, 1, 0, 1, sets=[(6, 3), (6, 4)])
+        latest = self._play(1, 0, 1, 10, sets=[(7, 5), (2, 6), (6, 1)])
+        self._play(0, 1, 0, 5)  # recorded late, but not the last meeting
+        self._play(2, 0, 0, 3)
+
+        record = HeadToHead.objects.get(player=self.players[0], opponent=self.players[1])
+        self.assertEqual((record.wins, record.losses), (2, 1))
+        self.assertEqual((record.sets_won, record.sets_lost, record.games_won, record.games_lost), (3, 2, 24, 22))
+        self.assertEqual(record.last_match_id, latest.match_id)
+        mirror = HeadToHead.objects.get(player=self.players[1], opponent=self.players[0])
+        self.assertEqual((mirror.wins, mirror.losses, mirror.games_won), (1, 2, 22))
+
+        incremental = self._records()
+        out = StringIO()
+        call_command('backfill_head_to_head', stdout=out)
+        self.assertIn('4 head-to-head rows', out.getvalue())
+        self.assertEqual(self._records(), incremental)
+
+    def test_endpoints(self):
+        self._play(0, 1, 0, 1)
+        self._play(0, 2, 2, 2)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/matches/head_to_head/', {'player': self.players[0].pk, 'opponent': self.players[1].pk})
+        self.assertEqual((response.data['wins'], response.data['losses']), (1, 0))
+        self.assertEqual(response.data['opponent']['id'], self.players[1].pk)
+
+        response = self.client.get('/api/matches/head_to_head/', {'player': self.players[1].pk, 'opponent': self.players[2].pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['wins'], 0)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/matches/rivalries/', {'player': self.players[0].pk})
+        self.assertEqual([row['opponent']['id'] for row in response.data], [self.players[2].pk, self.players[1].pk])
+
+
+class CalendarTests(APITestCase):
+    def setUp(self):
+        self.community = Community.objects.create(name="Calendar, Club", description="")
+        self.players = [
+            UserProfile.objects.create(user=User.objects.create_user(username=f"cal{i}", first_name=f"Çal{i}", last_name="Player"))
+            for i in range(3)
+        ]
+        self.start = datetime(2026, 5, 4, tzinfo=dt_timezone.utc)
+        self.matches = [
+            Match.objects.create(community_id=self.community, home1=self.players[0], away1=self.players[1], match_date=self.start + timedelta(days=day))
+            for day in (1, 3, 40)
+        ]
+        Match.objects.create(home1=self.players[0], away1=self.players[2], match_date=self.start + timedelta(days=2))
+        self.tournament = Tournament.objects.create(
+            community_id=self.community, name="May Open", type="round_robin", start_date=self.start + timedelta(days=5)
+        )
+        TournamentPlayer.objects.create(tournament=self.tournament, user=self.players[2])
+        self.token = Token.objects.create(user=self.players[0].user)
+        self.client.force_authenticate(self.players[0].user)
+        self.range = {"start": "2026-05-04", "end": "2026-06-01"}
+
+    def test_community_calendar_with_etag(self):
+        url = f"/api/communities/{self.community.pk}/calendar/"
+        response = self.client.get(url, self.range)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(event["type"], event["id"]) for event in response.data["results"]],
+            [("match", self.matches[0].pk), ("match", self.matches[1].pk), ("tournament", self.tournament.pk)],
+        )
+        self.assertEqual(response.data["results"][0]["title"], "Çal0 Player vs Çal1 Player")
+        tag = response["ETag"]
+
+        # get_object and the two fingerprint aggregates; no rows are read
+        with self.assertNumQueries(3):
+            response = self.client.get(url, self.range, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Finishing a match goes through save(update_fields=...), which must still touch updated_at
+        self.client.patch(f"/api/matches/{self.matches[1].pk}/", {"winner1": self.players[0].pk}, format="json")
+        response = self.client.get(url, self.range, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], tag)
+
+        tag = response["ETag"]
+        process_due(self.tournament.start_date + timedelta(days=1))
+        response = self.client.get(url, self.range, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url, {"start": "2026-05-04", "end": "2026-05-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_player_calendar(self):
+        response = self.client.get("/api/matches/calendar/", self.range)
+        self.assertEqual([event["id"] for event in response.data["results"]], [self.matches[0].pk, Match.objects.get(away1=self.players[2]).pk, self.matches[1].pk])
+
+        response = self.client.get("/api/matches/calendar/", {**self.range, "player": self.players[2].pk})
+        self.assertEqual([event["type"] for event in response.data["results"]], ["match", "tournament"])
+
+    def test_ical_feed_streams_with_calendar_token(self):
+        feed_token = CalendarToken.issue(self.players[0].user)
+        self.client.force_authenticate(None)
+        url = f"/api/communities/{self.community.pk}/calendar/ics/"
+        response = self.client.get(url, {**self.range, "token": feed_token.key})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        lines = body.split("\r\n")
+        self.assertEqual(lines[0], "BEGIN:VCALENDAR")
+        self.assertIn("X-WR-CALNAME:Calendar\\, Club", lines)
+        self.assertEqual(body.count("BEGIN:VEVENT"), 3)
+        self.assertIn(f"UID:match-{self.matches[0].pk}@tennis-community-manager", lines)
+        self.assertIn("DTSTART:20260505T000000Z", lines)
+        self.assertTrue(all(len(line.encode()) <= calendar.ICAL_LINE_LIMIT for line in lines))
+
+        response = self.client.get(url, {**self.range, "token": feed_token.key}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(url, self.range).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_calendar_token_only_reads_feeds(self):
+        feed_token = CalendarToken.issue(self.players[0].user)
+        self.client.force_authenticate(None)
+        url = "/api/matches/calendar/ics/"
+        self.assertEqual(self.client.get(url, {**self.range, "token": feed_token.key}).status_code, status.HTTP_200_OK)
+        # The API token is not accepted in the URL, and the feed token works nowhere else
+        self.assertEqual(self.client.get(url, {**self.range, "token": self.token.key}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            self.client.get("/api/matches/calendar/", {**self.range, "token": feed_token.key}).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        self.assertEqual(
+            self.client.get(f"/api/matches/{self.matches[0].pk}/", {"token": feed_token.key}).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+        # Revoking through the API turns the old URL off
+        self.client.force_authenticate(self.players[0].user)
+        self.assertEqual(self.client.delete("/api/users/calendar_token/").status_code, status.HTTP_204_NO_CONTENT)
+        new_key = self.client.get("/api/users/calendar_token/").data["token"]
+        self.assertNotEqual(new_key, feed_token.key)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url, {**self.range, "token": feed_token.key}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get(url, {**self.range, "token": new_key}).status_code, status.HTTP_200_OK)
+
+    def test_etag_changes_when_the_window_moves(self):
+        Match.objects.update(updated_at=self.start)
+        first = (self.start, self.start + timedelta(days=2))
+        second = (self.start + timedelta(days=2), self.start + timedelta(days=4))
+        # One match leaves the window as another enters: same count and latest change
+        tags = [calendar.etag(*calendar.community_events(self.community.pk, *window), *window) for window in (first, second)]
+        self.assertNotEqual(tags[0], tags[1])
+
+    def test_long_lines_are_folded(self):
+        folded = calendar._fold("SUMMARY:" + "é" * 60)
+        self.assertTrue(all(len(part.encode()) <= calendar.ICAL_LINE_LIMIT for part in folded.split("\r\n")))
+        self.assertEqual(folded.replace("\r\n ", "").rstrip("\r\n"), "SUMMARY:" + "é" * 60)
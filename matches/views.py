@@ -3,9 +3,14 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db import transaction
-from matches.models import Match, MatchMoment, MatchSet
-from matches.serializers import MatchSerializer
+from django.db.models import F
+from matches.models import Match, MatchMoment, MatchSet, HeadToHead
+from matches.serializers import MatchSerializer, HeadToHeadSerializer
 from matches.match import TennisMatch, Game, Set, Tiebreak
+from matches.signals import match_completed
+from matches import calendar
+from users.authentication import CalendarTokenAuthentication
+from users.models import UserProfile
 import datetime
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
@@ -99,6 +104,102 @@ class MatchViewSet(viewsets.ModelViewSet):
                 
             return match_moment
 
+    def _final_sets(self, match):
+        """Completed sets of the latest moment as (home_games, away_games) tuples"""
+        latest_moment = self._get_latest_moment(match)
+        if not latest_moment:
+            return []
+        return list(
+            MatchSet.objects.filter(match_moment=latest_moment)
+            .order_by('set_number')
+            .values_list('home_games', 'away_games')
+        )
+
+    def _complete_match(self, match, winner1, winner2, sets):
+        """Record the winners and notify listeners, only the first time the match ends"""
+        if match.winner1_id is not None:
+            return
+        with transaction.atomic():
+            match.winner1 = winner1
+            match.winner2 = winner2
+            match.save(update_fields=['winner1', 'winner2', 'updated_at'])
+            match_completed.send(sender=Match, match=match, sets=sets)
+
+    def perform_update(self, serializer):
+        """Notify listeners when a winner is set through a regular update"""
+        had_winner = serializer.instance.winner1_id is not None
+        with transaction.atomic():
+            match = serializer.save()
+            if not had_winner and match.winner1_id is not None:
+                match_completed.send(sender=Match, match=match, sets=self._final_sets(match))
+
+    @action(detail=False, methods=["get"])
+    def head_to_head(self, request):
+        """Record of `player` against `opponent` (UserProfile ids), read from one unique-key row"""
+        player = request.query_params.get("player")
+        opponent = request.query_params.get("opponent")
+        if not (player and opponent and player.isdigit() and opponent.isdigit()):
+            return Response({"error": "player and opponent are required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        record = (
+            HeadToHead.objects.select_related("opponent__user")
+            .filter(player_id=player, opponent_id=opponent)
+            .first()
+        )
+        if record is None:
+            # Never met: an empty record with the same shape
+            return Response(HeadToHeadSerializer(HeadToHead(player_id=int(player))).data)
+        return Response(HeadToHeadSerializer(record).data)
+
+    @action(detail=False, methods=["get"])
+    def rivalries(self, request):
+        """Every opponent of `player`, most recent meeting first, in one range query"""
+        player = request.query_params.get("player")
+        if not (player and player.isdigit()):
+            return Response({"error": "player is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        records = (
+            HeadToHead.objects.select_related("opponent__user")
+            .filter(player_id=player)
+            .order_by(F("last_played").desc(nulls_last=True), "opponent_id")
+        )
+        return Response(HeadToHeadSerializer(records, many=True).data)
+
+    def _player_calendar(self, request, start, end):
+        """(matches, tournaments) of ?player (a UserProfile id), defaulting to the requesting user"""
+        player = request.query_params.get("player")
+        if player is None:
+            player = UserProfile.objects.filter(user=request.user).values_list("pk", flat=True).first()
+            if player is None:
+                raise calendar.CalendarError("The user has no player profile")
+        try:
+            return calendar.player_events(int(player), start, end)
+        except ValueError:
+            raise calendar.CalendarError("player must be an integer")
+
+    @action(detail=False, methods=["get"])
+    def calendar(self, request):
+        """A player's matches and tournaments between start and end (ISO dates, 31 days by default)"""
+        try:
+            start, end = calendar.date_range(request.query_params)
+            matches, tournaments = self._player_calendar(request, start, end)
+        except calendar.CalendarError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return calendar.calendar_response(request, matches, tournaments, start, end)
+
+    @action(
+        detail=False, methods=["get"], url_path="calendar/ics",
+        authentication_classes=[CalendarTokenAuthentication, TokenAuthentication],
+    )
+    def calendar_ics(self, request):
+        """The player calendar as an iCalendar feed; accepts the calendar token as ?token= for calendar apps"""
+        try:
+            start, end = calendar.feed_range(request.query_params)
+            matches, tournaments = self._player_calendar(request, start, end)
+        except calendar.CalendarError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return calendar.ical_response(request, "Tennis matches", matches, tournaments, start, end)
+
     @action(detail=True, methods=["post"])
     def start_match(self, request, pk=None):
         """Initialize a new match with proper tennis scoring"""
@@ -132,8 +233,8 @@ class MatchViewSet(viewsets.ModelViewSet):
         
         # Update match winner if match is complete
         if tennis_match.match_moment.match_score_h1 > match.max_sets / 2:
-            match.winner1 = match.home1
-            match.save()
+            sets = [(s.home1_score, s.away1_score) for s in tennis_match.match_moment.sets]
+            self._complete_match(match, match.home1, match.home2, sets)
             
         return Response({
             "message": "Point for home player recorded successfully",
@@ -173,8 +274,8 @@ class MatchViewSet(viewsets.ModelViewSet):
         
         # Update match winner if match is complete
         if tennis_match.match_moment.match_score_a1 > match.max_sets / 2:
-            match.winner1 = match.away1
-            match.save()
+            sets = [(s.home1_score, s.away1_score) for s in tennis_match.match_moment.sets]
+            self._complete_match(match, match.away1, match.away2, sets)
             
         return Response({
             "message": "Point for away player recorded successfully",
@@ -0,0 +1,185 @@
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from matches.results import completed_singles, singles_result
+from .glicko import INITIAL_DEVIATION, INITIAL_RATING, inflate, rate_pair
+from .models import PlayerRating, RatingChange
+from .signals import rating_changed
+
+SECONDS_PER_DAY = 86400.0
+
+
+def _scopes(community_id):
+    """
+    Toda partida conta para o rating global e, se tiver comunidade, para o da comunidade.
+    """
+    return [None, community_id] if community_id else [None]
+
+
+def _scope_filter(community_id):
+    scope = Q(community__isnull=True)
+    if community_id:
+        scope |= Q(community_id=community_id)
+    return scope
+
+
+def current_deviation(player_rating, at):
+    """
+    Desvio do jogador no momento da partida, contando o tempo sem jogar.
+    """
+    if player_rating.last_played is None:
+        return player_rating.deviation
+    days = (at - player_rating.last_played).total_seconds() / SECONDS_PER_DAY
+    return float(inflate(player_rating.deviation, days))
+
+
+def rate_match(match):
+    """
+    Atualiza os ratings dos dois jogadores de uma partida simples, global e da
+    comunidade, com um número fixo de consultas. Deve rodar na transação que
+    registra o resultado. Retorna os ratings alterados.
+    """
+    result = singles_result(match)
+    if result is None:
+        return []
+    winner_id, loser_id = result
+    community_id = match.community_id_id
+    played_at = match.match_date or timezone.now()
+
+    with transaction.atomic():
+        ratings = {
+            (rating.player_id, rating.community_id): rating
+            for rating in PlayerRating.objects.select_for_update().filter(
+                _scope_filter(community_id), player_id__in=result
+            )
+        }
+        missing = [
+            PlayerRating(player_id=player_id, community_id=scope)
+            for scope in _scopes(community_id)
+            for player_id in result
+            if (player_id, scope) not in ratings
+        ]
+        for rating in PlayerRating.objects.bulk_create(missing):
+            ratings[(rating.player_id, rating.community_id)] = rating
+
+        changes = []
+        for scope in _scopes(community_id):
+            winner = ratings[(winner_id, scope)]
+            loser = ratings[(loser_id, scope)]
+            (winner.rating, winner.deviation), (loser.rating, loser.deviation) = (
+                tuple(map(float, values))
+                for values in rate_pair(
+                    (winner.rating, current_deviation(winner, played_at)),
+                    (loser.rating, current_deviation(loser, played_at)),
+                )
+            )
+            for rating in (winner, loser):
+                rating.matches += 1
+                rating.last_played = max(rating.last_played or played_at, played_at)
+                changes.append(RatingChange(
+                    player_rating=rating, match=match, rating=rating.rating, deviation=rating.deviation
+                ))
+
+        updated = list(ratings.values())
+        PlayerRating.objects.bulk_update(updated, ["rating", "deviation", "matches", "last_played"])
+        RatingChange.objects.bulk_create(changes)
+        rating_changed.send(sender=PlayerRating, ratings=updated)
+    return updated
+
+
+def conflict_free_batches(winners, losers, size):
+    """
+    Agrupa as partidas em lotes em que nenhum rating aparece duas vezes.
+    Cada partida vai para o lote seguinte ao último que tocou um dos seus
+    jogadores, então a ordem cronológica de cada jogador é preservada.
+    """
+    last_batch = np.full(size, -1, dtype=np.int64)
+    batches = np.empty(len(winners), dtype=np.int64)
+    for i, (winner, loser) in enumerate(zip(winners, losers)):
+        batch = max(last_batch[winner], last_batch[loser]) + 1
+        last_batch[winner] = last_batch[loser] = batch
+        batches[i] = batch
+    return batches
+
+
+def recompute():
+    """
+    Refaz todos os ratings e o histórico repetindo as partidas em ordem
+    cronológica. Cada lote sem conflitos é atualizado com operações vetoriais.
+    Retorna (ratings, partidas processadas).
+    """
+    keys = {}
+    match_ids, winners, losers, days = [], [], [], []
+    for match in completed_singles().only(
+        "match_id", "community_id", "match_date", "home1", "home2", "away1", "away2", "winner1"
+    ):
+        winner_id, loser_id = singles_result(match)
+        day = match.match_date.timestamp() / SECONDS_PER_DAY if match.match_date else np.nan
+        for scope in _scopes(match.community_id_id):
+            match_ids.append(match.match_id)
+            winners.append(keys.setdefault((winner_id, scope), len(keys)))
+            losers.append(keys.setdefault((loser_id, scope), len(keys)))
+            days.append(day)
+
+    size = len(keys)
+    winners = np.asarray(winners, dtype=np.int64)
+    losers = np.asarray(losers, dtype=np.int64)
+    days = np.asarray(days, dtype=np.float64)
+
+    rating = np.full(size, INITIAL_RATING)
+    deviation = np.full(size, INITIAL_DEVIATION)
+    last_day = np.full(size, np.nan)
+    played = np.zeros(size, dtype=np.int64)
+    history = np.empty((len(match_ids), 4))  # rating e desvio do vencedor e do perdedor após a partida
+
+    batches = conflict_free_batches(winners, losers, size)
+    order = np.argsort(batches, kind="stable")
+    bounds = np.searchsorted(batches[order], np.arange(batches.max() + 2 if len(batches) else 1))
+    for start, end in zip(bounds, bounds[1:]):
+        games = order[start:end]
+        w, l, day = winners[games], losers[games], days[games]
+        w_deviation = inflate(deviation[w], np.nan_to_num(day - last_day[w]))
+        l_deviation = inflate(deviation[l], np.nan_to_num(day - last_day[l]))
+        (rating[w], deviation[w]), (rating[l], deviation[l]) = rate_pair(
+            (rating[w], w_deviation), (rating[l], l_deviation)
+        )
+        last_day[w] = np.where(np.isnan(day), last_day[w], day)
+        last_day[l] = np.where(np.isnan(day), last_day[l], day)
+        played[w] += 1
+        played[l] += 1
+        history[games] = np.column_stack([rating[w], deviation[w], rating[l], deviation[l]])
+
+    def last_played(day):
+        return None if np.isnan(day) else datetime.fromtimestamp(day * SECONDS_PER_DAY, tz=dt_timezone.utc)
+
+    with transaction.atomic():
+        RatingChange.objects.all().delete()
+        PlayerRating.objects.all().delete()
+        ratings = PlayerRating.objects.bulk_create(
+            [
+                PlayerRating(
+                    player_id=player_id,
+                    community_id=scope,
+                    rating=float(rating[i]),
+                    deviation=float(deviation[i]),
+                    matches=int(played[i]),
+                    last_played=last_played(last_day[i]),
+                )
+                for (player_id, scope), i in keys.items()
+            ],
+            batch_size=500,
+        )
+        changes = []
+        for i, match_id in enumerate(match_ids):
+            changes.append(RatingChange(
+                player_rating=ratings[winners[i]], match_id=match_id, rating=float(history[i, 0]), deviation=float(history[i, 1])
+            ))
+            changes.append(RatingChange(
+                player_rating=ratings[losers[i]], match_id=match_id, rating=float(history[i, 2]), deviation=float(history[i, 3])
+            ))
+        RatingChange.objects.bulk_create(changes, batch_size=1000)
+        rating_changed.send(sender=PlayerRating, ratings=None)
+    return len(ratings), len(set(match_ids))
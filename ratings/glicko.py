@@ -0,0 +1,53 @@
+import numpy as np
+
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+MIN_DEVIATION = 30.0
+# Um jogador parado volta à incerteza inicial em cerca de um ano
+DEVIATION_GROWTH_PER_DAY = (INITIAL_DEVIATION ** 2 - 50.0 ** 2) / 365.0
+
+Q = np.log(10) / 400.0
+
+
+def inflate(deviation, days):
+    """
+    Aumenta o desvio de acordo com o tempo sem jogar, até o desvio inicial.
+    Aceita escalares ou vetores numpy.
+    """
+    return np.minimum(np.sqrt(deviation ** 2 + DEVIATION_GROWTH_PER_DAY * np.maximum(days, 0)), INITIAL_DEVIATION)
+
+
+def _g(deviation):
+    return 1.0 / np.sqrt(1.0 + 3.0 * Q ** 2 * deviation ** 2 / np.pi ** 2)
+
+
+def expected(rating, opponent_rating, opponent_deviation):
+    """
+    Probabilidade de vitória contra o adversário.
+    """
+    return 1.0 / (1.0 + 10.0 ** (-_g(opponent_deviation) * (rating - opponent_rating) / 400.0))
+
+
+def update(rating, deviation, opponent_rating, opponent_deviation, score):
+    """
+    Novo (rating, desvio) após uma partida (score 1 vitória, 0 derrota) pelo Glicko.
+    Todas as operações são elemento a elemento: com vetores, atualiza um lote
+    de partidas independentes de uma vez.
+    """
+    g = _g(opponent_deviation)
+    e = expected(rating, opponent_rating, opponent_deviation)
+    d2_inverse = Q ** 2 * g ** 2 * e * (1.0 - e)
+    precision = 1.0 / deviation ** 2 + d2_inverse
+    new_rating = rating + Q / precision * g * (score - e)
+    new_deviation = np.maximum(np.sqrt(1.0 / precision), MIN_DEVIATION)
+    return new_rating, new_deviation
+
+
+def rate_pair(winner, loser):
+    """
+    Atualiza os dois lados de uma partida com os valores de antes do jogo.
+    winner e loser são pares (rating, desvio) já inflados pelo tempo parado.
+    """
+    new_winner = update(winner[0], winner[1], loser[0], loser[1], 1.0)
+    new_loser = update(loser[0], loser[1], winner[0], winner[1], 0.0)
+    return new_winner, new_loser
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from ratings.engine import recompute
+
+
+class Command(BaseCommand):
+    help = "Recalcula todos os ratings a partir do histórico de partidas, em ordem cronológica."
+
+    def handle(self, *args, **options):
+        ratings, matches = recompute()
+        self.stdout.write(f"{matches} partidas processadas, {ratings} ratings gravados")
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('community', '0002_alter_communityusers_options_and_more'),
+        ('matches', '0001_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField(default=1500.0)),
+                ('deviation', models.FloatField(default=350.0)),
+                ('matches', models.IntegerField(default=0)),
+                ('last_played', models.DateTimeField(blank=True, null=True)),
+                ('community', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='community.community')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='users.userprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RatingChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField()),
+                ('deviation', models.FloatField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_changes', to='matches.match')),
+                ('player_rating', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='ratings.playerrating')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='playerrating',
+            index=models.Index(fields=['community', '-rating'], name='ratings_pla_communi_4bd7b8_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='playerrating',
+            constraint=models.UniqueConstraint(fields=('player', 'community'), name='unique_community_rating'),
+        ),
+        migrations.AddConstraint(
+            model_name='playerrating',
+            constraint=models.UniqueConstraint(condition=models.Q(('community__isnull', True)), fields=('player',), name='unique_global_rating'),
+        ),
+        migrations.AddIndex(
+            model_name='ratingchange',
+            index=models.Index(fields=['player_rating', '-id'], name='ratings_rat_player__1b595f_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import models
+from community.models import Community
+from matches.models import Match
+from users.models import UserProfile
+
+from .glicko import INITIAL_DEVIATION, INITIAL_RATING
+
+
+class PlayerRating(models.Model):
+    """
+    Rating Glicko de um jogador, global (community nulo) ou dentro de uma comunidade.
+    Atualizado a cada partida; a leitura é sempre uma única linha.
+    """
+    player = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="ratings")
+    community = models.ForeignKey(Community, on_delete=models.CASCADE, null=True, blank=True, related_name="ratings")
+    rating = models.FloatField(default=INITIAL_RATING)
+    deviation = models.FloatField(default=INITIAL_DEVIATION)
+    matches = models.IntegerField(default=0)
+    last_played = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["player", "community"], name="unique_community_rating"),
+            # NULL não conflita em UNIQUE, então o rating global precisa da sua própria restrição
+            models.UniqueConstraint(fields=["player"], condition=models.Q(community__isnull=True), name="unique_global_rating"),
+        ]
+        indexes = [models.Index(fields=["community", "-rating"])]
+
+    def __str__(self):
+        return f"{self.player} - {self.rating:.0f}"
+
+
+class RatingChange(models.Model):
+    """
+    Histórico compacto: o rating e o desvio resultantes de cada partida.
+    A variação é a diferença para a linha anterior do mesmo rating.
+    """
+    player_rating = models.ForeignKey(PlayerRating, on_delete=models.CASCADE, related_name="history")
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name="rating_changes")
+    rating = models.FloatField()
+    deviation = models.FloatField()
+
+    class Meta:
+        indexes = [models.Index(fields=["player_rating", "-id"])]
+
+    def __str__(self):
+        return f"{self.player_rating.player} - {self.rating:.0f} after match {self.match_id}"
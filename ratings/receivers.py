@@ -0,0 +1,11 @@
+from django.dispatch import receiver
+from matches.signals import match_completed
+from .engine import rate_match
+
+
+@receiver(match_completed)
+def update_ratings(sender, match, sets, **kwargs):
+    """
+    Atualiza os ratings dos jogadores na mesma transação que registra o vencedor.
+    """
+    rate_match(match)
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from .models import PlayerRating, RatingChange
+
+
+class PlayerRatingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PlayerRating
+        fields = ['player', 'community', 'rating', 'deviation', 'matches', 'last_played']
+
+
+class RatingChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RatingChange
+        fields = ['match', 'rating', 'deviation']
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Enviado depois que ratings mudam, com `ratings`: os PlayerRating alterados,
+# ou None quando todos foram recalculados (recompute_ratings).
+rating_changed = Signal()
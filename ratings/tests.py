@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from community.models import Community
+from matches.models import Match
+from users.models import UserProfile
+from ratings.engine import conflict_free_batches, rate_match
+from ratings.glicko import INITIAL_DEVIATION, INITIAL_RATING, inflate, rate_pair, update
+from ratings.models import PlayerRating, RatingChange
+
+User = get_user_model()
+
+
+class GlickoTests(TestCase):
+    def test_winner_gains_what_an_equal_loser_loses(self):
+        (winner, winner_deviation), (loser, loser_deviation) = rate_pair((1500, 200), (1500, 200))
+        self.assertGreater(winner, 1500)
+        self.assertAlmostEqual(winner - 1500, 1500 - loser)
+        self.assertLess(winner_deviation, 200)
+
+    def test_vectorized_update_matches_scalar(self):
+        ratings = np.array([1400.0, 1700.0])
+        deviations = np.array([80.0, 300.0])
+        batch = update(ratings, deviations, np.array([1600.0, 1500.0]), np.array([50.0, 120.0]), np.array([1.0, 0.0]))
+        for i in range(2):
+            single = update(ratings[i], deviations[i], [1600.0, 1500.0][i], [50.0, 120.0][i], [1.0, 0.0][i])
+            self.assertAlmostEqual(batch[0][i], single[0])
+            self.assertAlmostEqual(batch[1][i], single[1])
+
+    def test_inactivity_inflates_deviation_up_to_initial(self):
+        self.assertGreater(inflate(60.0, 30), 60.0)
+        self.assertEqual(inflate(60.0, 10_000), INITIAL_DEVIATION)
+
+    def test_conflict_free_batches_keep_player_order(self):
+        batches = conflict_free_batches([0, 2, 0, 1, 3], [1, 3, 2, 3, 0], 4)
+        self.assertEqual(batches.tolist(), [0, 0, 1, 1, 2])
+
+
+class RatingEngineTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(username="scorer"))
+        self.community = Community.objects.create(name="Clube", description="")
+        self.players = [
+            UserProfile.objects.create(user=User.objects.create_user(username=f"rated{i}")) for i in range(4)
+        ]
+        self.start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+    def _match(self, home, away, days, community=True):
+        return Match.objects.create(
+            community_id=self.community if community else None,
+            home1=self.players[home],
+            away1=self.players[away],
+            match_date=self.start + timedelta(days=days),
+        )
+
+    def _finish(self, match, winner):
+        response = self.client.patch(f"/api/matches/{match.match_id}/", {"winner1": self.players[winner].pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _snapshot(self):
+        return {
+            (r.player_id, r.community_id): (round(r.rating, 6), round(r.deviation, 6), r.matches, r.last_played)
+            for r in PlayerRating.objects.all()
+        }
+
+    def test_result_updates_global_and_community_ratings(self):
+        self._finish(self._match(0, 1, 0), 0)
+        self.assertEqual(PlayerRating.objects.count(), 4)
+        winner = PlayerRating.objects.get(player=self.players[0], community=self.community)
+        loser = PlayerRating.objects.get(player=self.players[1], community__isnull=True)
+        self.assertGreater(winner.rating, INITIAL_RATING)
+        self.assertLess(loser.rating, INITIAL_RATING)
+        self.assertEqual(RatingChange.objects.count(), 4)
+
+        # Já com os ratings criados, a atualização tem número fixo de consultas
+        match = self._match(1, 0, 3)
+        match.winner1 = self.players[1]
+        with self.assertNumQueries(5):
+            rate_match(match)
+
+    def test_doubles_are_not_rated(self):
+        match = self._match(0, 1, 0)
+        match.home2 = self.players[2]
+        match.away2 = self.players[3]
+        match.save()
+        self._finish(match, 0)
+        self.assertFalse(PlayerRating.objects.exists())
+
+    def test_recompute_matches_incremental_updates(self):
+        results = [(0, 1, 0, 0), (2, 3, 0, 3), (0, 2, 5, 2), (1, 3, 9, 1), (0, 3, 40, 0), (1, 2, 41, 2)]
+        for home, away, days, winner in results:
+            self._finish(self._match(home, away, days, community=days < 40), winner)
+        incremental = self._snapshot()
+
+        out = StringIO()
+        call_command("recompute_ratings", stdout=out)
+        self.assertIn("6 partidas", out.getvalue())
+        self.assertEqual(self._snapshot(), incremental)
+        self.assertEqual(RatingChange.objects.count(), 20)
+
+    def test_read_endpoints(self):
+        self._finish(self._match(0, 1, 0), 0)
+        url = f"/api/ratings/{self.players[0].pk}/"
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["community"])
+        self.assertEqual(response.data["matches"], 1)
+
+        response = self.client.get(url, {"community": self.community.pk})
+        self.assertEqual(response.data["community"], self.community.pk)
+        response = self.client.get(f"{url}history/", {"community": self.community.pk})
+        self.assertEqual(len(response.data), 1)
+        response = self.client.get(f"/api/ratings/{self.players[2].pk}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url, {"community": "clube"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(f"{url}history/", {"community": "clube"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,9 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import RatingViewSet
+router = DefaultRouter()
+router.register(r'ratings', RatingViewSet, basename='rating')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
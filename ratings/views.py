@@ -0,0 +1,52 @@
+from rest_framework import viewsets, status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import PlayerRating, RatingChange
+from .serializers import PlayerRatingSerializer, RatingChangeSerializer
+
+HISTORY_LIMIT = 50
+
+
+class RatingViewSet(viewsets.ViewSet):
+    """
+    Ratings por jogador (id de UserProfile). Sem o parâmetro community, retorna o rating global.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def _scope(self, request):
+        """
+        Filtro da comunidade pedida; levanta ValueError se community não for inteiro.
+        """
+        community = request.query_params.get("community")
+        return {"community_id": int(community)} if community else {"community__isnull": True}
+
+    def retrieve(self, request, pk=None):
+        """
+        Rating atual do jogador: uma única linha, pela restrição única (jogador, comunidade).
+        """
+        try:
+            scope = self._scope(request)
+        except ValueError:
+            return Response({"error": "community deve ser inteiro"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rating = PlayerRating.objects.get(player_id=pk, **scope)
+        except (PlayerRating.DoesNotExist, ValueError):
+            return Response({"error": "Jogador ainda não tem rating"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(PlayerRatingSerializer(rating).data)
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, pk=None):
+        """
+        Ratings após cada uma das últimas partidas do jogador, da mais recente para a mais antiga.
+        """
+        try:
+            changes = RatingChange.objects.filter(
+                **{f"player_rating__{key}": value for key, value in self._scope(request).items()},
+                player_rating__player_id=pk,
+            ).order_by("-id")[:HISTORY_LIMIT]
+            return Response(RatingChangeSerializer(changes, many=True).data)
+        except ValueError:
+            return Response({"error": "Parâmetros inválidos"}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,143 @@
+import re
+import unicodedata
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, Q
+from community.models import Community
+from tournament.models import Tournament
+from .models import SearchToken
+
+FTS_TABLE = "search_document"
+TOKEN_MAX_LENGTH = 64
+PREFIX_END = "￿"
+
+# Tipo de documento -> (modelo, campos indexados)
+INDEXED = {
+    "community": (Community, ("name", "description")),
+    "user": (get_user_model(), ("first_name", "last_name", "username")),
+    "tournament": (Tournament, ("name",)),
+}
+KINDS = tuple(INDEXED)
+
+_fts = {}
+
+
+def normalize(text):
+    """
+    Minúsculas e sem acentos: "São Gonçalves" -> "sao goncalves".
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text):
+    return [token[:TOKEN_MAX_LENGTH] for token in re.findall(r"\w+", normalize(text or ""))]
+
+
+def fts_enabled():
+    """
+    Se a tabela FTS5 existe neste banco; criada pela migração apenas no SQLite com FTS5.
+    """
+    name = connection.settings_dict["NAME"]
+    if name not in _fts:
+        _fts[name] = connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names()
+    return _fts[name]
+
+
+def document_text(kind, obj):
+    return " ".join(filter(None, (getattr(obj, field) for field in INDEXED[kind][1])))
+
+
+def _rowid(kind, object_id):
+    # Rowid determinístico, para remover um documento sem varrer a tabela FTS
+    return object_id * len(KINDS) + KINDS.index(kind)
+
+
+def remove_object(kind, object_id):
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [_rowid(kind, object_id)])
+    else:
+        SearchToken.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def index_objects(kind, objects):
+    """
+    Grava os documentos no índice, substituindo versões anteriores.
+    """
+    objects = list(objects)
+    if not objects:
+        return
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, kind, object_id, body) VALUES (%s, %s, %s, %s)",
+                [(_rowid(kind, obj.pk), kind, obj.pk, document_text(kind, obj)) for obj in objects],
+            )
+    else:
+        SearchToken.objects.filter(kind=kind, object_id__in=[obj.pk for obj in objects]).delete()
+        SearchToken.objects.bulk_create(
+            [
+                SearchToken(kind=kind, object_id=obj.pk, token=token)
+                for obj in objects
+                for token in set(tokenize(document_text(kind, obj)))
+            ],
+            batch_size=500,
+        )
+
+
+def index_object(kind, obj):
+    index_objects(kind, [obj])
+
+
+def rebuild():
+    """
+    Refaz o índice inteiro a partir das tabelas. Retorna o número de documentos.
+    """
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    else:
+        SearchToken.objects.all().delete()
+    total = 0
+    for kind, (model, fields) in INDEXED.items():
+        objects = list(model.objects.only("pk", *fields))
+        index_objects(kind, objects)
+        total += len(objects)
+    return total
+
+
+def search(query, kinds=KINDS, limit=20):
+    """
+    Documentos que contêm todos os termos da busca, sem diferenciar acentos.
+    O último termo vale como prefixo, para autocompletar enquanto se digita.
+    Retorna [(tipo, id)] do mais para o menos relevante.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return []
+    exact, prefix = tokens[:-1], tokens[-1]
+
+    if fts_enabled():
+        expression = " ".join([f'"{token}"' for token in exact] + [f'"{prefix}"*'])
+        placeholders = ", ".join(["%s"] * len(kinds))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT kind, object_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND kind IN ({placeholders}) "
+                f"ORDER BY bm25({FTS_TABLE}) LIMIT %s",
+                [expression, *kinds, limit],
+            )
+            return [(kind, int(object_id)) for kind, object_id in cursor.fetchall()]
+
+    prefix_match = Q(token__gte=prefix, token__lt=prefix + PREFIX_END)
+    rows = (
+        SearchToken.objects.filter(Q(token__in=exact) | prefix_match, kind__in=kinds)
+        .values("kind", "object_id")
+        .annotate(prefixed=Count("pk", filter=prefix_match))
+        .filter(prefixed__gt=0)
+    )
+    if exact:
+        rows = rows.annotate(exact=Count("token", filter=Q(token__in=exact), distinct=True)).filter(exact=len(exact))
+    rows = rows.order_by("-prefixed", "kind", "object_id")[:limit]
+    return [(row["kind"], row["object_id"]) for row in rows]
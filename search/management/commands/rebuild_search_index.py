@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from search.index import rebuild
+
+
+class Command(BaseCommand):
+    help = "Refaz o índice de busca de comunidades, usuários e torneios."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild()
+        self.stdout.write(f"{total} documentos indexados")
@@ -0,0 +1,62 @@
+from django.db import migrations, models
+
+FTS_TABLE = "search_document"
+
+
+def create_fts_table(apps, schema_editor):
+    """
+    Cria a tabela FTS5 quando o banco é SQLite compilado com FTS5; nos
+    demais casos a busca usa a tabela SearchToken.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "kind UNINDEXED, object_id UNINDEXED, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("community", "0003_community_standing"),
+        ("tournament", "0007_lifecycle"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchToken",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("community", "Community"), ("user", "User"), ("tournament", "Tournament")],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("token", models.CharField(max_length=64)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["token", "kind"], name="search_sear_token_538ffc_idx"),
+                    models.Index(fields=["kind", "object_id"], name="search_sear_kind_83cbbe_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class SearchToken(models.Model):
+    """
+    Índice invertido para bancos sem FTS5: uma linha por token normalizado
+    (minúsculo, sem acentos) de cada documento indexado.
+    """
+    KIND_CHOICES = [
+        ("community", "Community"),
+        ("user", "User"),
+        ("tournament", "Tournament"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            # Busca exata e por faixa de prefixo (token >= p AND token < p + '￿')
+            models.Index(fields=["token", "kind"]),
+            # Remoção dos tokens de um documento ao reindexá-lo
+            models.Index(fields=["kind", "object_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.token}"
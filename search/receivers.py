@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from community.models import Community
+from tournament.models import Tournament
+from . import index
+
+User = get_user_model()
+
+KIND_BY_MODEL = {model: kind for kind, (model, _) in index.INDEXED.items()}
+
+
+@receiver(post_save, sender=Community)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Tournament)
+def update_document(sender, instance, update_fields=None, **kwargs):
+    """
+    Reindexa o documento na mesma transação que o salvou, exceto quando nenhum
+    campo indexado mudou (por exemplo, o last_login gravado a cada login).
+    """
+    kind = KIND_BY_MODEL[sender]
+    if update_fields is not None and not set(update_fields) & set(index.INDEXED[kind][1]):
+        return
+    index.index_object(kind, instance)
+
+
+@receiver(post_delete, sender=Community)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Tournament)
+def remove_document(sender, instance, **kwargs):
+    index.remove_object(KIND_BY_MODEL[sender], instance.pk)
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from community.models import Community
+from tournament.models import Tournament
+from search import index
+
+User = get_user_model()
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.sao_paulo = Community.objects.create(name="Tênis São Paulo", description="Clube da zona sul")
+        self.rio = Community.objects.create(name="Rio Open Club", description="Quadras de saibro")
+        self.goncalves = User.objects.create_user(username="jgoncalves", first_name="João", last_name="Gonçalves")
+        self.gomes = User.objects.create_user(username="mgomes", first_name="Maria", last_name="Gomes")
+        self.tournament = Tournament.objects.create(name="Copa São João", type="single_elimination")
+        self.client.force_authenticate(self.gomes)
+
+    def _search(self, query, **params):
+        response = self.client.get("/api/search/", {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row["kind"], row["id"]) for row in response.data["results"]]
+
+    def _check_matching(self):
+        self.assertEqual(self._search("sao paulo"), [("community", self.sao_paulo.pk)])
+        self.assertEqual(self._search("GONCALVES"), [("user", self.goncalves.pk)])
+        self.assertEqual(sorted(self._search("go", kind="user")), [("user", self.goncalves.pk), ("user", self.gomes.pk)])
+        self.assertEqual(self._search("joão gon"), [("user", self.goncalves.pk)])
+        self.assertEqual(self._search("copa jo", kind="tournament"), [("tournament", self.tournament.pk)])
+        self.assertEqual(self._search("saibro"), [("community", self.rio.pk)])
+        self.assertEqual(self._search(""), [])
+
+    def test_accent_insensitive_prefix_search(self):
+        self.assertTrue(index.fts_enabled())
+        self._check_matching()
+        response = self.client.get("/api/search/", {"q": "rio"})
+        self.assertEqual(response.data["results"][0]["object"]["name"], "Rio Open Club")
+
+    def test_fallback_token_index(self):
+        with mock.patch("search.index.fts_enabled", return_value=False):
+            self.assertEqual(index.rebuild(), 5)
+            self._check_matching()
+
+    def test_index_follows_saves_and_deletes(self):
+        self.rio.name = "Niterói Tênis"
+        self.rio.save()
+        self.assertEqual(self._search("rio open"), [])
+        self.assertEqual(self._search("niteroi"), [("community", self.rio.pk)])
+
+        self.gomes.last_name = "Souza"
+        self.gomes.save(update_fields=["last_login"])
+        self.assertEqual(self._search("gomes", kind="user"), [("user", self.gomes.pk)])
+
+        self.tournament.delete()
+        self.assertEqual(self._search("copa"), [])
+
+    def test_rejects_unknown_kind(self):
+        response = self.client.get("/api/search/", {"q": "rio", "kind": "court"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication_and_hides_email(self):
+        self.goncalves.email = "joao@example.com"
+        self.goncalves.save()
+        response = self.client.get("/api/search/", {"q": "goncalves"})
+        self.assertNotIn("email", response.data["results"][0]["object"])
+
+        self.client.force_authenticate(None)
+        response = self.client.get("/api/search/", {"q": "goncalves"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from rest_framework import viewsets, status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from community.models import Community
+from community.serializers import CommunitySerializer
+from tournament.models import Tournament
+from tournament.serializers import TournamentSerializer
+from users.serializers import PublicUserSerializer
+from .index import KINDS, search
+
+User = get_user_model()
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+SERIALIZERS = {
+    "community": (Community, CommunitySerializer),
+    "user": (User, PublicUserSerializer),
+    "tournament": (Tournament, TournamentSerializer),
+}
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    Busca por comunidades, usuários e torneios.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        """
+        Parâmetros: q (termos; o último vale como prefixo), kind (lista separada por
+        vírgulas de community, user e tournament) e limit.
+        Uma consulta no índice e uma por tipo encontrado.
+        """
+        query = request.query_params.get("q", "")
+        kinds = [kind for kind in request.query_params.get("kind", ",".join(KINDS)).split(",") if kind]
+        if not kinds or any(kind not in KINDS for kind in kinds):
+            return Response({"error": f"kind deve estar entre {', '.join(KINDS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(min(int(request.query_params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT), 1)
+        except ValueError:
+            return Response({"error": "limit deve ser inteiro"}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits = search(query, kinds, limit)
+        found = {}
+        for kind in {kind for kind, _ in hits}:
+            model, serializer_class = SERIALIZERS[kind]
+            objects = model.objects.in_bulk([object_id for hit_kind, object_id in hits if hit_kind == kind])
+            found[kind] = {
+                obj.pk: data
+                for obj, data in zip(
+                    objects.values(),
+                    serializer_class(list(objects.values()), many=True, context={"request": request}).data,
+                )
+            }
+
+        # Documentos apagados entre a busca e a leitura ficam de fora
+        return Response({
+            "results": [
+                {"kind": kind, "id": object_id, "object": found[kind][object_id]}
+                for kind, object_id in hits
+                if object_id in found[kind]
+            ]
+        })
@@ -0,0 +1,120 @@
+import hashlib
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.db import transaction
+from community.counters import adjust
+from matches.models import Match
+from .models import TournamentMatch
+from .seeding import bracket_size, assign_missing_seeds, place_players, persist_seeds
+
+PREVIEW_TIMEOUT = 15 * 60
+
+
+def entries_digest(players):
+    """
+    Hash da lista de inscritos e seeds; muda sempre que a chave mudaria.
+    """
+    entries = sorted((player.user_id, player.seed or 0) for player in players)
+    return hashlib.sha1(repr(entries).encode()).hexdigest()
+
+
+def _preview_key(tournament, digest):
+    return f"bracket_preview:{tournament.pk}:{digest}"
+
+
+def plan_bracket(players):
+    """
+    Monta a chave de eliminação inteiramente em memória, sem escrever no banco
+    nem alterar os objetos recebidos; os seeds faltantes são sorteados em cópias.
+    Retorna um dicionário serializável com os seeds e as rodadas; cada partida
+    é [mandante, visitante, vencedor] com ids de UserProfile.
+    """
+    digest = entries_digest(players)
+    size = bracket_size(len(players))
+    players = [SimpleNamespace(user_id=player.user_id, seed=player.seed) for player in players]
+    assign_missing_seeds(players)
+    slots = [player.user_id if player else None for player in place_players(players, size)]
+
+    first_round = []
+    for home, away in zip(slots[::2], slots[1::2]):
+        bye = home if away is None else away if home is None else None
+        first_round.append([home, away, bye])
+    # Jogadores com bye já entram na segunda rodada
+    rounds = [first_round]
+    while len(rounds[-1]) > 1:
+        previous = rounds[-1]
+        if len(rounds) == 1:
+            rounds.append([[m1[2], m2[2], None] for m1, m2 in zip(previous[::2], previous[1::2])])
+        else:
+            rounds.append([[None, None, None] for _ in range(len(previous) // 2)])
+
+    return {
+        "digest": digest,
+        "size": size,
+        "seeds": {player.user_id: player.seed for player in players},
+        "rounds": rounds,
+    }
+
+
+def preview_bracket(tournament, players):
+    """
+    Retorna a chave proposta, reaproveitando a prévia em cache para os mesmos inscritos e seeds.
+    """
+    key = _preview_key(tournament, entries_digest(players))
+    plan = cache.get(key)
+    if plan is None:
+        plan = plan_bracket(players)
+        cache.set(key, plan, PREVIEW_TIMEOUT)
+    return plan
+
+
+def persist_bracket(tournament, players, plan):
+    """
+    Grava uma chave planejada: seeds sorteados, partidas e ligações next_match
+    com um bulk_create por tabela e um bulk_update.
+    """
+    changed = []
+    for player in players:
+        seed = plan["seeds"].get(player.user_id)
+        if player.seed != seed:
+            player.seed = seed
+            changed.append(player)
+
+    with transaction.atomic():
+        persist_seeds(changed)
+        matches = Match.objects.bulk_create([
+            Match(community_id=tournament.community_id, home1_id=home, away1_id=away, winner1_id=winner)
+            for matches_in_round in plan["rounds"]
+            for home, away, winner in matches_in_round
+        ])
+        # bulk_create não dispara post_save, que mantém o contador da comunidade
+        adjust(tournament.community_id_id, "match_count", len(matches))
+        matches = iter(matches)
+        tournament_matches = [
+            [
+                TournamentMatch(match=next(matches), tournament=tournament, round=round_number, match_number=match_number)
+                for match_number in range(1, len(matches_in_round) + 1)
+            ]
+            for round_number, matches_in_round in enumerate(plan["rounds"], start=1)
+        ]
+        TournamentMatch.objects.bulk_create([tm for round_matches in tournament_matches for tm in round_matches])
+
+        # Conectar partidas: as partidas 2k-1 e 2k alimentam a partida k da rodada seguinte
+        linked = []
+        for current_round, next_round in zip(tournament_matches, tournament_matches[1:]):
+            for index, tournament_match in enumerate(current_round):
+                tournament_match.next_match = next_round[index // 2]
+                linked.append(tournament_match)
+        TournamentMatch.objects.bulk_update(linked, ["next_match"])
+
+    cache.delete(_preview_key(tournament, plan["digest"]))
+    return tournament_matches
+
+
+def build_bracket(tournament, players):
+    """
+    Gera e grava a chave, reaproveitando a prévia em cache quando existir.
+    """
+    plan = cache.get(_preview_key(tournament, entries_digest(players))) or plan_bracket(players)
+    return persist_bracket(tournament, players, plan)
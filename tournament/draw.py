@@ -0,0 +1,74 @@
+from django.db import transaction
+from matches.models import Match
+from .models import TournamentMatch, TournamentPlayer, TournamentStanding
+from .bracket import build_bracket
+from .pairing import round_robin_rounds, swiss_pairings, create_round_matches
+from .standings import create_standings, record_bye
+
+
+class DrawError(Exception):
+    pass
+
+
+def generate_round_robin(tournament, player_ids):
+    """
+    Gera a tabela completa de um torneio de pontos corridos.
+    """
+    with transaction.atomic():
+        create_standings(tournament, player_ids)
+        create_round_matches(tournament, round_robin_rounds(player_ids))
+    return "Tabela gerada com sucesso"
+
+
+def pair_swiss_round(tournament, round_number):
+    """
+    Emparelha uma rodada do suíço a partir da classificação atual.
+    """
+    seeds = dict(TournamentPlayer.objects.filter(tournament=tournament).values_list("user_id", "seed"))
+    standings = list(TournamentStanding.objects.filter(tournament=tournament))
+    standings.sort(key=lambda s: (-s.points, -s.buchholz, seeds.get(s.player_id) or float("inf"), s.player_id))
+
+    played = set()
+    had_bye = set()
+    for home, away in Match.objects.filter(tournament_match__tournament=tournament).values_list("home1_id", "away1_id"):
+        if away is None:
+            had_bye.add(home)
+        else:
+            played.add(frozenset((home, away)))
+
+    ranked = [standing.player_id for standing in standings]
+    points = {standing.player_id: standing.points for standing in standings}
+    pairs, bye = swiss_pairings(ranked, points, played, had_bye)
+    if bye is not None:
+        pairs.append((bye, None))
+
+    with transaction.atomic():
+        create_round_matches(tournament, [pairs], first_round=round_number)
+        if bye is not None:
+            record_bye(tournament, bye)
+    return f"Rodada {round_number} gerada com sucesso"
+
+
+def generate_draw(tournament):
+    """
+    Gera as partidas do torneio de acordo com o seu tipo: eliminação gera a
+    chave, pontos corridos a tabela completa e suíço a primeira rodada.
+    Levanta DrawError se não houver jogadores suficientes ou se já houver partidas.
+    """
+    players = list(TournamentPlayer.objects.filter(tournament=tournament).exclude(status="waitlisted"))
+
+    if len(players) < 2:
+        raise DrawError("Pelo menos 2 jogadores são necessários")
+
+    if TournamentMatch.objects.filter(tournament=tournament).exists():
+        raise DrawError("As partidas do torneio já foram geradas")
+
+    if tournament.type == "round_robin":
+        return generate_round_robin(tournament, [player.user_id for player in players])
+    if tournament.type == "swiss":
+        with transaction.atomic():
+            create_standings(tournament, [player.user_id for player in players])
+            return pair_swiss_round(tournament, 1)
+
+    build_bracket(tournament, players)
+    return "Bracket gerado com sucesso"
@@ -0,0 +1,185 @@
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Q
+from ratings.models import PlayerRating
+
+from .models import TournamentMatch, TournamentPlayer
+
+DEFAULT_SIMULATIONS = 100_000
+MAX_SIMULATIONS = 1_000_000
+BATCH_SIZE = 25_000
+CACHE_TIMEOUT = 24 * 60 * 60
+MAX_WORKERS = min(4, os.cpu_count() or 1)  # Teto de processos por previsão, qualquer que seja o pedido
+
+# Marcadores usados nos vetores de partidas
+EMPTY = -1      # lado vazio (bye) ou partida decidida sem vencedor
+UNDECIDED = -2  # partida ainda não disputada
+
+
+def seed_rating(seed, size):
+    """
+    Força estimada a partir do seed, para jogadores ainda sem rating: o seed 1
+    vale 1500 e cada vez que o seed dobra a força cai 100 pontos.
+    Jogadores sem seed ficam no fim da chave.
+    """
+    return 1500.0 - 100.0 * math.log2(seed or size)
+
+
+class BracketState:
+    """
+    Retrato da chave em vetores: primeira rodada, resultados já decididos e forças.
+    """
+
+    def __init__(self, players, slots, forced, ratings):
+        self.players = players
+        self.slots = np.asarray(slots, dtype=np.int32)
+        self.forced = [np.asarray(round_forced, dtype=np.int32) for round_forced in forced]
+        self.ratings = np.asarray(ratings, dtype=np.float64)
+
+    @classmethod
+    def load(cls, tournament):
+        """
+        Monta o estado com três consultas: inscritos, partidas da chave e ratings.
+        Usa o rating da comunidade do torneio, depois o global e por fim o seed.
+        """
+        entries = list(
+            TournamentPlayer.objects.filter(tournament=tournament).select_related("user__user").order_by("user_id")
+        )
+        tournament_matches = list(
+            TournamentMatch.objects.filter(tournament=tournament)
+            .select_related("match")
+            .order_by("round", "match_number")
+        )
+
+        index = {entry.user_id: i for i, entry in enumerate(entries)}
+        size = 2 * sum(1 for tm in tournament_matches if tm.round == 1)
+
+        def position(user_id):
+            # Jogadores removidos da inscrição contam como lado vazio
+            return index.get(user_id, EMPTY)
+
+        slots = []
+        forced = []
+        for tm in tournament_matches:
+            if tm.round == 1:
+                slots += [position(tm.match.home1_id), position(tm.match.away1_id)]
+            while len(forced) < tm.round:
+                forced.append([])
+            if tm.match.winner1_id is not None:
+                forced[tm.round - 1].append(position(tm.match.winner1_id))
+            elif tm.walkover:
+                forced[tm.round - 1].append(EMPTY)
+            else:
+                forced[tm.round - 1].append(UNDECIDED)
+
+        scope = Q(community__isnull=True)
+        if tournament.community_id_id:
+            scope |= Q(community_id=tournament.community_id_id)
+        rated = {}
+        # O rating da comunidade, se existir, sobrescreve o global
+        for player_id, community_id, rating in (
+            PlayerRating.objects.filter(scope, player_id__in=index)
+            .values_list("player_id", "community_id", "rating")
+        ):
+            if community_id is not None or player_id not in rated:
+                rated[player_id] = rating
+
+        ratings = [rated.get(entry.user_id, seed_rating(entry.seed, size)) for entry in entries]
+        return cls(entries, slots, forced, ratings)
+
+    def digest(self, simulations):
+        """
+        Muda sempre que um resultado, inscrito ou força muda.
+        """
+        content = hashlib.sha1()
+        content.update(self.slots.tobytes())
+        for round_forced in self.forced:
+            content.update(round_forced.tobytes())
+        content.update(self.ratings.tobytes())
+        content.update(str(simulations).encode())
+        return content.hexdigest()
+
+
+def simulate(state, simulations, seed=None):
+    """
+    Simula a chave restante em lotes vetorizados.
+    Retorna uma matriz (rodadas + 1, jogadores) com quantas vezes cada jogador
+    chegou a cada rodada; a linha r - 1 é a rodada r e a última conta os títulos.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(state.ratings)
+    # Força no formato 10^(r/400); a posição extra atende índices vazios (-1)
+    strength = np.append(10.0 ** (state.ratings / 400.0), 1.0)
+    counts = np.zeros((len(state.forced) + 1, n + 1), dtype=np.int64)
+
+    done = 0
+    while done < simulations:
+        batch = min(BATCH_SIZE, simulations - done)
+        current = np.broadcast_to(state.slots, (batch, state.slots.size))
+        counts[0] += batch * np.bincount(state.slots + 1, minlength=n + 1)
+
+        for round_index, forced in enumerate(state.forced):
+            home = current[:, 0::2]
+            away = current[:, 1::2]
+            home_strength = strength[home]
+            home_wins = rng.random(home.shape) * (home_strength + strength[away]) < home_strength
+            winners = np.where(home_wins, home, away)
+            winners = np.where(home == EMPTY, away, np.where(away == EMPTY, home, winners))
+            winners = np.where(forced == UNDECIDED, winners, forced)
+            counts[round_index + 1] += np.bincount(winners.ravel() + 1, minlength=n + 1)
+            current = winners
+
+        done += batch
+    return counts[:, 1:]
+
+
+def run_forecast(state, simulations, workers=1):
+    """
+    Executa as simulações, opcionalmente divididas entre processos.
+    """
+    workers = max(min(workers, MAX_WORKERS), 1)
+    if workers <= 1:
+        return simulate(state, simulations)
+
+    shares = [simulations // workers + (1 if i < simulations % workers else 0) for i in range(workers)]
+    seeds = np.random.SeedSequence().spawn(workers)
+    # Os processos recebem só os vetores, sem os objetos do Django
+    vectors = BracketState([], state.slots, state.forced, state.ratings)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(simulate, [vectors] * workers, shares, seeds)
+        return sum(results)
+
+
+def tournament_forecast(tournament, simulations=DEFAULT_SIMULATIONS, workers=1):
+    """
+    Probabilidade de cada jogador chegar a cada rodada e de ser campeão.
+    O resultado fica em cache até que algum resultado da chave mude.
+    """
+    state = BracketState.load(tournament)
+    key = f"tournament_forecast:{tournament.pk}:{state.digest(simulations)}"
+    forecast = cache.get(key)
+    if forecast is not None:
+        return forecast
+
+    counts = run_forecast(state, simulations, workers) / simulations
+    players = []
+    for i, entry in enumerate(state.players):
+        if not counts[0, i]:
+            continue
+        players.append({
+            "id": entry.user_id,
+            "name": str(entry.user),
+            "seed": entry.seed,
+            "reach": [round(float(p), 4) for p in counts[:-1, i]],
+            "win": round(float(counts[-1, i]), 4),
+        })
+    players.sort(key=lambda player: player["win"], reverse=True)
+
+    forecast = {"simulations": simulations, "rounds": len(state.forced), "players": players}
+    cache.set(key, forecast, CACHE_TIMEOUT)
+    return forecast
@@ -0,0 +1,69 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Tournament
+from .draw import DrawError, generate_draw
+
+logger = logging.getLogger(__name__)
+
+
+def due_tournaments(now):
+    """
+    Torneios que cruzaram alguma fronteira do ciclo de vida: fim das inscrições,
+    início ou fim. Uma consulta, cada ramo coberto por um dos índices do modelo.
+    """
+    return Tournament.objects.filter(
+        Q(registration_open=True, subscription_until__lte=now)
+        | Q(started=False, finished=False, start_date__lte=now)
+        | Q(finished=False, end_date__lte=now)
+    )
+
+
+def process_due(now=None):
+    """
+    Aplica as transições pendentes em lote: encerra inscrições, inicia torneios
+    (gerando as partidas dos que têm auto_generate) e finaliza os encerrados.
+    Um torneio que nunca começou e já passou do end_date não é iniciado nem ganha
+    partidas: só é finalizado e contado em "expired", e o aviso vai para o log.
+
+    Idempotente: cada update só altera linhas que ainda não mudaram, e as linhas
+    travadas por outro worker são puladas (skip_locked) em vez de processadas duas vezes.
+    Retorna quantos torneios passaram por cada transição.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = list(due_tournaments(now).select_for_update(skip_locked=True))
+
+        # Qualquer fronteira cruzada encerra as inscrições
+        closing = [t.pk for t in due if t.registration_open]
+        finishing = [t for t in due if not t.finished and t.end_date and t.end_date <= now]
+        # Já passou do fim sem ter começado: só finaliza, sem iniciar nem sortear
+        expired = [t for t in finishing if not t.started]
+        starting = [
+            t for t in due
+            if not t.started and not t.finished and t.start_date and t.start_date <= now
+            and not (t.end_date and t.end_date <= now)
+        ]
+
+        summary = {
+            "closed": Tournament.objects.filter(pk__in=closing, registration_open=True).update(registration_open=False, updated_at=now),
+            "started": Tournament.objects.filter(pk__in=[t.pk for t in starting], started=False).update(started=True, updated_at=now),
+            "generated": 0,
+            "finished": Tournament.objects.filter(pk__in=[t.pk for t in finishing], finished=False).update(finished=True, updated_at=now),
+            "expired": len(expired),
+        }
+        for tournament in expired:
+            logger.warning("Torneio %s passou do fim sem ter começado; finalizado sem gerar partidas", tournament.pk)
+
+        for tournament in starting:
+            if not tournament.auto_generate:
+                continue
+            try:
+                with transaction.atomic():
+                    generate_draw(tournament)
+                summary["generated"] += 1
+            except DrawError as e:
+                logger.info("Partidas do torneio %s não geradas: %s", tournament.pk, e)
+    return summary
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from tournament.lifecycle import process_due
+
+
+class Command(BaseCommand):
+    help = "Aplica as transições de ciclo de vida dos torneios (inscrições, início e fim)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Repete a cada N segundos em vez de executar uma única vez.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            summary = process_due()
+            self.stdout.write(
+                "Inscrições encerradas: {closed}, iniciados: {started}, "
+                "partidas geradas: {generated}, finalizados: {finished} (sem ter começado: {expired})".format(**summary)
+            )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
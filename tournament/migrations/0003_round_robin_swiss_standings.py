@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0002_tournament_end_date_tournament_max_players_and_more'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tournament',
+            name='type',
+            field=models.CharField(choices=[('single_elimination', 'Single Elimination'), ('double_elimination', 'Double Elimination'), ('round_robin', 'Round Robin'), ('swiss', 'Swiss')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='TournamentStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('byes', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('buchholz', models.IntegerField(default=0)),
+                ('sets_won', models.IntegerField(default=0)),
+                ('sets_lost', models.IntegerField(default=0)),
+                ('games_won', models.IntegerField(default=0)),
+                ('games_lost', models.IntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tournament_standings', to='users.userprofile')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournament.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tournament', '-points', '-buchholz'], name='tournament__tournam_42cbb0_idx')],
+                'unique_together': {('tournament', 'player')},
+            },
+        ),
+    ]
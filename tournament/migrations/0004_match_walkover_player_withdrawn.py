@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0003_round_robin_swiss_standings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='walkover',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='tournamentplayer',
+            name='status',
+            field=models.CharField(choices=[('registered', 'Registered'), ('eliminated', 'Eliminated'), ('winner', 'Winner'), ('pending approval', 'Pending Approval'), ('pending payment', 'Pending Payment'), ('withdrawn', 'Withdrawn')], default='registered', max_length=20),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0004_match_walkover_player_withdrawn'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='courts',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='match_duration',
+            field=models.PositiveIntegerField(default=90),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='min_rest',
+            field=models.PositiveIntegerField(default=30),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='court',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='scheduled_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='scheduled_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
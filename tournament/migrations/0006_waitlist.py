@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0005_match_schedule'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='waitlist_head',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='waitlist_tail',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournamentplayer',
+            name='waitlist_position',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tournamentplayer',
+            name='status',
+            field=models.CharField(choices=[('registered', 'Registered'), ('eliminated', 'Eliminated'), ('winner', 'Winner'), ('pending approval', 'Pending Approval'), ('pending payment', 'Pending Payment'), ('withdrawn', 'Withdrawn'), ('waitlisted', 'Waitlisted')], default='registered', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentplayer',
+            index=models.Index(fields=['tournament', 'waitlist_position'], name='tournament__tournam_f4d7ed_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0002_alter_communityusers_options_and_more'),
+        ('tournament', '0006_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='auto_generate',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='finished',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='registration_open',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['registration_open', 'subscription_until'], name='tournament__registr_d290ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['started', 'start_date'], name='tournament__started_2afc36_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['finished', 'end_date'], name='tournament__finishe_439989_idx'),
+        ),
+    ]
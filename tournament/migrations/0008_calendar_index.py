@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0008_picture_variants'),
+        ('tournament', '0007_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['community_id', 'start_date'], name='tournament__communi_a89461_idx'),
+        ),
+    ]
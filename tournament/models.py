@@ -5,20 +5,46 @@ from users.models import UserProfile
 from django.conf import settings
 
 class Tournament(models.Model):
+    TYPE_CHOICES = [
+        ("single_elimination", "Single Elimination"),
+        ("double_elimination", "Double Elimination"),
+        ("round_robin", "Round Robin"),
+        ("swiss", "Swiss"),
+    ]
+
     tournament_id = models.AutoField(primary_key=True)
     community_id = models.ForeignKey(Community, on_delete=models.SET_NULL, related_name="tournaments", null=True, blank=True)
     name = models.CharField(max_length=255)
-    type = models.CharField(max_length=50, choices=[("single_elimination", "Single Elimination"), ("double_elimination", "Double Elimination")])
+    type = models.CharField(max_length=50, choices=TYPE_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     start_date = models.DateTimeField(null=True, blank=True)
     end_date = models.DateTimeField(null=True, blank=True)
     max_players = models.IntegerField(null=True,default=32)
     started = models.BooleanField(default=False)
+    registration_open = models.BooleanField(default=True)
+    finished = models.BooleanField(default=False)
+    auto_generate = models.BooleanField(default=False)  # Gerar as partidas automaticamente no início
     subscription_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     prize = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     subscription_until = models.DateTimeField(null=True, blank=True)
     rules = models.TextField(null=True, blank=True)
+    courts = models.PositiveIntegerField(default=1)
+    match_duration = models.PositiveIntegerField(default=90)  # Minutos reservados por partida
+    min_rest = models.PositiveIntegerField(default=30)  # Descanso mínimo do jogador entre partidas, em minutos
+    # A lista de espera ocupa as posições contíguas waitlist_head..waitlist_tail
+    waitlist_head = models.PositiveIntegerField(default=1)
+    waitlist_tail = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Um índice por fronteira do ciclo de vida, usados por lifecycle.due_tournaments
+        indexes = [
+            models.Index(fields=["registration_open", "subscription_until"]),
+            models.Index(fields=["started", "start_date"]),
+            models.Index(fields=["finished", "end_date"]),
+            # Calendário da comunidade
+            models.Index(fields=["community_id", "start_date"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -31,15 +57,19 @@ class TournamentPlayer(models.Model):
         ("winner", "Winner"),
         ("pending approval", "Pending Approval"),
         ("pending payment", "Pending Payment"),
+        ("withdrawn", "Withdrawn"),
+        ("waitlisted", "Waitlisted"),
     ]
 
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="tournament_players")
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="tournament_entries")
     seed = models.IntegerField(null=True, blank=True)  # Optional seeding
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="registered")
+    waitlist_position = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         unique_together = ("tournament", "user")  # Prevent duplicate registrations
+        indexes = [models.Index(fields=["tournament", "waitlist_position"])]
 
     def __str__(self):
         return f"{self.user.username} in {self.tournament.name}"
@@ -51,6 +81,37 @@ class TournamentMatch(models.Model):
     round = models.IntegerField()
     match_number = models.IntegerField()
     next_match = models.ForeignKey("self", on_delete=models.SET_NULL, null=True, blank=True, related_name="previous_match")
+    walkover = models.BooleanField(default=False)
+    court = models.PositiveIntegerField(null=True, blank=True)
+    scheduled_start = models.DateTimeField(null=True, blank=True)
+    scheduled_end = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Round {self.round} - Match {self.match_number}"
+
+
+
+class TournamentStanding(models.Model):
+    """
+    Classificação de um jogador em torneios de pontos corridos ou suíço.
+    Atualizada incrementalmente a cada resultado, nunca recalculada por requisição.
+    """
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="standings")
+    player = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name="tournament_standings")
+    played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    byes = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    buchholz = models.IntegerField(default=0)  # Soma dos pontos dos adversários
+    sets_won = models.IntegerField(default=0)
+    sets_lost = models.IntegerField(default=0)
+    games_won = models.IntegerField(default=0)
+    games_lost = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("tournament", "player")
+        indexes = [models.Index(fields=["tournament", "-points", "-buchholz"])]
+
+    def __str__(self):
+        return f"{self.player} - {self.points} pts in {self.tournament.name}"
@@ -0,0 +1,10 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class TournamentPagination(PageNumberPagination):
+    """
+    Paginação das listas de um torneio (inscritos, partidas e classificação).
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
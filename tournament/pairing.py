@@ -0,0 +1,129 @@
+from itertools import groupby
+
+from django.db import transaction
+from community.counters import adjust
+from matches.models import Match
+from .models import TournamentMatch
+
+
+def round_robin_rounds(players):
+    """
+    Gera todas as rodadas de um pontos corridos pelo método do círculo.
+    O primeiro jogador fica fixo e os demais giram uma posição por rodada.
+    Com número ímpar de jogadores, quem enfrentaria None folga na rodada.
+    Retorna uma lista de rodadas, cada uma com tuplas (mandante, visitante).
+    """
+    players = list(players)
+    if len(players) % 2:
+        players.append(None)
+
+    n = len(players)
+    fixed, rotating = players[0], players[1:]
+    rounds = []
+    for round_index in range(n - 1):
+        current = [fixed] + rotating
+        pairs = []
+        for i in range(n // 2):
+            home, away = current[i], current[n - 1 - i]
+            if home is None or away is None:
+                continue
+            # Alterna o mando do jogador fixo para equilibrar as rodadas
+            if i == 0 and round_index % 2:
+                home, away = away, home
+            pairs.append((home, away))
+        rounds.append(pairs)
+        rotating = rotating[-1:] + rotating[:-1]
+    return rounds
+
+
+def swiss_pairings(ranked, points, played, had_bye=()):
+    """
+    Emparelha uma rodada do sistema suíço.
+
+    ranked: jogadores ordenados pela classificação atual.
+    points: dicionário jogador -> pontos.
+    played: conjunto de frozensets com os confrontos já disputados.
+    had_bye: jogadores que já folgaram.
+
+    Dentro de cada grupo de pontuação a metade de cima enfrenta a metade de baixo,
+    procurando o primeiro adversário inédito. Quem não encontra adversário desce
+    para o grupo seguinte, então cada jogador é examinado poucas vezes e não há
+    busca exaustiva. Retorna (pares, jogador_de_folga).
+    """
+    ranked = list(ranked)
+    had_bye = set(had_bye)
+
+    bye = None
+    if len(ranked) % 2:
+        # Folga para o pior classificado que ainda não folgou
+        for player in reversed(ranked):
+            if player not in had_bye:
+                bye = player
+                break
+        if bye is None:
+            bye = ranked[-1]
+        ranked.remove(bye)
+
+    pairs = []
+    floaters = []
+    for _, group in groupby(ranked, key=lambda player: points[player]):
+        pool = floaters + list(group)
+        top, bottom = pool[:len(pool) // 2], pool[len(pool) // 2:]
+        used = set()
+        floaters = []
+        for i, player in enumerate(top):
+            opponent = None
+            for j in range(len(bottom)):
+                candidate = bottom[(i + j) % len(bottom)]
+                if candidate not in used and frozenset((player, candidate)) not in played:
+                    opponent = candidate
+                    break
+            if opponent is None:
+                floaters.append(player)
+            else:
+                used.add(opponent)
+                pairs.append((player, opponent))
+        floaters += [player for player in bottom if player not in used]
+
+    # Sobras do último grupo: emparelhamento guloso, aceitando revanche só em último caso
+    while floaters:
+        player = floaters.pop(0)
+        index = next(
+            (i for i, candidate in enumerate(floaters) if frozenset((player, candidate)) not in played),
+            0,
+        )
+        pairs.append((player, floaters.pop(index)))
+
+    return pairs, bye
+
+
+def create_round_matches(tournament, rounds, first_round=1):
+    """
+    Cria as partidas de uma ou mais rodadas com dois INSERTs em lote.
+    rounds: lista de rodadas, cada uma com tuplas (mandante, visitante) de ids de UserProfile.
+    Visitante None indica folga, e a partida já nasce com o mandante como vencedor.
+    """
+    with transaction.atomic():
+        matches = Match.objects.bulk_create([
+            Match(
+                community_id=tournament.community_id,
+                home1_id=home,
+                away1_id=away,
+                winner1_id=home if away is None else None,
+            )
+            for pairs in rounds
+            for home, away in pairs
+        ])
+        # bulk_create não dispara post_save, que mantém o contador da comunidade
+        adjust(tournament.community_id_id, "match_count", len(matches))
+        matches = iter(matches)
+        return TournamentMatch.objects.bulk_create([
+            TournamentMatch(
+                match=next(matches),
+                tournament=tournament,
+                round=round_number,
+                match_number=number,
+            )
+            for round_number, pairs in enumerate(rounds, start=first_round)
+            for number in range(1, len(pairs) + 1)
+        ])
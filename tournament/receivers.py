@@ -0,0 +1,28 @@
+from django.dispatch import receiver
+from matches.signals import match_completed
+from .models import TournamentMatch
+from .standings import record_result
+from .repair import advance_winner
+
+
+@receiver(match_completed)
+def update_tournament(sender, match, sets, **kwargs):
+    """
+    Avança o vencedor na chave de eliminação ou atualiza a classificação
+    de torneios por pontos quando uma partida termina.
+    """
+    tournament_match = TournamentMatch.objects.select_related("tournament").filter(match=match).first()
+    if not tournament_match or not match.home1_id or not match.away1_id:
+        return
+
+    if tournament_match.tournament.type not in ("round_robin", "swiss"):
+        tournament_match.match = match
+        advance_winner(tournament_match)
+        return
+
+    if match.winner1_id == match.home1_id:
+        loser_id = match.away1_id
+    else:
+        loser_id = match.home1_id
+        sets = [(away, home) for home, away in sets]
+    record_result(tournament_match.tournament, match.winner1_id, loser_id, sets)
@@ -0,0 +1,148 @@
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from users.models import UserProfile
+from .models import Tournament, TournamentPlayer
+
+# Resultado por jogador em register_players
+REGISTERED = "registered"
+ALREADY_REGISTERED = "already_registered"
+NOT_FOUND = "not_found"
+WAITLISTED = "waitlisted"
+
+# Inscrições que não ocupam vaga na chave
+NOT_COUNTED = ("withdrawn", "waitlisted")
+
+
+class RegistrationError(Exception):
+    pass
+
+
+def _unique_ids(user_ids):
+    """
+    Converte os ids para inteiros e remove repetições mantendo a ordem.
+    """
+    try:
+        return list(dict.fromkeys(int(user_id) for user_id in user_ids))
+    except (TypeError, ValueError):
+        raise RegistrationError("Os ids de jogadores devem ser inteiros")
+
+
+def check_open(tournament):
+    """
+    Levanta RegistrationError se o torneio não aceita mais inscrições.
+    """
+    if tournament.started:
+        raise RegistrationError("O torneio já começou")
+    if not tournament.registration_open:
+        raise RegistrationError("As inscrições estão encerradas")
+    if tournament.subscription_until and timezone.now() > tournament.subscription_until:
+        raise RegistrationError("O prazo de inscrição terminou")
+
+
+def free_places(tournament):
+    """
+    Vagas livres no torneio (infinitas sem max_players). Chame com o torneio travado.
+    """
+    taken = TournamentPlayer.objects.filter(tournament=tournament).exclude(status__in=NOT_COUNTED).count()
+    return float("inf") if tournament.max_players is None else max(tournament.max_players - taken, 0)
+
+
+def leave_waitlist(tournament, position):
+    """
+    Tira uma posição da lista de espera mantendo head/tail e as posições contíguas.
+    Chame com o torneio travado, depois de a inscrição deixar a posição.
+    """
+    if position is None or position < tournament.waitlist_head:
+        return
+    if position == tournament.waitlist_head:
+        # Saiu o primeiro da fila: basta avançar a cabeça
+        Tournament.objects.filter(pk=tournament.pk).update(waitlist_head=F("waitlist_head") + 1)
+    else:
+        # Fecha o buraco para manter as posições contíguas; só quem está atrás é renumerado
+        TournamentPlayer.objects.filter(
+            tournament=tournament, waitlist_position__gt=position
+        ).update(waitlist_position=F("waitlist_position") - 1)
+        Tournament.objects.filter(pk=tournament.pk).update(waitlist_tail=F("waitlist_tail") - 1)
+
+
+def register_players(tournament_id, user_ids):
+    """
+    Inscreve vários jogadores de uma vez. O torneio fica travado durante a
+    checagem de vagas, então inscrições concorrentes nunca estouram max_players;
+    quem não couber entra no fim da lista de espera.
+    Retorna (inscrições criadas, [(user_id, resultado)] na ordem recebida).
+    """
+    user_ids = _unique_ids(user_ids)
+    with transaction.atomic():
+        tournament = Tournament.objects.select_for_update().get(pk=tournament_id)
+        check_open(tournament)
+
+        # Uma consulta para saber quem existe e quem já está inscrito
+        profiles = dict(
+            UserProfile.objects.filter(pk__in=user_ids)
+            .annotate(registered=Exists(TournamentPlayer.objects.filter(tournament=tournament, user=OuterRef("pk"))))
+            .values_list("pk", "registered")
+        )
+        free = free_places(tournament)
+
+        outcomes = []
+        entries = []
+        waitlisted = 0
+        for user_id in user_ids:
+            if user_id not in profiles:
+                outcomes.append((user_id, NOT_FOUND))
+            elif profiles[user_id]:
+                outcomes.append((user_id, ALREADY_REGISTERED))
+            elif len(entries) - waitlisted >= free:
+                waitlisted += 1
+                entries.append(TournamentPlayer(
+                    tournament=tournament,
+                    user_id=user_id,
+                    status="waitlisted",
+                    waitlist_position=tournament.waitlist_tail + waitlisted,
+                ))
+                outcomes.append((user_id, WAITLISTED))
+            else:
+                entries.append(TournamentPlayer(tournament=tournament, user_id=user_id))
+                outcomes.append((user_id, REGISTERED))
+
+        TournamentPlayer.objects.bulk_create(entries)
+        if waitlisted:
+            Tournament.objects.filter(pk=tournament.pk).update(waitlist_tail=F("waitlist_tail") + waitlisted)
+    return entries, outcomes
+
+
+def remove_entry(tournament_id, user_id):
+    """
+    Cancela a inscrição de um jogador. Se ele ocupava vaga, o primeiro da
+    lista de espera é promovido na mesma transação, com número fixo de consultas.
+    Retorna (removido, promovido) com ids de UserProfile; promovido pode ser None.
+    """
+    with transaction.atomic():
+        tournament = Tournament.objects.select_for_update().get(pk=tournament_id)
+        entry = TournamentPlayer.objects.filter(tournament=tournament, user_id=user_id).first()
+        if entry is None:
+            return None, None
+        entry.delete()
+
+        if entry.status == "waitlisted":
+            leave_waitlist(tournament, entry.waitlist_position)
+            return entry.user_id, None
+
+        if entry.status in NOT_COUNTED or tournament.waitlist_head > tournament.waitlist_tail:
+            return entry.user_id, None
+
+        # A primeira posição a partir da cabeça, mesmo que o ponteiro tenha ficado para trás
+        head = (
+            TournamentPlayer.objects.filter(tournament=tournament, waitlist_position__gte=tournament.waitlist_head)
+            .order_by("waitlist_position")
+            .first()
+        )
+        if head is None:
+            # Ponteiros desatualizados com a fila vazia: a fila volta a ficar vazia de forma consistente
+            Tournament.objects.filter(pk=tournament.pk).update(waitlist_head=F("waitlist_tail") + 1)
+            return entry.user_id, None
+        TournamentPlayer.objects.filter(pk=head.pk).update(status="registered", waitlist_position=None)
+        Tournament.objects.filter(pk=tournament.pk).update(waitlist_head=head.waitlist_position + 1)
+        return entry.user_id, head.user_id
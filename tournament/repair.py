@@ -0,0 +1,159 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from matches.models import Match
+from .models import Tournament, TournamentMatch, TournamentPlayer
+from .registration import NOT_COUNTED, RegistrationError, free_places, leave_waitlist
+
+
+def _slot(tournament_match):
+    """
+    Lado da próxima partida ocupado pelo vencedor desta: ímpares são mandantes.
+    """
+    return "home1_id" if tournament_match.match_number % 2 else "away1_id"
+
+
+def _is_decided(tournament_match):
+    return tournament_match.walkover or tournament_match.match.winner1_id is not None
+
+
+def _dead_slots(tournament_match):
+    """
+    Lados vazios que não vão mais receber jogador: sem partida anterior
+    (bye) ou com a partida anterior já decidida.
+    """
+    feeders = {
+        _slot(feeder): feeder
+        for feeder in TournamentMatch.objects.select_related("match").filter(next_match=tournament_match)
+    }
+    dead = set()
+    for slot in ("home1_id", "away1_id"):
+        if getattr(tournament_match.match, slot) is None:
+            feeder = feeders.get(slot)
+            if feeder is None or _is_decided(feeder):
+                dead.add(slot)
+    return dead
+
+
+def _place(tournament_match, player_id):
+    """
+    Coloca o jogador no seu lado da próxima partida e a devolve.
+    """
+    next_match = TournamentMatch.objects.select_related("match").get(pk=tournament_match.next_match_id)
+    slot = _slot(tournament_match)
+    Match.objects.filter(pk=next_match.match_id).update(**{slot: player_id}, updated_at=timezone.now())
+    setattr(next_match.match, slot, player_id)
+    return next_match
+
+
+def _resolve(tournament_match):
+    """
+    Decide por W.O. as partidas que ficaram sem adversário possível e propaga
+    o resultado rumo à final. Toca no máximo uma partida por rodada: O(log n).
+    """
+    while tournament_match is not None and not _is_decided(tournament_match):
+        match = tournament_match.match
+        players = [player for player in (match.home1_id, match.away1_id) if player is not None]
+        dead = _dead_slots(tournament_match)
+        if len(players) + len(dead) < 2 or len(players) == 2:
+            return
+
+        # Um jogador contra um lado morto vence por W.O.; dois lados mortos não têm vencedor
+        winner = players[0] if players else None
+        Match.objects.filter(pk=match.pk).update(winner1_id=winner, updated_at=timezone.now())
+        TournamentMatch.objects.filter(pk=tournament_match.pk).update(walkover=True)
+
+        if tournament_match.next_match_id is None:
+            return
+        if winner is None:
+            tournament_match = TournamentMatch.objects.select_related("match").get(pk=tournament_match.next_match_id)
+        else:
+            tournament_match = _place(tournament_match, winner)
+
+
+def advance_winner(tournament_match):
+    """
+    Leva o vencedor de uma partida de eliminação para a rodada seguinte.
+    """
+    winner = tournament_match.match.winner1_id
+    if winner is None or tournament_match.next_match_id is None:
+        return
+    with transaction.atomic():
+        _resolve(_place(tournament_match, winner))
+
+
+def withdraw_player(tournament, user_id):
+    """
+    Retira um jogador da chave sem refazê-la: libera o seu lado da partida
+    atual e o adversário avança por W.O., em cascata se necessário.
+    Retorna a partida afetada, ou None se o jogador já não tinha partidas pendentes.
+    """
+    with transaction.atomic():
+        TournamentPlayer.objects.filter(tournament=tournament, user_id=user_id).update(status="withdrawn")
+        active = (
+            TournamentMatch.objects.select_related("match")
+            .filter(tournament=tournament, walkover=False, match__winner1__isnull=True)
+            .filter(Q(match__home1_id=user_id) | Q(match__away1_id=user_id))
+            .order_by("-round")
+            .first()
+        )
+        if active is None:
+            return None
+
+        slot = "home1_id" if active.match.home1_id == user_id else "away1_id"
+        Match.objects.filter(pk=active.match_id).update(**{slot: None}, updated_at=timezone.now())
+        setattr(active.match, slot, None)
+        _resolve(active)
+        return active
+
+
+def late_entry(tournament, user_id):
+    """
+    Encaixa um jogador atrasado no lugar de um bye (ou W.O.) da primeira rodada
+    cujo beneficiado ainda não jogou a segunda. Prefere o bye do pior seed.
+    Respeita max_players como register_players (levanta RegistrationError se não
+    houver vaga); quem estava na lista de espera sai dela.
+    Retorna a partida da primeira rodada ocupada, ou None se não houver bye.
+    """
+    with transaction.atomic():
+        tournament = Tournament.objects.select_for_update().get(pk=tournament.pk)
+        candidates = list(
+            TournamentMatch.objects.select_related("match", "next_match__match")
+            .filter(
+                Q(match__home1__isnull=True) ^ Q(match__away1__isnull=True),
+                tournament=tournament,
+                round=1,
+                next_match__walkover=False,
+                next_match__match__winner1__isnull=True,
+            )
+        )
+        if not candidates:
+            return None
+
+        seeds = dict(
+            TournamentPlayer.objects.filter(
+                tournament=tournament,
+                user_id__in=[c.match.home1_id or c.match.away1_id for c in candidates],
+            ).values_list("user_id", "seed")
+        )
+        chosen = max(candidates, key=lambda c: (seeds.get(c.match.home1_id or c.match.away1_id) or 0, c.match_number))
+        advanced = chosen.match.home1_id or chosen.match.away1_id
+
+        entry = TournamentPlayer.objects.filter(tournament=tournament, user_id=user_id).first()
+        if (entry is None or entry.status in NOT_COUNTED) and not free_places(tournament):
+            raise RegistrationError("O torneio está cheio")
+        if entry is None:
+            TournamentPlayer.objects.create(tournament=tournament, user_id=user_id)
+        else:
+            TournamentPlayer.objects.filter(pk=entry.pk).update(status="registered", waitlist_position=None)
+            if entry.status == "waitlisted":
+                leave_waitlist(tournament, entry.waitlist_position)
+        empty_slot = "away1_id" if chosen.match.home1_id else "home1_id"
+        Match.objects.filter(pk=chosen.match_id).update(**{empty_slot: user_id, "winner1_id": None}, updated_at=timezone.now())
+        TournamentMatch.objects.filter(pk=chosen.pk).update(walkover=False)
+
+        # O beneficiado do bye volta para a primeira rodada
+        next_slot = _slot(chosen)
+        if getattr(chosen.next_match.match, next_slot) == advanced:
+            Match.objects.filter(pk=chosen.next_match.match_id).update(**{next_slot: None}, updated_at=timezone.now())
+        return chosen
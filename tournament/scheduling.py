@@ -0,0 +1,192 @@
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from .models import TournamentMatch
+
+
+class SchedulingError(Exception):
+    pass
+
+
+class Job:
+    """
+    Partida a agendar: id, partida seguinte, jogadores conhecidos e prioridade.
+    """
+
+    __slots__ = ("id", "next_id", "players", "priority", "pending_feeders", "ready_at")
+
+    def __init__(self, id, next_id, players, priority):
+        self.id = id
+        self.next_id = next_id
+        self.players = players
+        self.priority = priority
+        self.pending_feeders = 0
+        self.ready_at = None
+
+
+def list_schedule(jobs, courts, window_start, window_end, duration, rest, court_free=None):
+    """
+    Agenda as partidas por list scheduling com duas filas de prioridade:
+    quadras pela hora em que ficam livres e partidas prontas pela hora mais
+    cedo em que podem começar (fim das partidas anteriores e descanso dos jogadores).
+
+    Retorna {id: (quadra, início, fim)}; levanta SchedulingError se algo
+    não couber na janela do torneio. O(m log m) para m partidas.
+    """
+    court_free = court_free or {}
+    by_id = {job.id: job for job in jobs}
+    for job in jobs:
+        if job.next_id in by_id:
+            by_id[job.next_id].pending_feeders += 1
+
+    court_heap = [(max(window_start, court_free.get(court, window_start)), court) for court in range(1, courts + 1)]
+    heapq.heapify(court_heap)
+
+    player_free = defaultdict(lambda: window_start)
+
+    def earliest(job):
+        times = [job.ready_at or window_start]
+        times += [player_free[player] for player in job.players]
+        return max(times)
+
+    ready = [(earliest(job), job.priority, job.id) for job in jobs if not job.pending_feeders]
+    heapq.heapify(ready)
+
+    result = {}
+    while ready:
+        ready_at, priority, job_id = heapq.heappop(ready)
+        job = by_id[job_id]
+        # Fila preguiçosa: o descanso de um jogador pode ter mudado depois da inserção
+        current = earliest(job)
+        if current > ready_at:
+            heapq.heappush(ready, (current, priority, job_id))
+            continue
+
+        free_at, court = heapq.heappop(court_heap)
+        start = max(free_at, current)
+        end = start + duration
+        if window_end and end > window_end:
+            raise SchedulingError(f"A partida {job_id} não cabe na janela do torneio")
+
+        result[job_id] = (court, start, end)
+        heapq.heappush(court_heap, (end, court))
+        for player in job.players:
+            player_free[player] = end + rest
+
+        following = by_id.get(job.next_id)
+        if following is not None:
+            following.ready_at = max(following.ready_at or window_start, end + rest)
+            following.pending_feeders -= 1
+            if not following.pending_feeders:
+                heapq.heappush(ready, (earliest(following), following.priority, following.id))
+
+    if len(result) < len(jobs):
+        raise SchedulingError("Dependências circulares entre partidas")
+    return result
+
+
+def _is_settled(tournament_match):
+    """
+    Partidas já decididas (bye, W.O. ou resultado) não ocupam quadra.
+    """
+    return tournament_match.walkover or tournament_match.match.winner1_id is not None
+
+
+def schedule_tournament(tournament, court_free=None):
+    """
+    Atribui quadra e horário a todas as partidas pendentes do torneio e grava com um bulk_update.
+    """
+    if tournament.start_date is None:
+        raise SchedulingError("O torneio precisa de uma data de início")
+
+    tournament_matches = list(
+        TournamentMatch.objects.filter(tournament=tournament).select_related("match").order_by("round", "match_number")
+    )
+    pending = [tm for tm in tournament_matches if not _is_settled(tm)]
+    jobs = [
+        Job(
+            tm.pk,
+            tm.next_match_id,
+            {player for player in (tm.match.home1_id, tm.match.away1_id) if player is not None},
+            (tm.round, tm.match_number),
+        )
+        for tm in pending
+    ]
+    result = list_schedule(
+        jobs,
+        tournament.courts,
+        tournament.start_date,
+        tournament.end_date,
+        timedelta(minutes=tournament.match_duration),
+        timedelta(minutes=tournament.min_rest),
+        court_free,
+    )
+
+    for tm in pending:
+        tm.court, tm.scheduled_start, tm.scheduled_end = result[tm.pk]
+    TournamentMatch.objects.bulk_update(pending, ["court", "scheduled_start", "scheduled_end"])
+    return pending
+
+
+def shift_downstream(tournament, tournament_match, actual_end):
+    """
+    Reagenda só o que depende de uma partida que atrasou: a partida seguinte
+    da chave, a próxima da mesma quadra e as próximas dos mesmos jogadores,
+    em cascata. Retorna as partidas movidas; levanta SchedulingError, sem gravar
+    nada, se alguma passar do fim do torneio.
+    """
+    rest = timedelta(minutes=tournament.min_rest)
+    scheduled = list(
+        TournamentMatch.objects.filter(tournament=tournament, scheduled_start__isnull=False).select_related("match")
+    )
+    by_id = {tm.pk: tm for tm in scheduled}
+
+    def successors(key):
+        """
+        {(linha, id): partida seguinte na linha}. A cascata só atrasa partidas e empurra
+        junto a seguinte de cada linha, então a ordem inicial das linhas continua valendo.
+        """
+        lines = defaultdict(list)
+        for tm in scheduled:
+            for value in key(tm):
+                lines[value].append(tm)
+        following = {}
+        for value, line in lines.items():
+            line.sort(key=lambda tm: (tm.scheduled_start, tm.pk))
+            following.update(((value, tm.pk), after) for tm, after in zip(line, line[1:]))
+        return following
+
+    next_on_court = successors(lambda tm: [tm.court])
+    next_for_player = successors(lambda tm: [p for p in (tm.match.home1_id, tm.match.away1_id) if p is not None])
+
+    with transaction.atomic():
+        origin = by_id[tournament_match.pk]
+        duration = origin.scheduled_end - origin.scheduled_start
+        origin.scheduled_end = actual_end
+        moved = {origin.pk: origin}
+        queue = [(origin.scheduled_start, origin.pk)]
+        while queue:
+            _, tm_id = heapq.heappop(queue)
+            tm = by_id[tm_id]
+            dependents = [(next_on_court.get((tm.court, tm.pk)), tm.scheduled_end)]
+            dependents += [
+                (next_for_player.get((player, tm.pk)), tm.scheduled_end + rest)
+                for player in (tm.match.home1_id, tm.match.away1_id) if player is not None
+            ]
+            dependents.append((by_id.get(tm.next_match_id), tm.scheduled_end + rest))
+
+            for dependent, required in dependents:
+                if dependent is None or dependent.scheduled_start >= required:
+                    continue
+                dependent.scheduled_start = required
+                dependent.scheduled_end = required + duration
+                moved[dependent.pk] = dependent
+                heapq.heappush(queue, (dependent.scheduled_start, dependent.pk))
+
+        late = sorted(tm.pk for tm in moved.values() if tournament.end_date and tm.scheduled_end > tournament.end_date)
+        if late:
+            raise SchedulingError(f"As partidas {late} passariam do fim do torneio")
+        TournamentMatch.objects.bulk_update(moved.values(), ["scheduled_start", "scheduled_end"])
+    return [tm for tm in moved.values() if tm.pk != origin.pk]
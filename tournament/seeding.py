@@ -0,0 +1,104 @@
+import random
+from functools import lru_cache
+
+
+def bracket_size(player_count):
+    """
+    Menor potência de 2 (mínimo 2) que comporta todos os jogadores.
+    """
+    return 1 << max(1, (player_count - 1).bit_length())
+
+
+@lru_cache(maxsize=None)
+def bracket_order(size):
+    """
+    Ordem dos seeds no bracket para size jogadores (size é potência de 2).
+    Cada passo dobra a chave colocando o seed s ao lado de n + 1 - s, garantindo
+    que os seeds mais altos se encontrem por último. Iterativo e memorizado.
+    """
+    order = (1,)
+    while len(order) < size:
+        n = len(order) * 2
+        order = tuple(s for seed in order for s in (seed, n + 1 - seed))
+    return order
+
+
+def assign_missing_seeds(players, rng=random):
+    """
+    Sorteia os seeds livres entre os jogadores sem seed, em O(n).
+    Se algum seed estiver fora de 1..n ou repetido (por exemplo depois de uma
+    desistência), os seeds existentes são renumerados em 1..k na mesma ordem antes
+    do sorteio, para ninguém ficar fora da chave.
+    Altera os objetos em memória e retorna apenas os que mudaram.
+    """
+    n = len(players)
+    taken = bytearray(n + 1)
+    seeded, unseeded = [], []
+    compact = False
+    for player in players:
+        if player.seed is None:
+            unseeded.append(player)
+            continue
+        seeded.append(player)
+        if 1 <= player.seed <= n and not taken[player.seed]:
+            taken[player.seed] = 1
+        else:
+            compact = True
+
+    changed = []
+    if compact:
+        # sort é estável: seeds repetidos mantêm a ordem recebida
+        seeded.sort(key=lambda player: player.seed)
+        taken = bytearray(n + 1)
+        for seed, player in enumerate(seeded, start=1):
+            taken[seed] = 1
+            if player.seed != seed:
+                player.seed = seed
+                changed.append(player)
+
+    available = [seed for seed in range(1, n + 1) if not taken[seed]]
+    rng.shuffle(available)
+    for player, seed in zip(unseeded, available):
+        player.seed = seed
+    return changed + unseeded
+
+
+def seed_from_ranking(players, ranking):
+    """
+    Define os seeds pela ordem de um ranking (lista de ids de UserProfile, melhor primeiro).
+    Jogadores fora do ranking ficam com os seeds restantes, sorteados.
+    Retorna os jogadores cujo seed mudou.
+    """
+    position = {user_id: index for index, user_id in enumerate(ranking)}
+    ranked = sorted(
+        (player for player in players if player.user_id in position),
+        key=lambda player: position[player.user_id],
+    )
+    previous = {player.pk: player.seed for player in players}
+    for seed, player in enumerate(ranked, start=1):
+        player.seed = seed
+    ranked_ids = {player.pk for player in ranked}
+    for player in players:
+        if player.pk not in ranked_ids:
+            player.seed = None
+    assign_missing_seeds(players)
+    return [player for player in players if player.seed != previous[player.pk]]
+
+
+def persist_seeds(players):
+    """
+    Grava os seeds alterados com um único bulk_update.
+    """
+    # Importado aqui para o resto do módulo (e utils, que o usa) não depender dos modelos
+    from .models import TournamentPlayer
+
+    if players:
+        TournamentPlayer.objects.bulk_update(players, ["seed"])
+
+
+def place_players(players, size):
+    """
+    Distribui os jogadores pelas posições do bracket; posições vazias (byes) ficam None.
+    """
+    players_by_seed = {player.seed: player for player in players}
+    return [players_by_seed.get(seed) for seed in bracket_order(size)]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Tournament, TournamentPlayer, TournamentMatch
+from .models import Tournament, TournamentPlayer, TournamentMatch, TournamentStanding
 from matches.serializers import MatchSerializer
 from users.serializers import SimpleUserProfileSerializer
 from django.contrib.auth import get_user_model
@@ -16,7 +16,15 @@ class TournamentPlayerSerializer(serializers.ModelSerializer):
     class Meta:
         model = TournamentPlayer
         #fields = ['id', 'tournament', 'user_id', 'seed', 'status']
-        fields = ['tournament', 'seed', 'user','status']
+        fields = ['tournament', 'seed', 'user','status', 'waitlist_position']
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    user = SimpleUserProfileSerializer(read_only=True)
+    place = serializers.IntegerField(read_only=True)  # Anotado pela consulta da lista de espera
+
+    class Meta:
+        model = TournamentPlayer
+        fields = ['user', 'waitlist_position', 'place']
 
 class TournamentMatchSerializer(serializers.ModelSerializer):
     match = MatchSerializer()  # Serializa os detalhes da partida
@@ -24,4 +32,13 @@ class TournamentMatchSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TournamentMatch
-        fields = ['match', 'tournament', 'match_number', 'round', 'next_match_id']
\ No newline at end of file
+        fields = ['match', 'tournament', 'match_number', 'round', 'next_match_id', 'walkover',
+                  'court', 'scheduled_start', 'scheduled_end']
+
+class TournamentStandingSerializer(serializers.ModelSerializer):
+    player = SimpleUserProfileSerializer(read_only=True)
+
+    class Meta:
+        model = TournamentStanding
+        fields = ['player', 'played', 'wins', 'losses', 'byes', 'points', 'buchholz',
+                  'sets_won', 'sets_lost', 'games_won', 'games_lost']
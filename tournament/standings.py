@@ -0,0 +1,121 @@
+from collections import Counter
+
+from django.db.models import F, Q
+from matches.models import Match
+from .models import TournamentStanding
+
+POINTS_PER_WIN = 1
+
+
+def ranked_standings(tournament):
+    """
+    Classificação do torneio: pontos, Buchholz, saldo de sets e saldo de games.
+    """
+    return (
+        TournamentStanding.objects.filter(tournament=tournament)
+        .select_related("player__user")
+        .order_by(
+            "-points",
+            "-buchholz",
+            (F("sets_lost") - F("sets_won")).asc(),
+            (F("games_lost") - F("games_won")).asc(),
+            "player_id",
+        )
+    )
+
+
+def create_standings(tournament, player_ids):
+    """
+    Cria as linhas zeradas da classificação para os jogadores informados.
+    """
+    TournamentStanding.objects.bulk_create(
+        [TournamentStanding(tournament=tournament, player_id=player_id) for player_id in player_ids],
+        ignore_conflicts=True,
+    )
+
+
+def _opponents(tournament, player_id):
+    """
+    Adversários já enfrentados pelo jogador no torneio: só partidas decididas
+    (com vencedor ou W.O.); partidas ainda por jogar e folgas não contam.
+    """
+    rows = Match.objects.filter(
+        Q(home1_id=player_id) | Q(away1_id=player_id),
+        Q(winner1__isnull=False) | Q(tournament_match__walkover=True),
+        tournament_match__tournament=tournament,
+        home1__isnull=False,
+        away1__isnull=False,
+    ).values_list("home1_id", "away1_id")
+    return [away if home == player_id else home for home, away in rows]
+
+
+def _add_points(tournament, player_id, credited=None):
+    """
+    Soma os pontos de uma vitória e repassa ao Buchholz dos adversários já enfrentados,
+    uma vez por confronto: quem enfrentou o jogador duas vezes recebe o ponto duas vezes.
+    credited é o adversário cujo confronto atual já recebeu o ponto por outro caminho.
+    """
+    TournamentStanding.objects.filter(tournament=tournament, player_id=player_id).update(
+        points=F("points") + POINTS_PER_WIN
+    )
+    meetings = Counter(_opponents(tournament, player_id))
+    if credited is not None:
+        meetings[credited] -= 1
+    by_count = {}
+    for opponent, count in meetings.items():
+        if count > 0:
+            by_count.setdefault(count, []).append(opponent)
+    # Um UPDATE por número de confrontos; sem revanches, um só
+    for count, opponents in by_count.items():
+        TournamentStanding.objects.filter(
+            tournament=tournament, player_id__in=opponents
+        ).update(buchholz=F("buchholz") + count * POINTS_PER_WIN)
+
+
+def record_result(tournament, winner_id, loser_id, sets):
+    """
+    Aplica o resultado de uma partida à classificação com UPDATEs incrementais.
+    sets: tuplas (games_vencedor, games_perdedor) de cada set disputado.
+    Deve ser chamado depois que a partida já tem vencedor gravado.
+    """
+    sets_won = sum(1 for won, lost in sets if won > lost)
+    sets_lost = len(sets) - sets_won
+    games_won = sum(won for won, _ in sets)
+    games_lost = sum(lost for _, lost in sets)
+
+    points = dict(
+        TournamentStanding.objects.filter(
+            tournament=tournament, player_id__in=[winner_id, loser_id]
+        ).values_list("player_id", "points")
+    )
+
+    TournamentStanding.objects.filter(tournament=tournament, player_id=winner_id).update(
+        played=F("played") + 1,
+        wins=F("wins") + 1,
+        sets_won=F("sets_won") + sets_won,
+        sets_lost=F("sets_lost") + sets_lost,
+        games_won=F("games_won") + games_won,
+        games_lost=F("games_lost") + games_lost,
+        buchholz=F("buchholz") + points.get(loser_id, 0),
+    )
+    TournamentStanding.objects.filter(tournament=tournament, player_id=loser_id).update(
+        played=F("played") + 1,
+        losses=F("losses") + 1,
+        sets_won=F("sets_won") + sets_lost,
+        sets_lost=F("sets_lost") + sets_won,
+        games_won=F("games_won") + games_lost,
+        games_lost=F("games_lost") + games_won,
+        # Os pontos do vencedor já contando esta vitória
+        buchholz=F("buchholz") + points.get(winner_id, 0) + POINTS_PER_WIN,
+    )
+    _add_points(tournament, winner_id, credited=loser_id)
+
+
+def record_bye(tournament, player_id):
+    """
+    Registra uma folga: conta como vitória sem adversário.
+    """
+    TournamentStanding.objects.filter(tournament=tournament, player_id=player_id).update(
+        byes=F("byes") + 1
+    )
+    _add_points(tournament, player_id)
@@ -1,5 +1,22 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
 from django.test import TestCase
 from .utils import seeding_order, fill_null_seeds, fit_players_in_bracket
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Max, Q
+from matches.models import Match
+from tournament import forecast
+from tournament.bracket import plan_bracket
+from tournament.lifecycle import due_tournaments, process_due
+from tournament.models import TournamentStanding
+from tournament.pairing import create_round_matches, round_robin_rounds, swiss_pairings
+from tournament.scheduling import Job, SchedulingError, list_schedule
+from tournament.seeding import bracket_order, assign_missing_seeds, place_players, seed_from_ranking
 # Create your tests here.
 
 def test_brackets():
@@ -285,4 +302,697 @@ class TournamentViewSetTests(APITestCase):
             )
         printed_output = "\n".join(output_lines)
         self.assertTrue(len(printed_output) > 0)
-        print("Tournament Matches:\n", printed_output)
\ No newline at end of file
+        print("Tournament Matches:\n", printed_output)
+
+
+class PairingTests(TestCase):
+    def test_round_robin_everyone_meets_once(self):
+        for size in (6, 7):
+            rounds = round_robin_rounds(list(range(1, size + 1)))
+            pairs = [frozenset(pair) for matches in rounds for pair in matches]
+            self.assertEqual(len(pairs), size * (size - 1) // 2)
+            self.assertEqual(len(set(pairs)), len(pairs))
+            for matches in rounds:
+                players = [p for pair in matches for p in pair]
+                self.assertEqual(len(players), len(set(players)))
+
+    def test_swiss_avoids_rematches(self):
+        ranked = list(range(1, 201))
+        points = {p: (3 if p <= 50 else 2 if p <= 120 else 0) for p in ranked}
+        played = {frozenset((p, p + 100)) for p in range(1, 101)}
+        pairs, bye = swiss_pairings(ranked, points, played)
+        self.assertIsNone(bye)
+        self.assertEqual(len(pairs), 100)
+        self.assertFalse(any(frozenset(pair) in played for pair in pairs))
+        self.assertEqual(len({p for pair in pairs for p in pair}), 200)
+
+    def test_swiss_bye_goes_to_lowest_without_bye(self):
+        pairs, bye = swiss_pairings([1, 2, 3], {1: 1, 2: 1, 3: 0}, set(), had_bye={3})
+        self.assertEqual(bye, 2)
+        self.assertEqual(pairs, [(1, 3)])
+
+
+class PointsTournamentTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="organizer", password="pass")
+        self.client.force_authenticate(self.user)
+        self.profiles = []
+        for i in range(5):
+            user = User.objects.create_user(username=f"rr{i}", password="pass")
+            self.profiles.append(UserProfile.objects.create(user=user))
+
+    def _tournament(self, type):
+        tournament = Tournament.objects.create(name=type, type=type)
+        for profile in self.profiles:
+            TournamentPlayer.objects.create(tournament=tournament, user=profile)
+        return tournament
+
+    def _finish(self, match, winner):
+        response = self.client.patch(f"/api/matches/{match.match_id}/", {"winner1": winner.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_round_robin_schedule_and_standings(self):
+        tournament = self._tournament("round_robin")
+        response = self.client.post(f"/api/tournament/{tournament.pk}/generate_bracket/")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TournamentMatch.objects.filter(tournament=tournament).count(), 10)
+        self.assertEqual(TournamentMatch.objects.filter(tournament=tournament).aggregate(m=Max("round"))["m"], 5)
+
+        match = Match.objects.filter(tournament_match__tournament=tournament).first()
+        self._finish(match, match.home1)
+        winner = TournamentStanding.objects.get(tournament=tournament, player=match.home1)
+        loser = TournamentStanding.objects.get(tournament=tournament, player=match.away1)
+        self.assertEqual((winner.wins, winner.points, winner.played), (1, 1, 1))
+        self.assertEqual((loser.losses, loser.points, loser.buchholz), (1, 0, 1))
+
+        response = self.client.get(f"/api/tournament/{tournament.pk}/standings/")
+        self.assertEqual(response.data["results"][0]["player"]["id"], match.home1_id)
+
+    def test_round_robin_buchholz_after_partial_round(self):
+        tournament = self._tournament("round_robin")
+        self.client.post(f"/api/tournament/{tournament.pk}/generate_bracket/")
+        a, b, c = self.profiles[:3]
+        # Confrontos do primeiro turno entre a, b e c, jogados fora da ordem da tabela
+        played = Match.objects.filter(tournament_match__tournament=tournament)
+
+        def meeting(x, y):
+            return played.get(Q(home1=x, away1=y) | Q(home1=y, away1=x))
+
+        self._finish(meeting(a, b), a)
+        self._finish(meeting(b, c), b)
+
+        buchholz = dict(TournamentStanding.objects.filter(tournament=tournament).values_list("player_id", "buchholz"))
+        # a enfrentou b (1 ponto); b enfrentou a (1) e c (0); c enfrentou b (1); os demais não jogaram
+        self.assertEqual(
+            buchholz,
+            {a.pk: 1, b.pk: 1, c.pk: 1, self.profiles[3].pk: 0, self.profiles[4].pk: 0},
+        )
+
+        self._finish(meeting(a, c), c)
+        buchholz = dict(TournamentStanding.objects.filter(tournament=tournament).values_list("player_id", "buchholz"))
+        # Todos com 1 ponto: cada um enfrentou os outros dois
+        self.assertEqual(buchholz, {a.pk: 2, b.pk: 2, c.pk: 2, self.profiles[3].pk: 0, self.profiles[4].pk: 0})
+
+    def test_buchholz_counts_each_meeting_of_a_rematch(self):
+        tournament = self._tournament("round_robin")
+        self.client.post(f"/api/tournament/{tournament.pk}/generate_bracket/")
+        a, b, c = self.profiles[:3]
+        played = Match.objects.filter(tournament_match__tournament=tournament)
+        self._finish(played.get(Q(home1=a, away1=b) | Q(home1=b, away1=a)), a)
+        # Returno: a e b se enfrentam de novo
+        rematch = create_round_matches(tournament, [[(b.pk, a.pk)]], first_round=6)[0].match
+        self._finish(rematch, b)
+
+        def buchholz(player):
+            return TournamentStanding.objects.get(tournament=tournament, player=player).buchholz
+
+        self.assertEqual((buchholz(a), buchholz(b)), (2, 2))
+        # Cada ponto novo de a vale duas vezes para b, que o enfrentou duas vezes
+        self._finish(played.get(Q(home1=a, away1=c) | Q(home1=c, away1=a)), a)
+        self.assertEqual((buchholz(a), buchholz(b), buchholz(c)), (2, 4, 2))
+
+    def test_swiss_rounds(self):
+        tournament = self._tournament("swiss")
+        self.client.post(f"/api/tournament/{tournament.pk}/generate_bracket/")
+        round_one = Match.objects.filter(tournament_match__tournament=tournament)
+        self.assertEqual(round_one.count(), 3)  # 2 partidas e uma folga
+
+        response = self.client.post(f"/api/tournament/{tournament.pk}/next_round/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for match in round_one.filter(winner1__isnull=True):
+            self._finish(match, match.home1)
+        response = self.client.post(f"/api/tournament/{tournament.pk}/next_round/")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        pairs = [frozenset(p) for p in Match.objects.filter(
+            tournament_match__tournament=tournament, away1__isnull=False
+        ).values_list("home1_id", "away1_id")]
+        self.assertEqual(len(pairs), len(set(pairs)))
+        self.assertEqual(sum(TournamentStanding.objects.filter(tournament=tournament).values_list("points", flat=True)), 4)  # 2 vitórias e 2 folgas
+
+
+class SeedingTests(TestCase):
+    def test_bracket_order_matches_recursive_definition(self):
+        self.assertEqual(bracket_order(2), (1, 2))
+        self.assertEqual(bracket_order(8), (1, 8, 4, 5, 2, 7, 3, 6))
+        self.assertEqual(sorted(bracket_order(1024)), list(range(1, 1025)))
+
+    def test_assign_missing_seeds_renumbers_invalid_seeds(self):
+        players = [TournamentPlayer(seed=seed) for seed in (1, 40, None, None, 3)]
+        changed = assign_missing_seeds(players)
+        self.assertEqual(len(changed), 4)
+        self.assertEqual(sorted(p.seed for p in players), [1, 2, 3, 4, 5])
+        self.assertEqual([players[0].seed, players[4].seed, players[1].seed], [1, 2, 3])
+        self.assertEqual(sorted(p.seed for p in players[2:4]), [4, 5])
+
+    def test_every_player_is_placed_after_a_withdrawal(self):
+        # O seed 3 de 5 desistiu: a chave encolhe para 4 posições
+        players = [SimpleNamespace(user_id=seed, seed=seed) for seed in (1, 2, 4, 5)]
+        plan = plan_bracket(players)
+        self.assertEqual(plan["size"], 4)
+        self.assertEqual(sorted(u for home, away, _ in plan["rounds"][0] for u in (home, away)), [1, 2, 4, 5])
+        self.assertEqual(plan["seeds"], {1: 1, 2: 2, 4: 3, 5: 4})
+
+        players = [SimpleNamespace(user_id=user_id, seed=seed) for user_id, seed in ((1, 1), (2, 2), (3, 2), (4, None))]
+        assign_missing_seeds(players)
+        placed = [p.user_id for p in place_players(players, 4) if p]
+        self.assertEqual(sorted(placed), [1, 2, 3, 4])
+
+    def test_seed_from_ranking(self):
+        players = [TournamentPlayer(pk=i, user_id=i, seed=None) for i in range(1, 5)]
+        seed_from_ranking(players, [3, 1])
+        self.assertEqual(players[2].seed, 1)
+        self.assertEqual(players[0].seed, 2)
+        self.assertEqual(sorted(p.seed for p in players[1::2]), [3, 4])
+
+    def test_fill_null_seeds_saves_new_seeds(self):
+        tournament = Tournament.objects.create(name="Seeds", type="single_elimination")
+        for i in range(3):
+            user = User.objects.create_user(username=f"seed{i}")
+            TournamentPlayer.objects.create(tournament=tournament, user=UserProfile.objects.create(user=user), seed=1 if i == 0 else None)
+        fill_null_seeds(list(TournamentPlayer.objects.filter(tournament=tournament)), 4)
+        self.assertEqual(sorted(TournamentPlayer.objects.filter(tournament=tournament).values_list("seed", flat=True)), [1, 2, 3])
+
+
+class LargeBracketTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.create(name="Open", type="single_elimination")
+        users = User.objects.bulk_create([User(username=f"big{i}") for i in range(60)])
+        profiles = UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        TournamentPlayer.objects.bulk_create([
+            TournamentPlayer(tournament=self.tournament, user=profile, seed=i + 1 if i < 16 else None)
+            for i, profile in enumerate(profiles)
+        ])
+
+    def test_generate_bracket_uses_bulk_queries(self):
+        url = f"/api/tournament/{self.tournament.pk}/generate_bracket/"
+        with self.assertNumQueries(9):
+            response = self.client.post(url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TournamentMatch.objects.filter(tournament=self.tournament).count(), 63)
+        self.assertFalse(TournamentPlayer.objects.filter(tournament=self.tournament, seed__isnull=True).exists())
+
+        # Partidas 3 e 4 da primeira rodada alimentam a partida 2 da segunda
+        feeders = TournamentMatch.objects.filter(
+            tournament=self.tournament, round=1, match_number__in=[3, 4]
+        ).values_list("next_match__round", "next_match__match_number")
+        self.assertEqual(set(feeders), {(2, 2)})
+
+        # Seeds 1 a 4 recebem bye e já estão na segunda rodada
+        top_seed = TournamentPlayer.objects.get(tournament=self.tournament, seed=1).user
+        first = TournamentMatch.objects.get(tournament=self.tournament, round=1, match_number=1).match
+        self.assertEqual(first.winner1, top_seed)
+        second = TournamentMatch.objects.get(tournament=self.tournament, round=2, match_number=1).match
+        self.assertEqual(second.home1, top_seed)
+
+    def test_read_endpoints_have_fixed_query_budget(self):
+        self.client.post(f"/api/tournament/{self.tournament.pk}/generate_bracket/", {}, format="json")
+        base = f"/api/tournament/{self.tournament.pk}"
+
+        # Tournament, contagem e página
+        with self.assertNumQueries(3):
+            response = self.client.get(f"{base}/players/")
+        self.assertEqual(response.data["count"], 60)
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertIn("username", response.data["results"][0]["user"]["user"])
+
+        with self.assertNumQueries(3):
+            response = self.client.get(f"{base}/matches/", {"page_size": 100})
+        self.assertEqual(len(response.data["results"]), 63)
+
+        player = TournamentPlayer.objects.filter(tournament=self.tournament).first()
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{base}/players/{player.user_id}/")
+        self.assertEqual(response.data["seed"], player.seed)
+
+        match = TournamentMatch.objects.filter(tournament=self.tournament).first()
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{base}/matches/{match.match_id}/")
+        self.assertEqual(response.data["round"], match.round)
+
+        other = Tournament.objects.create(name="Other", type="single_elimination")
+        response = self.client.get(f"/api/tournament/{other.pk}/matches/{match.match_id}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bracket_preview_is_cached_and_reused_on_commit(self):
+        url = f"/api/tournament/{self.tournament.pk}/bracket_preview/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Match.objects.exists())
+        self.assertFalse(TournamentPlayer.objects.filter(tournament=self.tournament, seed__isnull=False, seed__gt=16).exists())
+        self.assertEqual(len(response.data["rounds"]), 6)
+
+        with self.assertNumQueries(2):
+            again = self.client.get(url)
+        self.assertEqual(again.data, response.data)
+
+        self.client.post(f"/api/tournament/{self.tournament.pk}/generate_bracket/", {}, format="json")
+        for match in response.data["rounds"][0]:
+            tm = TournamentMatch.objects.select_related("match").get(
+                tournament=self.tournament, round=1, match_number=match["match_number"]
+            )
+            self.assertEqual(tm.match.home1_id, match["home"] and match["home"]["id"])
+            self.assertEqual(tm.match.away1_id, match["away"] and match["away"]["id"])
+
+
+class SixPlayerBracketTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_user(username="repair_admin"))
+        self.tournament = Tournament.objects.create(name="Repair", type="single_elimination")
+        self.profiles = {}
+        for seed in range(1, 7):
+            profile = UserProfile.objects.create(user=User.objects.create_user(username=f"seed{seed}"))
+            TournamentPlayer.objects.create(tournament=self.tournament, user=profile, seed=seed)
+            self.profiles[seed] = profile
+        self.client.post(f"/api/tournament/{self.tournament.pk}/generate_bracket/")
+
+    def _match(self, round, number):
+        return TournamentMatch.objects.select_related("match").get(
+            tournament=self.tournament, round=round, match_number=number
+        )
+
+
+
+class BracketRepairTests(SixPlayerBracketTestCase):
+    def test_generate_bracket_twice_is_refused(self):
+        response = self.client.post(f"/api/tournament/{self.tournament.pk}/generate_bracket/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_withdrawal_gives_walkover_to_opponent(self):
+        url = f"/api/tournament/{self.tournament.pk}/withdraw_player/"
+        response = self.client.post(url, {"user_id": self.profiles[4].pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        walkover = self._match(1, 2)
+        self.assertTrue(walkover.walkover)
+        self.assertEqual(walkover.match.winner1, self.profiles[5])
+        self.assertEqual(self._match(2, 1).match.away1, self.profiles[5])
+        self.assertEqual(
+            TournamentPlayer.objects.get(tournament=self.tournament, user=self.profiles[4]).status, "withdrawn"
+        )
+
+    def test_withdrawal_waiting_for_opponent_cascades_when_feeder_finishes(self):
+        self.client.post(f"/api/tournament/{self.tournament.pk}/withdraw_player/", {"user_id": self.profiles[1].pk}, format="json")
+        self.assertIsNone(self._match(2, 1).match.home1)
+
+        feeder = self._match(1, 2).match
+        self.client.patch(f"/api/matches/{feeder.match_id}/", {"winner1": self.profiles[5].pk}, format="json")
+
+        semifinal = self._match(2, 1)
+        self.assertTrue(semifinal.walkover)
+        self.assertEqual(semifinal.match.winner1, self.profiles[5])
+        self.assertEqual(self._match(3, 1).match.home1, self.profiles[5])
+
+    def test_late_entry_takes_worst_seeded_bye(self):
+        late = UserProfile.objects.create(user=User.objects.create_user(username="late"))
+        url = f"/api/tournament/{self.tournament.pk}/late_entry/"
+        with self.assertNumQueries(15):
+            response = self.client.post(url, {"user_id": late.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        first_round = self._match(1, 3).match
+        self.assertEqual((first_round.home1, first_round.away1, first_round.winner1), (self.profiles[2], late, None))
+        self.assertIsNone(self._match(2, 2).match.home1)
+        self.assertTrue(TournamentPlayer.objects.filter(tournament=self.tournament, user=late).exists())
+
+        other = UserProfile.objects.create(user=User.objects.create_user(username="later"))
+        self.client.post(url, {"user_id": other.pk}, format="json")
+        response = self.client.post(url, {"user_id": UserProfile.objects.create(
+            user=User.objects.create_user(username="latest")).pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_late_entry_from_waitlist_leaves_the_queue(self):
+        Tournament.objects.filter(pk=self.tournament.pk).update(max_players=7, waitlist_head=1, waitlist_tail=2)
+        waiting = [UserProfile.objects.create(user=User.objects.create_user(username=f"wait{i}")) for i in range(2)]
+        for position, profile in enumerate(waiting, start=1):
+            TournamentPlayer.objects.create(tournament=self.tournament, user=profile, status="waitlisted", waitlist_position=position)
+
+        url = f"/api/tournament/{self.tournament.pk}/late_entry/"
+        response = self.client.post(url, {"user_id": waiting[0].pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        entry = TournamentPlayer.objects.get(tournament=self.tournament, user=waiting[0])
+        self.assertEqual((entry.status, entry.waitlist_position), ("registered", None))
+        self.tournament.refresh_from_db()
+        self.assertEqual((self.tournament.waitlist_head, self.tournament.waitlist_tail), (2, 2))
+        response = self.client.get(f"/api/tournament/{self.tournament.pk}/waitlist/")
+        self.assertEqual([(row["user"]["id"], row["place"]) for row in response.data["results"]], [(waiting[1].pk, 1)])
+
+        # Com as 7 vagas ocupadas, nem a lista de espera nem quem chega entra pela late_entry
+        response = self.client.post(url, {"user_id": waiting[1].pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TournamentPlayer.objects.get(user=waiting[1]).waitlist_position, 2)
+
+class ForecastTests(SixPlayerBracketTestCase):
+    def _forecast(self):
+        response = self.client.get(f"/api/tournament/{self.tournament.pk}/forecast/", {"simulations": 20000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {player["id"]: player for player in response.data["players"]}
+
+    def test_forecast_probabilities(self):
+        players = self._forecast()
+        self.assertAlmostEqual(sum(p["win"] for p in players.values()), 1.0, places=3)
+        top = players[self.profiles[1].pk]
+        self.assertEqual(top["reach"][:2], [1.0, 1.0])  # bye na primeira rodada
+        self.assertGreater(top["win"], players[self.profiles[6].pk]["win"])
+
+    def test_forecast_uses_player_ratings(self):
+        from ratings.models import PlayerRating
+        PlayerRating.objects.create(player=self.profiles[6], rating=2400, deviation=50)
+        players = self._forecast()
+        self.assertGreater(players[self.profiles[6].pk]["win"], players[self.profiles[1].pk]["win"])
+
+    def test_forecast_respects_results_and_is_cached(self):
+        self._forecast()
+        with mock.patch("tournament.forecast.simulate") as simulate:
+            self._forecast()
+        simulate.assert_not_called()
+
+        match = self._match(1, 2).match
+        self.client.patch(f"/api/matches/{match.match_id}/", {"winner1": self.profiles[5].pk}, format="json")
+        players = self._forecast()
+        self.assertEqual(players[self.profiles[4].pk]["win"], 0)
+        self.assertEqual(players[self.profiles[5].pk]["reach"][1], 1.0)
+
+    def test_forecast_workers_are_validated_and_capped(self):
+        url = f"/api/tournament/{self.tournament.pk}/forecast/"
+        for workers in ("abc", "0"):
+            response = self.client.get(url, {"simulations": 1000, "workers": workers})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with mock.patch("tournament.views.tournament_forecast", return_value={}) as run:
+            self.client.get(url, {"simulations": 1000, "workers": 100000})
+        self.assertEqual(run.call_args.args[2], forecast.MAX_WORKERS)
+
+
+class ListScheduleTests(TestCase):
+    start = datetime(2025, 6, 1, 8, tzinfo=dt_timezone.utc)
+    duration = timedelta(minutes=60)
+    rest = timedelta(minutes=30)
+
+    def _bracket_jobs(self, size):
+        """
+        Chave completa de eliminação: 2k-1 e 2k alimentam k na rodada seguinte.
+        """
+        jobs, ids, round_number = [], 0, 1
+        players = iter(range(size))
+        matches = size // 2
+        while matches:
+            first = ids + 1
+            for number in range(1, matches + 1):
+                ids += 1
+                next_id = first + matches + (number - 1) // 2 if matches > 1 else None
+                known = {next(players), next(players)} if round_number == 1 else set()
+                jobs.append(Job(ids, next_id, known, (round_number, number)))
+            matches //= 2
+            round_number += 1
+        return jobs
+
+    def test_large_bracket_respects_dependencies_and_courts(self):
+        jobs = self._bracket_jobs(512)
+        began = time.perf_counter()
+        result = list_schedule(jobs, 20, self.start, None, self.duration, self.rest)
+        self.assertLess(time.perf_counter() - began, 1.0)
+        self.assertEqual(len(result), 511)
+
+        for job in jobs:
+            if job.next_id:
+                self.assertGreaterEqual(result[job.next_id][1], result[job.id][2] + self.rest)
+        by_court = {}
+        for court, start, end in result.values():
+            by_court.setdefault(court, []).append((start, end))
+        for slots in by_court.values():
+            slots.sort()
+            for (_, end), (start, _) in zip(slots, slots[1:]):
+                self.assertLessEqual(end, start)
+
+    def test_player_rest_and_court_availability(self):
+        jobs = [Job(1, None, {1, 2}, (1, 1)), Job(2, None, {1, 3}, (1, 2))]
+        late = self.start + timedelta(hours=2)
+        result = list_schedule(jobs, 2, self.start, None, self.duration, self.rest, {1: late})
+        self.assertEqual(result[1], (2, self.start, self.start + self.duration))
+        self.assertEqual(result[2][1], self.start + self.duration + self.rest)
+
+    def test_window_too_short(self):
+        with self.assertRaises(SchedulingError):
+            list_schedule(self._bracket_jobs(8), 1, self.start, self.start + timedelta(hours=3), self.duration, self.rest)
+
+
+class ScheduleTournamentTests(SixPlayerBracketTestCase):
+    def setUp(self):
+        super().setUp()
+        self.start = datetime(2025, 6, 1, 8, tzinfo=dt_timezone.utc)
+        Tournament.objects.filter(pk=self.tournament.pk).update(
+            start_date=self.start, courts=2, match_duration=60, min_rest=30
+        )
+        response = self.client.post(f"/api/tournament/{self.tournament.pk}/schedule/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)  # os byes não ocupam quadra
+
+    def test_schedule_follows_bracket(self):
+        self.assertIsNone(self._match(1, 1).court)
+        first = self._match(1, 2)
+        semi = self._match(2, 1)
+        final = self._match(3, 1)
+        self.assertEqual(first.scheduled_start, self.start)
+        self.assertGreaterEqual(semi.scheduled_start, first.scheduled_end + timedelta(minutes=30))
+        self.assertGreaterEqual(final.scheduled_start, self._match(2, 2).scheduled_end + timedelta(minutes=30))
+
+    def test_overrun_shifts_only_downstream_matches(self):
+        first = self._match(1, 2)
+        other_first = self._match(1, 3)
+        response = self.client.post(
+            f"/api/tournament/{self.tournament.pk}/report_overrun/",
+            {"match_id": first.match_id, "end_time": (first.scheduled_end + timedelta(hours=2)).isoformat()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        semi = self._match(2, 1)
+        self.assertEqual(semi.scheduled_start, first.scheduled_end + timedelta(hours=2, minutes=30))
+        self.assertGreaterEqual(self._match(3, 1).scheduled_start, semi.scheduled_end + timedelta(minutes=30))
+        self.assertEqual(self._match(1, 3).scheduled_start, other_first.scheduled_start)
+        self.assertEqual(self._match(2, 1).scheduled_end - semi.scheduled_start, timedelta(minutes=60))
+
+
+    def _report_overrun(self, tournament_match, delay):
+        return self.client.post(
+            f"/api/tournament/{self.tournament.pk}/report_overrun/",
+            {"match_id": tournament_match.match_id, "end_time": (tournament_match.scheduled_end + delay).isoformat()},
+            format="json",
+        )
+
+    def test_overrun_cascade_keeps_courts_and_rest_consistent(self):
+        first = self._match(1, 2)
+        self.assertEqual(self._report_overrun(first, timedelta(hours=1)).status_code, status.HTTP_200_OK)
+        self.assertEqual(self._report_overrun(self._match(2, 1), timedelta(hours=3)).status_code, status.HTTP_200_OK)
+
+        scheduled = list(TournamentMatch.objects.filter(tournament=self.tournament, court__isnull=False).select_related("match"))
+        rest = timedelta(minutes=30)
+        by_court = {}
+        for tm in scheduled:
+            by_court.setdefault(tm.court, []).append((tm.scheduled_start, tm.scheduled_end))
+            following = tm.next_match
+            if following is not None and following.scheduled_start is not None:
+                self.assertGreaterEqual(following.scheduled_start, tm.scheduled_end + rest)
+        for slots in by_court.values():
+            slots.sort()
+            for (_, end), (start, _) in zip(slots, slots[1:]):
+                self.assertLessEqual(end, start)
+
+    def test_overrun_past_end_date_is_rejected(self):
+        final = self._match(3, 1)
+        Tournament.objects.filter(pk=self.tournament.pk).update(end_date=final.scheduled_end + timedelta(minutes=30))
+        first = self._match(1, 2)
+        response = self._report_overrun(first, timedelta(hours=2))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._match(3, 1).scheduled_start, final.scheduled_start)
+        self.assertEqual(self._match(1, 2).scheduled_end, first.scheduled_end)
+
+class RegistrationTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(username="organizer"))
+        self.tournament = Tournament.objects.create(name="Open", type="single_elimination", max_players=200)
+        users = User.objects.bulk_create([User(username=f"open{i}") for i in range(210)])
+        self.profiles = UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        self.url = f"/api/tournament/{self.tournament.pk}/add_players/"
+
+    def test_bulk_registration_fills_up_to_capacity(self):
+        TournamentPlayer.objects.create(tournament=self.tournament, user=self.profiles[0])
+        user_ids = [profile.pk for profile in self.profiles] + [self.profiles[1].pk, 999999]
+
+        # Torneio, trava, consulta dos jogadores, contagem, bulk_create (dois lotes no SQLite),
+        # fim da fila e savepoints
+        with self.assertNumQueries(9):
+            response = self.client.post(self.url, {"user_ids": user_ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["registered"], 199)
+
+        results = {result["user_id"]: result["status"] for result in response.data["results"]}
+        self.assertEqual(results[self.profiles[0].pk], "already_registered")
+        self.assertEqual(results[self.profiles[199].pk], "registered")
+        self.assertEqual(results[self.profiles[200].pk], "waitlisted")
+        self.assertEqual(results[999999], "not_found")
+        self.assertEqual(TournamentPlayer.objects.filter(tournament=self.tournament, status="registered").count(), 200)
+        self.assertEqual(TournamentPlayer.objects.get(user=self.profiles[209]).waitlist_position, 10)
+
+    def test_registration_closed(self):
+        Tournament.objects.filter(pk=self.tournament.pk).update(subscription_until=datetime(2020, 1, 1, tzinfo=dt_timezone.utc))
+        response = self.client.post(self.url, {"user_ids": [self.profiles[0].pk]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Tournament.objects.filter(pk=self.tournament.pk).update(subscription_until=None, started=True)
+        response = self.client.post(
+            f"/api/tournament/{self.tournament.pk}/add_player/", {"user_id": self.profiles[0].pk}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TournamentPlayer.objects.filter(tournament=self.tournament).exists())
+
+    def test_add_player_respects_capacity(self):
+        Tournament.objects.filter(pk=self.tournament.pk).update(max_players=1)
+        url = f"/api/tournament/{self.tournament.pk}/add_player/"
+        response = self.client.post(url, {"user_id": self.profiles[0].pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["user"]["id"], self.profiles[0].pk)
+        response = self.client.post(url, {"user_id": self.profiles[1].pk}, format="json")
+        self.assertEqual(response.data["status"], "waitlisted")
+        self.assertEqual(response.data["waitlist_position"], 1)
+
+
+class WaitlistTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(username="organizer"))
+        self.tournament = Tournament.objects.create(name="Club", type="single_elimination", max_players=2)
+        users = User.objects.bulk_create([User(username=f"club{i}") for i in range(6)])
+        self.profiles = UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        self.client.post(
+            f"/api/tournament/{self.tournament.pk}/add_players/",
+            {"user_ids": [profile.pk for profile in self.profiles]},
+            format="json",
+        )
+
+    def _remove(self, profile):
+        return self.client.post(
+            f"/api/tournament/{self.tournament.pk}/remove_player/", {"user_id": profile.pk}, format="json"
+        )
+
+    def _waitlist(self):
+        response = self.client.get(f"/api/tournament/{self.tournament.pk}/waitlist/")
+        return [(entry["user"]["id"], entry["place"]) for entry in response.data["results"]]
+
+    def test_removal_promotes_head_in_constant_queries(self):
+        self.assertEqual(self._waitlist(), [(p.pk, i + 1) for i, p in enumerate(self.profiles[2:])])
+
+        # Torneio, trava, inscrição, delete, cabeça da fila, promoção, avanço da cabeça e savepoints
+        with self.assertNumQueries(9):
+            response = self._remove(self.profiles[0])
+        self.assertEqual(response.data["promoted"], self.profiles[2].pk)
+        promoted = TournamentPlayer.objects.get(tournament=self.tournament, user=self.profiles[2])
+        self.assertEqual((promoted.status, promoted.waitlist_position), ("registered", None))
+        self.assertEqual(self._waitlist(), [(self.profiles[3].pk, 1), (self.profiles[4].pk, 2), (self.profiles[5].pk, 3)])
+
+    def test_leaving_the_waitlist_keeps_places_contiguous(self):
+        response = self._remove(self.profiles[3])
+        self.assertIsNone(response.data["promoted"])
+        self.assertEqual(self._waitlist(), [(self.profiles[2].pk, 1), (self.profiles[4].pk, 2), (self.profiles[5].pk, 3)])
+
+        self._remove(self.profiles[1])
+        self.assertEqual(self._waitlist(), [(self.profiles[4].pk, 1), (self.profiles[5].pk, 2)])
+        response = self.client.post(
+            f"/api/tournament/{self.tournament.pk}/add_player/", {"user_id": self.profiles[3].pk}, format="json"
+        )
+        self.assertEqual(self._waitlist()[-1], (self.profiles[3].pk, 3))
+
+    def test_leaving_from_the_head_only_moves_the_pointer(self):
+        self._remove(self.profiles[2])
+        self.tournament.refresh_from_db()
+        self.assertEqual((self.tournament.waitlist_head, self.tournament.waitlist_tail), (2, 4))
+        self.assertEqual(self._waitlist(), [(self.profiles[3].pk, 1), (self.profiles[4].pk, 2), (self.profiles[5].pk, 3)])
+
+    def test_removal_with_empty_or_stale_waitlist(self):
+        # Fila esvaziada por fora, com os ponteiros ainda marcando quatro lugares
+        TournamentPlayer.objects.filter(tournament=self.tournament, status="waitlisted").delete()
+        response = self._remove(self.profiles[0])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["promoted"])
+        self.tournament.refresh_from_db()
+        self.assertGreater(self.tournament.waitlist_head, self.tournament.waitlist_tail)
+
+        response = self._remove(self.profiles[1])
+        self.assertIsNone(response.data["promoted"])
+
+    def test_promotion_skips_a_head_pointer_left_behind(self):
+        TournamentPlayer.objects.filter(tournament=self.tournament, user=self.profiles[2]).delete()
+        response = self._remove(self.profiles[0])
+        self.assertEqual(response.data["promoted"], self.profiles[3].pk)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.waitlist_head, 3)
+
+
+class LifecycleTests(TestCase):
+    def setUp(self):
+        self.now = datetime(2025, 6, 1, 12, tzinfo=dt_timezone.utc)
+        hour = timedelta(hours=1)
+        self.closing = Tournament.objects.create(
+            name="Closing", type="single_elimination", subscription_until=self.now - hour, start_date=self.now + hour
+        )
+        self.starting = Tournament.objects.create(
+            name="Starting", type="round_robin", start_date=self.now - hour, end_date=self.now + hour, auto_generate=True
+        )
+        self.ending = Tournament.objects.create(
+            name="Ending", type="single_elimination", start_date=self.now - 2 * hour, end_date=self.now - hour,
+            started=True, registration_open=False,
+        )
+        self.future = Tournament.objects.create(name="Future", type="single_elimination", start_date=self.now + hour)
+        users = User.objects.bulk_create([User(username=f"life{i}") for i in range(3)])
+        profiles = UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        TournamentPlayer.objects.bulk_create([TournamentPlayer(tournament=self.starting, user=p) for p in profiles])
+
+    def test_due_tournaments_single_query(self):
+        with self.assertNumQueries(1):
+            due = {t.name for t in due_tournaments(self.now)}
+        self.assertEqual(due, {"Closing", "Starting", "Ending"})
+
+    def test_transitions_are_applied_once(self):
+        summary = process_due(self.now)
+        self.assertEqual(summary, {"closed": 2, "started": 1, "generated": 1, "finished": 1, "expired": 0})
+
+        self.closing.refresh_from_db()
+        self.starting.refresh_from_db()
+        self.ending.refresh_from_db()
+        self.assertFalse(self.closing.registration_open)
+        self.assertFalse(self.closing.started)
+        self.assertTrue(self.starting.started)
+        self.assertTrue(self.ending.finished)
+        self.assertEqual(TournamentMatch.objects.filter(tournament=self.starting).count(), 3)
+        self.assertTrue(Tournament.objects.get(pk=self.future.pk).registration_open)
+
+        # Uma segunda execução não encontra nada a fazer
+        self.assertEqual(process_due(self.now), {"closed": 0, "started": 0, "generated": 0, "finished": 0, "expired": 0})
+        self.assertEqual(TournamentMatch.objects.filter(tournament=self.starting).count(), 3)
+
+    def test_tournament_past_its_end_is_only_finished(self):
+        missed = Tournament.objects.create(
+            name="Missed", type="round_robin", start_date=self.now - timedelta(days=2),
+            end_date=self.now - timedelta(days=1), auto_generate=True,
+        )
+        TournamentPlayer.objects.bulk_create([
+            TournamentPlayer(tournament=missed, user=player.user) for player in TournamentPlayer.objects.filter(tournament=self.starting)
+        ])
+        with self.assertLogs("tournament.lifecycle", "WARNING"):
+            summary = process_due(self.now)
+        self.assertEqual((summary["started"], summary["generated"], summary["finished"], summary["expired"]), (1, 1, 2, 1))
+        missed.refresh_from_db()
+        self.assertEqual((missed.started, missed.finished, missed.registration_open), (False, True, False))
+        self.assertFalse(TournamentMatch.objects.filter(tournament=missed).exists())
+        self.assertNotIn(missed, due_tournaments(self.now))
+
+    def test_command(self):
+        # O comando usa o relógio real: "Starting" não pode ter passado do fim
+        Tournament.objects.filter(pk=self.starting.pk).update(end_date=datetime.now(dt_timezone.utc) + timedelta(days=1))
+        out = StringIO()
+        call_command("process_tournaments", stdout=out)
+        self.assertIn("partidas geradas: 1", out.getvalue())
@@ -1,35 +1,21 @@
-import random
+from . import seeding
+
+
 def seeding_order(n):
     """
-    Constrói recursivamente a ordem do bracket para n jogadores (n é potência de 2).
+    Ordem do bracket para n jogadores (n é potência de 2).
     Para n == 2, retorna [1, 2].
     Para n maior, retorna a ordem que garante que os seeds mais altos se encontrem por último.
     """
-    if n == 2:
-        return [1, 2]
-    previous = seeding_order(n // 2)
-    bracket = []
-    for seed in previous:
-        bracket.append(seed)
-        bracket.append(n + 1 - seed)
-    return bracket
+    return list(seeding.bracket_order(n))
 
 def fill_null_seeds(players, bracket_size):
     """
-    Preenche os seeds nulos dos jogadores restantes.
+    Preenche os seeds nulos dos jogadores restantes e grava os que mudaram,
+    como antes. Quem precisa só do cálculo usa seeding.assign_missing_seeds.
     """
-    seed = 1
-    available_seeds = list(range(1, len(players) + 1))
-    for player in players:
-        if player.seed is not None:
-            available_seeds.remove(player.seed)
-
-    random.shuffle(available_seeds)
-    for player in players:
-        if player.seed is None:
-            player.seed = available_seeds.pop()
-            player.save()
-    
+    for player in seeding.assign_missing_seeds(players):
+        player.save()
     return players
 
 def fit_players_in_bracket(players, bracket_order):
@@ -38,12 +24,4 @@ def fit_players_in_bracket(players, bracket_order):
     Identifica seeds faltantes e os preenche com jogadores nulos.
     """
     players_by_seed = {player.seed: player for player in players}
-    sorted_players = []
-    for seed in bracket_order:
-        player = players_by_seed.get(seed)
-        if player:
-            sorted_players.append(player)
-        else:
-            sorted_players.append(None)
-    
-    return sorted_players
\ No newline at end of file
+    return [players_by_seed.get(seed) for seed in bracket_order]
@@ -2,156 +2,262 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db import transaction
+from django.db.models import F, Max, Q
 from .models import Tournament, TournamentPlayer, TournamentMatch
 from users.models import UserProfile
 from matches.models import Match
-from .serializers import TournamentPlayerSerializer, TournamentSerializer, TournamentMatchSerializer
-from .utils import seeding_order, fill_null_seeds, fit_players_in_bracket
+from .serializers import TournamentPlayerSerializer, TournamentSerializer, TournamentMatchSerializer, TournamentStandingSerializer, WaitlistEntrySerializer
+from .seeding import persist_seeds, seed_from_ranking
+from .bracket import preview_bracket
+from . import repair
+from .forecast import tournament_forecast, DEFAULT_SIMULATIONS, MAX_SIMULATIONS, MAX_WORKERS
+from .draw import DrawError, generate_draw, pair_swiss_round
+from .standings import ranked_standings
+from .scheduling import SchedulingError, schedule_tournament, shift_downstream
+from django.utils.dateparse import parse_datetime
+from .pagination import TournamentPagination
+from . import registration
 
 class TournamentViewSet(viewsets.ModelViewSet):
     queryset = Tournament.objects.all()
     serializer_class = TournamentSerializer
 
+    def _paginated(self, queryset, serializer_class):
+        """
+        Serializa uma página da lista; a consulta já deve trazer as relações aninhadas.
+        """
+        paginator = TournamentPagination()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
     @action(detail=True, methods=["post"])
     def generate_bracket(self, request, pk=None):
         """
-        Gera partidas para um torneio de eliminação única.
+        Gera partidas para o torneio de acordo com o seu tipo.
+        Eliminação única gera a chave, pontos corridos a tabela completa e suíço a primeira rodada.
         """
         tournament: Tournament = self.get_object()
-        players = list(TournamentPlayer.objects.filter(tournament=tournament))
+        try:
+            message = generate_draw(tournament)
+        except DrawError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": message}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"])
+    def bracket_preview(self, request, pk=None):
+        """
+        Simula a chave de eliminação em memória, sem gravar nada.
+        A prévia fica em cache pelos inscritos e seeds atuais e é reaproveitada por generate_bracket.
+        """
+        tournament = self.get_object()
+        if tournament.type in ("round_robin", "swiss"):
+            return Response({"error": "Prévia disponível apenas para torneios de eliminação"}, status=status.HTTP_400_BAD_REQUEST)
 
+        players = list(TournamentPlayer.objects.filter(tournament=tournament).exclude(status="waitlisted").select_related("user__user"))
         if len(players) < 2:
             return Response({"error": "Pelo menos 2 jogadores são necessários"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Garantir que o número máximo de jogadores seja uma potência de 2
-        bracket_size = 2
-        while len(players) > bracket_size:
-            bracket_size *= 2
-
-        # Lista com ordem de seeds para o bracket
-        match_order = seeding_order(bracket_size)
-        
-        # Preencher jogadores sem seed
-        players = fill_null_seeds(players, bracket_size)
-
-        # Ordenar jogadores de acordo com a ordem de seeds
-        players = fit_players_in_bracket(players, match_order)
-
-        players = players[::-1]  # Inverter a ordem para que o seed 1 seja o último
-
-        with transaction.atomic():
-            matches = []
-            next_round_matches = []
-            round_number = 1
-            match_number = 1
-
-            # Criando a primeira rodada
-            while len(players) >= 2:
-                p1, p2 = players.pop(), players.pop()
-
-                if not p1:
-                    p1_user = None
-                else:
-                    p1_user = p1.user
-                if not p2:
-                    p2_user = None
-                else:
-                    p2_user = p2.user
-
-                match = Match.objects.create(
-                    community_id=tournament.community_id,
-                    home1=p1_user,
-                    away1=p2_user,
-                )
-
-                tournament_match = TournamentMatch.objects.create(
-                    match=match,
-                    tournament=tournament,
-                    match_number=match_number,
-                    round=round_number
-                )
-                matches.append(tournament_match)
-                next_round_matches.append(tournament_match)
-                match_number += 1
-
-            # Criando rodadas subsequentes
-            while len(next_round_matches) > 1:
-                current_round_matches: list[TournamentMatch] = next_round_matches
-                next_round_matches = []
-                round_number += 1
-                match_number = 1
-
-                while len(current_round_matches) >= 2:
-                    current_round_matches = current_round_matches[::-1]
-                    m1, m2 = current_round_matches.pop(), current_round_matches.pop()
-                        
-                    if round_number == 2:
-                        m1_bye = None
-                        m2_bye = None
-                        if not m1.match.home1:
-                            m1_bye = m1.match.away1
-                        elif not m1.match.away1:
-                            m1_bye = m1.match.home1
-                        if not m2.match.home1:
-                            m2_bye = m2.match.away1
-                        elif not m2.match.away1:
-                            m2_bye = m2.match.home1
-                        
-                        match = Match.objects.create(
-                                home1 = m1_bye,
-                                away1 = m2_bye,
-                                community_id=tournament.community_id,
-                            )
-                    else:
-                        match = Match.objects.create(
-                            community_id=tournament.community_id,
-                        )
-        
-                    next_match = TournamentMatch.objects.create(
-                        match=match,
-                        tournament=tournament,
-                        match_number=match_number,
-                        round=round_number
-                    )
-
-                    # Conectar partidas anteriores com a próxima
-                    m1.next_match = next_match
-                    m1.save()
-                    m2.next_match = next_match
-                    m2.save()
-
-                    next_round_matches.append(next_match)
-                    match_number += 1
-
-        return Response({"message": "Bracket gerado com sucesso"}, status=status.HTTP_201_CREATED)
+        plan = preview_bracket(tournament, players)
+        names = {player.user_id: str(player.user) for player in players}
+
+        def entry(user_id):
+            if user_id is None:
+                return None
+            return {"id": user_id, "name": names.get(user_id), "seed": plan["seeds"].get(user_id)}
+
+        rounds = [
+            [
+                {"round": round_number, "match_number": match_number, "home": entry(home), "away": entry(away), "winner": entry(winner)}
+                for match_number, (home, away, winner) in enumerate(matches, start=1)
+            ]
+            for round_number, matches in enumerate(plan["rounds"], start=1)
+        ]
+        return Response({"preview": plan["digest"], "size": plan["size"], "rounds": rounds})
+
+    @action(detail=True, methods=["post"])
+    def withdraw_player(self, request, pk=None):
+        """
+        Retira um jogador de uma chave já gerada; o adversário avança por W.O.
+        Apenas as partidas afetadas são alteradas.
+        """
+        tournament = self.get_object()
+        user_id = request.data.get("user_id")
+        if tournament.type in ("round_robin", "swiss"):
+            return Response({"error": "Apenas torneios de eliminação"}, status=status.HTTP_400_BAD_REQUEST)
+        if not TournamentPlayer.objects.filter(tournament=tournament, user=user_id).exists():
+            return Response({"error": "O jogador não está inscrito no torneio"}, status=status.HTTP_400_BAD_REQUEST)
+
+        affected = repair.withdraw_player(tournament, user_id)
+        if affected is None:
+            return Response({"message": "Jogador retirado; não havia partidas pendentes"}, status=status.HTTP_200_OK)
+        return Response(TournamentMatchSerializer(TournamentMatch.objects.select_related("match").get(pk=affected.pk)).data)
+
+    @action(detail=True, methods=["post"])
+    def late_entry(self, request, pk=None):
+        """
+        Inscreve um jogador depois da chave gerada, ocupando o lugar de um bye da primeira rodada.
+        Respeita o limite de jogadores; quem estava na lista de espera sai dela.
+        """
+        tournament = self.get_object()
+        user_id = request.data.get("user_id")
+        if tournament.type in ("round_robin", "swiss"):
+            return Response({"error": "Apenas torneios de eliminação"}, status=status.HTTP_400_BAD_REQUEST)
+        if not UserProfile.objects.filter(pk=user_id).exists():
+            return Response({"error": "Jogador não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        if TournamentMatch.objects.filter(tournament=tournament, round=1).filter(
+            Q(match__home1_id=user_id) | Q(match__away1_id=user_id)
+        ).exists():
+            return Response({"error": "O jogador já está na chave"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            entry = repair.late_entry(tournament, user_id)
+        except registration.RegistrationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if entry is None:
+            return Response({"error": "Não há vagas de bye disponíveis na chave"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TournamentMatchSerializer(TournamentMatch.objects.select_related("match").get(pk=entry.pk)).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"])
+    def forecast(self, request, pk=None):
+        """
+        Previsão por Monte Carlo da chance de cada jogador chegar a cada rodada e ser campeão.
+        Parâmetros opcionais: simulations e workers (número de processos, limitado a MAX_WORKERS).
+        O resultado fica em cache até algum resultado da chave mudar.
+        """
+        tournament = self.get_object()
+        if tournament.type in ("round_robin", "swiss"):
+            return Response({"error": "Previsão disponível apenas para torneios de eliminação"}, status=status.HTTP_400_BAD_REQUEST)
+        if not TournamentMatch.objects.filter(tournament=tournament).exists():
+            return Response({"error": "A chave ainda não foi gerada"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            simulations = int(request.query_params.get("simulations", DEFAULT_SIMULATIONS))
+            workers = int(request.query_params.get("workers", 1))
+        except ValueError:
+            return Response({"error": "simulations e workers devem ser inteiros"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= simulations <= MAX_SIMULATIONS:
+            return Response({"error": f"simulations deve estar entre 1 e {MAX_SIMULATIONS}"}, status=status.HTTP_400_BAD_REQUEST)
+        if workers < 1:
+            return Response({"error": "workers deve ser positivo"}, status=status.HTTP_400_BAD_REQUEST)
+        workers = min(workers, MAX_WORKERS)
+
+        return Response(tournament_forecast(tournament, simulations, workers))
+
+    @action(detail=True, methods=["post"])
+    def schedule(self, request, pk=None):
+        """
+        Distribui as partidas pendentes entre as quadras do torneio, respeitando
+        a ordem da chave, o descanso mínimo dos jogadores e a janela do torneio.
+        Parâmetro opcional court_available_from: {quadra: data/hora em que fica livre}.
+        """
+        tournament = self.get_object()
+        court_free = {}
+        for court, value in (request.data.get("court_available_from") or {}).items():
+            available = parse_datetime(str(value))
+            if available is None or not str(court).isdigit():
+                return Response({"error": "court_available_from deve mapear quadras para datas"}, status=status.HTTP_400_BAD_REQUEST)
+            court_free[int(court)] = available
+
+        try:
+            with transaction.atomic():
+                scheduled = schedule_tournament(tournament, court_free)
+        except SchedulingError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TournamentMatchSerializer(scheduled, many=True).data)
+
+    @action(detail=True, methods=["post"])
+    def report_overrun(self, request, pk=None):
+        """
+        Informa que uma partida terminou depois do previsto (match_id e end_time).
+        Só as partidas que dependem dela são empurradas para frente; se alguma
+        passar do fim do torneio, nada é alterado.
+        """
+        tournament = self.get_object()
+        end_time = parse_datetime(str(request.data.get("end_time", "")))
+        if end_time is None:
+            return Response({"error": "end_time é obrigatório"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            tournament_match = TournamentMatch.objects.get(tournament=tournament, match_id=request.data.get("match_id"))
+        except (TournamentMatch.DoesNotExist, ValueError):
+            return Response({"error": "Partida não encontrada"}, status=status.HTTP_404_NOT_FOUND)
+        if tournament_match.scheduled_start is None:
+            return Response({"error": "A partida ainda não foi agendada"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            moved = shift_downstream(tournament, tournament_match, end_time)
+        except SchedulingError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TournamentMatchSerializer(moved, many=True).data)
+
+    @action(detail=True, methods=["post"])
+    def seed_players(self, request, pk=None):
+        """
+        Define os seeds a partir de um ranking (lista de ids de UserProfile, melhor primeiro).
+        Jogadores fora do ranking recebem os seeds restantes por sorteio.
+        """
+        tournament = self.get_object()
+        ranking = request.data.get("ranking")
+        if not isinstance(ranking, list):
+            return Response({"error": "O ranking deve ser uma lista de ids de jogadores"}, status=status.HTTP_400_BAD_REQUEST)
+
+        players = list(TournamentPlayer.objects.filter(tournament=tournament).exclude(status="waitlisted"))
+        persist_seeds(seed_from_ranking(players, ranking))
+        players.sort(key=lambda player: player.seed)
+        return Response([{"user": player.user_id, "seed": player.seed} for player in players])
+
+    @action(detail=True, methods=["post"])
+    def next_round(self, request, pk=None):
+        """
+        Emparelha a próxima rodada de um torneio suíço.
+        """
+        tournament = self.get_object()
+        if tournament.type != "swiss":
+            return Response({"error": "Apenas torneios suíços são emparelhados por rodada"}, status=status.HTTP_400_BAD_REQUEST)
+
+        last_round = TournamentMatch.objects.filter(tournament=tournament).aggregate(Max("round"))["round__max"]
+        if last_round is None:
+            return Response({"error": "A primeira rodada ainda não foi gerada"}, status=status.HTTP_400_BAD_REQUEST)
+        if Match.objects.filter(tournament_match__tournament=tournament, winner1__isnull=True).exists():
+            return Response({"error": "A rodada atual ainda não terminou"}, status=status.HTTP_400_BAD_REQUEST)
+
+        message = pair_swiss_round(tournament, last_round + 1)
+        return Response({"message": message}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"])
+    def standings(self, request, pk=None):
+        """
+        Retorna a classificação de um torneio de pontos corridos ou suíço, paginada.
+        """
+        tournament = self.get_object()
+        return self._paginated(ranked_standings(tournament), TournamentStandingSerializer)
 
     # TODO Checagens de permissão/validação
     @action(detail=True, methods=["get"])
     def players(self, request, pk=None):
         """
-        Retorna todos os jogadores inscritos em um torneio.
+        Retorna os jogadores inscritos em um torneio, paginados.
         """
         tournament = self.get_object()
-        players = TournamentPlayer.objects.filter(tournament=tournament)
-        serializer = TournamentPlayerSerializer(players, many=True)
-        return Response(serializer.data)
+        players = (
+            TournamentPlayer.objects.filter(tournament=tournament)
+            .select_related("user__user")
+            .order_by("seed", "id")
+        )
+        return self._paginated(players, TournamentPlayerSerializer)
 
     @action(detail=True, methods=["get"], url_path="players/(?P<player_id>[^/.]+)")
     def player_detail(self, request, pk=None, player_id=None):
         """
         Retorna os detalhes de um jogador específico do torneio.
         """
-        tournament = self.get_object()
-        
         try:
-            player = UserProfile.objects.get(id=player_id)
-            player = TournamentPlayer.objects.get(tournament=tournament, user=player)
-            serializer = TournamentPlayerSerializer(player)
-            return Response(serializer.data)
-        except TournamentPlayer.DoesNotExist:
-            return Response({"error": "Player not found in tournament"}, status=status.HTTP_404_NOT_FOUND)    
+            player = TournamentPlayer.objects.select_related("user__user").get(tournament_id=pk, user_id=player_id)
+        except (TournamentPlayer.DoesNotExist, ValueError):
+            return Response({"error": "Player not found in tournament"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(TournamentPlayerSerializer(player).data)
     
-    # TODO Checagens de permissão/validação/torneio ja iniciou
+    # TODO Checagens de permissão
     @action(detail=True, methods=["post"])
     def add_player(self, request, pk=None):
         """
@@ -162,55 +268,103 @@ class TournamentViewSet(viewsets.ModelViewSet):
         user_id = request.data.get("user_id")
         print(f"User {action_user} is trying to add user {user_id} to tournament {pk}")
 
-        if TournamentPlayer.objects.filter(tournament=tournament, user=user_id).exists():
+        try:
+            entries, outcomes = registration.register_players(tournament.pk, [user_id])
+        except registration.RegistrationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        outcome = outcomes[0][1]
+        if outcome == registration.NOT_FOUND:
+            return Response({"error": "Jogador não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        if outcome == registration.ALREADY_REGISTERED:
             return Response({"error": "O jogador já está inscrito no torneio"}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = UserProfile.objects.get(pk=user_id)
-        player = TournamentPlayer.objects.create(tournament=tournament, user=user)
+        player = TournamentPlayer.objects.select_related("user__user").get(pk=entries[0].pk)
         serializer = TournamentPlayerSerializer(player)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-    
+
+    @action(detail=True, methods=["post"])
+    def add_players(self, request, pk=None):
+        """
+        Inscreve vários jogadores de uma vez (user_ids: lista de ids de UserProfile).
+        Retorna o resultado de cada jogador: registered, waitlisted, already_registered ou not_found.
+        """
+        tournament = self.get_object()
+        user_ids = request.data.get("user_ids")
+        if not isinstance(user_ids, list) or not user_ids:
+            return Response({"error": "user_ids deve ser uma lista de ids de jogadores"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            entries, outcomes = registration.register_players(tournament.pk, user_ids)
+        except registration.RegistrationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {
+                "registered": sum(1 for _, outcome in outcomes if outcome == registration.REGISTERED),
+                "waitlisted": sum(1 for _, outcome in outcomes if outcome == registration.WAITLISTED),
+                "results": [{"user_id": user_id, "status": outcome} for user_id, outcome in outcomes],
+            },
+            status=status.HTTP_201_CREATED if entries else status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["post"])
     def remove_player(self, request, pk=None):
         """
         Remove um jogador de um torneio.
+        Se ele ocupava vaga, o primeiro da lista de espera é inscrito no lugar.
         """
         tournament = self.get_object()
         action_user = request.user
         user_id = request.data.get("user_id")
         print(f"User {action_user} is trying to remove user {user_id} from tournament {pk}")
 
-        player = TournamentPlayer.objects.filter(tournament=tournament, user=user_id)
-        if not player.exists():
+        try:
+            removed, promoted = registration.remove_entry(tournament.pk, user_id)
+        except ValueError:
+            removed = None
+        if removed is None:
             return Response({"error": "O jogador não está inscrito no torneio"}, status=status.HTTP_400_BAD_REQUEST)
 
-        player.delete()
-        return Response({"message": "Jogador removido com sucesso"}, status=status.HTTP_200_OK)
+        return Response({"message": "Jogador removido com sucesso", "promoted": promoted}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["get"])
+    def waitlist(self, request, pk=None):
+        """
+        Retorna a lista de espera em ordem, paginada, com o lugar de cada jogador na fila.
+        """
+        tournament = self.get_object()
+        entries = (
+            TournamentPlayer.objects.filter(tournament=tournament, waitlist_position__isnull=False)
+            .select_related("user__user")
+            .annotate(place=F("waitlist_position") - tournament.waitlist_head + 1)
+            .order_by("waitlist_position")
+        )
+        return self._paginated(entries, WaitlistEntrySerializer)
 
     @action(detail=True, methods=["get"])
     def matches(self, request, pk=None):
         """
-        Retorna todas as partidas de um torneio.
+        Retorna as partidas de um torneio, paginadas.
         """
         tournament = self.get_object()
-        matches = TournamentMatch.objects.filter(tournament=tournament)
-        serializer = TournamentMatchSerializer(matches, many=True)
-        return Response(serializer.data)
+        matches = (
+            TournamentMatch.objects.filter(tournament=tournament)
+            .select_related("match")
+            .order_by("round", "match_number")
+        )
+        return self._paginated(matches, TournamentMatchSerializer)
 
     @action(detail=True, methods=["get"], url_path="matches/(?P<match_id>[^/.]+)")
     def match_detail(self, request, pk=None, match_id=None):
         """
         Retorna os detalhes de uma partida específica do torneio.
         """
-        tournament = self.get_object()
-        
         try:
-            match = Match.objects.get(match_id=match_id)
-            match = TournamentMatch.objects.get(match=match)
-            serializer = TournamentMatchSerializer(match)
-            return Response(serializer.data)
-        except TournamentMatch.DoesNotExist:
+            match = TournamentMatch.objects.select_related("match").get(tournament_id=pk, match_id=match_id)
+        except (TournamentMatch.DoesNotExist, ValueError):
             return Response({"error": "Match not found in tournament"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(TournamentMatchSerializer(match).data)
     
     
 
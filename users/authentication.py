@@ -0,0 +1,28 @@
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.permissions import SAFE_METHODS
+from .models import CalendarToken
+
+
+class CalendarTokenAuthentication(BaseAuthentication):
+    """
+    Aceita o token de calendário (CalendarToken) no parâmetro ?token=, para clientes
+    (como apps de calendário) que assinam uma URL e não enviam cabeçalhos.
+    Só vale em leituras e só nas views que o listam explicitamente (os feeds .ics).
+    """
+    keyword = "Token"
+
+    def authenticate(self, request):
+        key = request.query_params.get("token")
+        if not key or request.method not in SAFE_METHODS:
+            return None
+        try:
+            token = CalendarToken.objects.select_related("user").get(key=key)
+        except CalendarToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Token de calendário inválido.")
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("Usuário inativo ou removido.")
+        return (token.user, token)
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,119 @@
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+
+THUMBNAIL_SIZE = (128, 128)  # Recorte quadrado para avatares em listas
+MEDIUM_SIZE = (640, 640)  # Maior lado, para perfis e cabeçalhos
+WEBP = features.check("webp")
+FORMAT, EXTENSION = ("WEBP", "webp") if WEBP else ("JPEG", "jpg")
+QUALITY = 80
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_name(picture_name, variant):
+    """
+    users/foto.jpg -> users/variants/foto_thumb.webp
+    """
+    folder, filename = posixpath.split(picture_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(folder, "variants", f"{stem}_{variant}.{EXTENSION}")
+
+
+def needs_processing(instance):
+    """
+    Se a imagem atual ainda não tem variantes (nova imagem ou imagem trocada).
+    """
+    if not instance.picture:
+        return bool(instance.picture_thumbnail)
+    return instance.picture_thumbnail.name != variant_name(instance.picture.name, "thumb")
+
+
+def _encode(image):
+    # Sem exif/icc: a imagem reencodada não carrega os metadados do arquivo original
+    buffer = io.BytesIO()
+    if FORMAT == "WEBP":
+        image.save(buffer, FORMAT, quality=QUALITY, method=4)
+    else:
+        image.convert("RGB").save(buffer, FORMAT, quality=QUALITY, optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def render_variants(source):
+    """
+    Gera (miniatura, média) a partir de um arquivo de imagem, já na orientação do EXIF.
+    """
+    with Image.open(source) as image:
+        # Em JPEG, decodifica direto numa escala reduzida: bem mais rápido para fotos de celular
+        image.draft("RGB", (MEDIUM_SIZE[0] * 2, MEDIUM_SIZE[1] * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        thumbnail = ImageOps.fit(image, THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+        medium = image.copy()
+        medium.thumbnail(MEDIUM_SIZE, Image.Resampling.LANCZOS)
+    return _encode(thumbnail), _encode(medium)
+
+
+def process_picture(model, pk):
+    """
+    Gera e grava as variantes da imagem de um objeto (Community ou UserProfile).
+    A gravação só acontece se a imagem não mudou enquanto era processada.
+    """
+    instance = model.objects.filter(pk=pk).only("picture", "picture_thumbnail", "picture_medium").first()
+    if instance is None:
+        return
+    if not instance.picture:
+        model.objects.filter(pk=pk, picture="").update(picture_thumbnail="", picture_medium="")
+        return
+
+    storage = instance.picture.storage
+    with instance.picture.open("rb") as source:
+        thumbnail, medium = render_variants(source)
+    names = {}
+    for field, variant, content in (("picture_thumbnail", "thumb", thumbnail), ("picture_medium", "medium", medium)):
+        name = variant_name(instance.picture.name, variant)
+        if storage.exists(name):
+            storage.delete(name)
+        names[field] = storage.save(name, content)
+    model.objects.filter(pk=pk, picture=instance.picture.name).update(**names)
+
+
+def _run(model, pk):
+    # O future do pool é descartado: sem este log, um arquivo que não é imagem ou uma
+    # falha do storage deixariam as variantes faltando sem nenhum sinal
+    try:
+        process_picture(model, pk)
+    except Exception:
+        logger.exception("Falha ao gerar as variantes da imagem de %s %s", model.__name__, pk)
+    finally:
+        # Cada thread do pool tem a sua conexão
+        connection.close()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_WORKERS", 2), thread_name_prefix="images"
+            )
+    return _executor
+
+
+def schedule(instance):
+    """
+    Processa a imagem fora da thread do request, depois do commit que a gravou.
+    """
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: executor().submit(_run, model, pk))
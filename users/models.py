@@ -1,13 +1,36 @@
+import secrets
+
 from django.db import models
 from django.conf import settings
 
 class UserProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="profile")
     picture = models.ImageField(upload_to="users/", null=True, blank=True)
+    # Variantes geradas por users/images.py, sem metadados
+    picture_thumbnail = models.ImageField(upload_to="users/variants/", null=True, blank=True, editable=False)
+    picture_medium = models.ImageField(upload_to="users/variants/", null=True, blank=True, editable=False)
     forehand = models.CharField(max_length=255, null=True, blank=True)
     backhand = models.CharField(max_length=255, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
 
     def __str__(self):
         return self.user.first_name + " " + self.user.last_name
-    
\ No newline at end of file
+    
+
+
+class CalendarToken(models.Model):
+    """
+    Token só de leitura para assinar os calendários .ics. Vai na URL (?token=), por isso
+    é separado do token da API: vazar a URL de um feed não dá acesso ao resto da API.
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="calendar_token")
+    created = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def issue(cls, user):
+        """
+        Gera um novo token para o usuário, revogando o anterior.
+        """
+        cls.objects.filter(user=user).delete()
+        return cls.objects.create(user=user, key=secrets.token_hex(20))
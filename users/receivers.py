@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .images import needs_processing, schedule
+from .models import UserProfile
+
+
+@receiver(post_save, sender=UserProfile)
+def process_picture(sender, instance, **kwargs):
+    """
+    Gera as variantes da nova imagem de perfil em segundo plano.
+    """
+    if needs_processing(instance):
+        schedule(instance)
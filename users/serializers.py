@@ -10,13 +10,19 @@ class SimpleUserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
+# Public User serializer (no email), for lists any authenticated user can read
+class PublicUserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+
 # Simplified UserProfile serializer for nested use
 class SimpleUserProfileSerializer(serializers.ModelSerializer):
     user = SimpleUserSerializer(read_only=True)
     
     class Meta:
         model = UserProfile
-        fields = ['id', 'user', 'forehand', 'backhand', 'picture']
+        fields = ['id', 'user', 'forehand', 'backhand', 'picture', 'picture_thumbnail', 'picture_medium']
 
 class UserSerializer(serializers.ModelSerializer):
     # Allow passing extra profile data in the "profile" field
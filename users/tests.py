@@ -1,7 +1,17 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
 from rest_framework.test import APITestCase
 from rest_framework import status
 from users.models import UserProfile
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from users import images
+from users.serializers import SimpleUserProfileSerializer
 
 User = get_user_model()
 
@@ -77,4 +87,80 @@ class UserTests(APITestCase):
         # Use the "Token" prefix as expected by DRF TokenAuthentication.
         self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
         response = self.client.post('/api/users/logout/')
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class InlineExecutor:
+    def submit(self, fn, model, pk):
+        images.process_picture(model, pk)
+
+
+class PictureVariantTests(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch("users.images.executor", return_value=InlineExecutor())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.profile = UserProfile.objects.create(user=User.objects.create_user(username="photogenic"))
+
+    def _photo(self, name, size=(3000, 2000)):
+        image = Image.new("RGB", size, (200, 120, 40))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientação: girar 90 graus
+        exif[0x010F] = "PhoneMaker"
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", exif=exif, quality=95)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def _upload(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.picture = self._photo(name)
+            self.profile.save()
+        self.profile.refresh_from_db()
+
+    def test_variants_are_small_and_without_metadata(self):
+        self._upload("me.jpg")
+        with self.profile.picture_thumbnail.open("rb") as file, Image.open(file) as thumbnail:
+            self.assertEqual(thumbnail.size, images.THUMBNAIL_SIZE)
+            self.assertEqual(thumbnail.format, images.FORMAT)
+            self.assertEqual(len(thumbnail.getexif()), 0)
+        with self.profile.picture_medium.open("rb") as file, Image.open(file) as medium:
+            # A foto estava deitada no EXIF: a variante já sai em pé
+            self.assertEqual(medium.size, (427, 640))
+            self.assertEqual(len(medium.getexif()), 0)
+        self.assertLess(self.profile.picture_thumbnail.size, 20_000)
+
+        data = SimpleUserProfileSerializer(self.profile).data
+        self.assertTrue(data["picture_thumbnail"].endswith(f"me_thumb.{images.EXTENSION}"))
+        self.assertTrue(data["picture_medium"].endswith(f"me_medium.{images.EXTENSION}"))
+
+    def test_new_picture_replaces_variants(self):
+        self._upload("first.jpg")
+        self._upload("second.jpg")
+        self.assertEqual(self.profile.picture_thumbnail.name, images.variant_name(self.profile.picture.name, "thumb"))
+
+        # Salvar sem trocar a imagem não reprocessa
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.profile.forehand = "Left"
+            self.profile.save()
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.picture = None
+            self.profile.save()
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.picture_thumbnail)
+
+    def test_processing_errors_are_logged(self):
+        with self.captureOnCommitCallbacks():
+            self.profile.picture = SimpleUploadedFile("notes.jpg", b"not an image", content_type="image/jpeg")
+            self.profile.save()
+        with mock.patch("users.images.connection"), self.assertLogs("users.images", "ERROR") as logs:
+            images._run(UserProfile, self.profile.pk)
+        self.assertIn(f"UserProfile {self.profile.pk}", logs.output[0])
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.picture_thumbnail)
@@ -6,7 +6,7 @@ from rest_framework.decorators import action
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
 from .serializers import UserSerializer
-from .models import UserProfile
+from .models import CalendarToken, UserProfile
 from community.models import Community, CommunityUsers
 from community.serializers import CommunitySerializer
 from matches.models import Match
@@ -69,7 +69,7 @@ class UserViewSet(viewsets.ModelViewSet):
             # Extract just the communities
             communities = [cu.community for cu in community_users]
             
-            serializer = CommunitySerializer(communities, many=True)
+            serializer = CommunitySerializer(communities, many=True, context={"request": request})
 
             return Response(serializer.data, status=status.HTTP_200_OK)
         except UserProfile.DoesNotExist:
@@ -91,4 +91,19 @@ class UserViewSet(viewsets.ModelViewSet):
         except UserProfile.DoesNotExist:
             return Response({"error": f"User {user} not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=["get", "post", "delete"])
+    def calendar_token(self, request):
+        """
+        Token de calendário do usuário, para as URLs de assinatura .ics (?token=).
+        GET retorna o atual (criando se não houver), POST gera um novo e DELETE revoga.
+        """
+        if request.method == "DELETE":
+            CalendarToken.objects.filter(user=request.user).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if request.method == "POST":
+            token = CalendarToken.issue(request.user)
+        else:
+            token = CalendarToken.objects.filter(user=request.user).first() or CalendarToken.issue(request.user)
+        return Response({"token": token.key, "created": token.created})